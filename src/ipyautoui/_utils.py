@@ -2,9 +2,11 @@ import pathlib
 import json
 import yaml
 import importlib
+import numbers
 from typing import Type
 from markdown import markdown
-from math import log10, floor
+from math import log10, floor, isfinite
+import numpy as np
 import ipywidgets as widgets
 from IPython.display import display, Markdown
 import codecs
@@ -240,13 +242,54 @@ def file(self: Type[BaseModel], path: pathlib.Path, **json_kwargs):
 
 
 def round_sig_figs(x: float, sig_figs: int):
-    if x > 0:
-        sig = sig_figs
-        return round(x, sig - int(floor(log10(abs(x)))) - 1)
+    """round a number to significant figures. zero, None, NaN, inf and non-numbers
+    are returned unchanged.
+
+    Example:
+        >>> round_sig_figs(-1234.5, 2)
+        -1200.0
+    """
+    if (
+        isinstance(x, numbers.Real)
+        and not isinstance(x, bool)
+        and x != 0
+        and isfinite(x)
+    ):
+        return round(x, sig_figs - int(floor(log10(abs(x)))) - 1)
     else:
         return x
 
 
+def round_sig_figs_array(x, sig_figs: int) -> np.ndarray:
+    """vectorized `round_sig_figs`. rounds an array of numbers to significant figures.
+    zero, NaN and inf are returned unchanged.
+
+    Args:
+        x (array_like): numbers to round
+        sig_figs (int): number of significant figures
+
+    Returns:
+        np.ndarray: rounded numbers (float)
+
+    Example:
+        >>> round_sig_figs_array([3.14159, -2718.28, 0, np.nan], 3).tolist()
+        [3.14, -2720.0, 0.0, nan]
+    """
+    x = np.asarray(x, dtype=float)
+    out = x.copy()
+    mask = np.isfinite(x) & (x != 0)
+    if not mask.any():
+        return out
+    values = x[mask]
+    decimals = sig_figs - 1 - np.floor(np.log10(np.abs(values))).astype(int)
+    rounded = np.empty_like(values)
+    for d in np.unique(decimals):  # np.round takes one number of decimals per call
+        sel = decimals == d
+        rounded[sel] = np.round(values[sel], d)
+    out[mask] = rounded
+    return out
+
+
 class PyObj(BaseModel):
     """a definition of a python object"""
 
@@ -0,0 +1,207 @@
+# ---
+# jupyter:
+#   jupytext:
+#     formats: py:light
+#     text_representation:
+#       extension: .py
+#       format_name: light
+#       format_version: '1.5'
+#       jupytext_version: 1.13.8
+#   kernelspec:
+#     display_name: Python 3 (ipykernel)
+#     language: python
+#     name: python3
+# ---
+
+# +
+"""headless version of AutoUi. builds, validates and serializes the value of a form
+without creating any widgets.
+
+The schema is mapped to widget classes in the same way as AutoUi (see `automapschema`
+and `autoipywidget.get_form_plan`), and the defaults and coercions of those widget
+classes are applied to plain python data. Useful for server-side default generation,
+batch jobs and tests, and as a widget-free baseline when benchmarking AutoUi.
+
+Example::
+
+    from ipyautoui.test_schema import TestAutoLogic
+    form = AutoHeadless(TestAutoLogic)
+    form.value = {**form.value, "int_text": 3}
+    form.json
+"""
+# %run __init__.py
+# %load_ext lab_black
+import logging
+import pathlib
+import json
+import typing
+import inspect
+from datetime import datetime, date
+from pydantic import BaseModel
+
+import ipyautoui.automapschema as aumap
+from ipyautoui.autoipywidget import (
+    AutoObject,
+    AutoIpywidget,
+    get_form_plan,
+    get_default_value,
+    validate_ipywidget_value,
+    _get_value_trait,
+)
+from ipyautoui.autoui import parse_json_file
+import ipywidgets as widgets
+
+
+# +
+def coerce_value(caller: aumap.WidgetCaller, value, current=None):
+    """returns `value` as it would be stored by the widget built from `caller`
+    after setting its value (i.e. `widget.value = value; widget.value`).
+
+    Args:
+        caller (aumap.WidgetCaller): widget caller
+        value (typing.Any): value to set
+        current (typing.Any, optional): the current value. objects only update the
+            keys given in `value`. Defaults to the default value.
+
+    Returns:
+        typing.Any: coerced value
+
+    Example:
+        >>> schema = {
+        ...     "type": "object",
+        ...     "properties": {
+        ...         "a": {"type": "integer", "default": 2},
+        ...         "b": {"type": "integer", "minimum": 0, "maximum": 5},
+        ...     },
+        ... }
+        >>> coerce_value(get_form_plan(schema).caller, {"b": 7.0})
+        {'a': 2, 'b': 5}
+    """
+    from ipyautoui.custom.iterable import AutoArray
+    from ipyautoui.custom.editgrid import EditGrid
+    import ipyautoui.autowidgets as auiwidgets
+
+    cls, schema = caller.autoui, caller.schema_
+    if not inspect.isclass(cls):
+        return value
+    if issubclass(cls, AutoObject):
+        plan = get_form_plan(schema, fdir=caller.kwargs.get("fdir"))
+        if current is None:
+            current = get_default_value(caller, build=False)
+        new = dict(current)
+        for k, v in value.items():
+            if k not in plan.pr.keys():
+                logging.critical(f"no widget created for {k}, with value {str(v)}")
+                continue
+            if v is None:
+                v = _get_value_trait(plan.pr[k].autoui).default()
+            new[k] = coerce_value(plan.pr[k], v, current=current.get(k))
+        return new
+    if issubclass(cls, AutoIpywidget):
+        return coerce_value(get_form_plan(schema).caller, value, current=current)
+    if issubclass(cls, AutoArray):
+        item = get_form_plan(schema["items"]).caller
+        return [coerce_value(item, v) for v in value]
+    if issubclass(cls, EditGrid):
+        return list(value) if value else []
+    if issubclass(cls, auiwidgets.DatePickerString):
+        fmt = schema.get("strftime_format", "%Y-%m-%d")
+        if isinstance(value, str):
+            value = datetime.strptime(value, fmt)
+        return value.strftime(fmt) if isinstance(value, (datetime, date)) else None
+    if issubclass(cls, widgets.ValueWidget):
+        kw = auiwidgets.create_widget_caller(schema)
+        return validate_ipywidget_value(cls, kw, value)
+    return value
+
+
+class AutoHeadless:
+    """the value of an AutoUi form, without the widgets. has the same defaults, value
+    shape, coercions and json output as AutoUi built from the same schema.
+    """
+
+    def __init__(
+        self,
+        schema: typing.Union[typing.Type[BaseModel], dict],
+        value: dict = None,
+        path: pathlib.Path = None,
+        update_map_widgets=None,
+        fdir=None,
+    ):
+        """
+        Args:
+            schema (dict): json schema, pydantic model or FormPlan
+            value (dict, optional): value of json. Defaults to None.
+            path (pathlib.Path, optional): path to read / write json. Defaults to None.
+            update_map_widgets (frozenmap, optional): frozen dict of widgets to map to
+                schema items. Defaults to None.
+            fdir (path, optional): fdir to work from. Defaults to the parent of path.
+        """
+        self.path = pathlib.Path(path) if path is not None else None
+        if fdir is None and self.path is not None:
+            fdir = str(self.path.parent)
+        self.plan = get_form_plan(
+            schema, update_map_widgets=update_map_widgets, fdir=fdir
+        )
+        self.model, self.schema = self.plan.model, self.plan.schema
+        self.caller = self.plan.caller
+        self._value = get_default_value(self.caller, build=False)
+        if value is not None:
+            self.value = value
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = coerce_value(self.caller, value, current=self._value)
+
+    @property
+    def json(self):
+        if self.model is not None:
+            return self.model(**self.value).json(indent=4)
+        else:
+            return json.dumps(self.value, indent=4)
+
+    def validate(self):
+        """validates the value against the pydantic model (if there is one)
+
+        Raises:
+            pydantic.ValidationError: if the value is not valid
+
+        Returns:
+            BaseModel or dict: model instance, or the value if there is no model
+        """
+        if self.model is not None:
+            return self.model(**self.value)
+        return self.value
+
+    def _get_path(self, path=None):
+        if path is None:
+            if self.path is not None:
+                return self.path
+            raise ValueError("NO PATH GIVEN: path is None and self.path is None")
+        return pathlib.Path(path)
+
+    def file(self, path=None):
+        p = self._get_path(path=path)
+        p.write_text(self.json, encoding="utf-8")
+
+    def load_file(self, path=None):
+        p = self._get_path(path=path)
+        self.value = parse_json_file(p, model=self.model)
+
+
+# -
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
+
+if __name__ == "__main__":
+    from ipyautoui.test_schema import TestAutoLogic
+
+    form = AutoHeadless(TestAutoLogic)
+    print(form.json)
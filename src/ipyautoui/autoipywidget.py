@@ -29,7 +29,11 @@ Example:
 """
 # %run __init__.py
 # %load_ext lab_black
+import os
+import sys
+import asyncio
 import logging
+import pathlib
 import functools
 import ipywidgets as widgets
 from IPython.display import display
@@ -44,6 +48,11 @@ from ipyautoui.custom.showhide import ShowHide
 import ipyautoui.automapschema as aumap
 import immutables
 import inspect
+import hashlib
+import json
+from pydantic import BaseModel, Field
+from ipyautoui._utils import obj_to_importstr, obj_from_importstr
+from ipywidgets.widgets.widget_selection import _Selection, _MultipleSelection
 
 frozenmap = immutables.Map
 
@@ -84,7 +93,7 @@ def _init_model_schema(schema, by_alias=False):
         model = schema  # the "model" passed is a pydantic model
         schema = model.schema(by_alias=by_alias).copy()
 
-    schema = aumap.attach_schema_refs(schema)
+    schema = aumap.resolve_schema_refs(schema)
     return model, schema
 
 
@@ -102,10 +111,16 @@ def _get_value_trait(obj_with_traits):
     Returns:
         typing.Type: trait type of traitlet
     """
-    if "_value" in obj_with_traits.traits().keys():
-        return obj_with_traits.traits()["_value"]
-    elif "value" in obj_with_traits.traits().keys():
-        return obj_with_traits.traits()["value"]
+    if isinstance(obj_with_traits, LazyWidget):
+        obj_with_traits = obj_with_traits.caller.autoui
+    if inspect.isclass(obj_with_traits):
+        traits = obj_with_traits.class_traits()
+    else:
+        traits = obj_with_traits.traits()
+    if "_value" in traits.keys():
+        return traits["_value"]
+    elif "value" in traits.keys():
+        return traits["value"]
     else:
         raise ValueError(
             f"{str(type(obj_with_traits))}: has no '_value' or 'value' trait"
@@ -139,12 +154,551 @@ def add_fdir_to_widgetcaller(caller, fdir: str):  #: aumap.WidgetCaller
         raise ValueError(f"ERROR add_fdir_to_widgetcallers self.fdir = {fdir}")
 
 
+def _make_label(schema):
+    _get = lambda schema, var: schema[var] if var in schema.keys() else ""
+    return f"<b>{_get(schema, 'title')}</b>, <i>{_get(schema, 'description')}</i>"
+
+
+def json_pointer_token(key) -> str:
+    """escapes a key for use in a json pointer (e.g. the "path" of a value patch)
+
+    Example:
+        >>> json_pointer_token("a/b~c")
+        'a~1b~0c'
+    """
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def schema_hash(schema: dict) -> str:
+    """returns a content hash of a json schema
+
+    Example:
+        >>> schema_hash({"type": "string"}) == schema_hash({"type": "string"})
+        True
+    """
+    s = json.dumps(schema, sort_keys=True, default=str)
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()
+
+
+class FormPlan(BaseModel):
+    """the schema work required to build a form, compiled once and reused by every
+    AutoObject, AutoIpywidget (and so AutoUi) and AutoArray item built from the same
+    schema. holds the resolved schema, the WidgetCaller of the schema and of each
+    property (with fdir added), the row labels and the default row order.
+    """
+
+    key: str
+    schema_: typing.Dict
+    model: typing.Any = Field(None, exclude=True)
+    caller: aumap.WidgetCaller
+    pr: typing.Dict[str, aumap.WidgetCaller] = Field(default_factory=dict)
+    labels: typing.Dict[str, str] = Field(default_factory=dict)
+    default_order: typing.List[str] = Field(default_factory=list)
+    fdir: str = None
+    by_alias: bool = False
+    widgets_map: typing.Any = Field(None, exclude=True)
+
+    @property
+    def schema(self):
+        return self.schema_
+
+    def to_dict(self) -> dict:
+        """returns a json serializable dict of the plan. widgets are stored as import
+        strings. raises ValueError if a widget can't be imported from its import string.
+        """
+
+        def importstr(obj):
+            s = obj_to_importstr(obj)
+            try:
+                if obj_from_importstr(s) is not obj:
+                    raise ValueError
+            except Exception:
+                raise ValueError(f"{str(obj)} can't be imported from: {s}")
+            return s
+
+        return {
+            "key": self.key,
+            "schema": self.schema_,
+            "model": importstr(self.model) if self.model is not None else None,
+            "widget": importstr(self.caller.autoui),
+            "kwargs": self.caller.kwargs,
+            "widgets": {k: importstr(v.autoui) for k, v in self.pr.items()},
+            "widgets_kwargs": {k: v.kwargs for k, v in self.pr.items()},
+            "labels": self.labels,
+            "default_order": self.default_order,
+            "fdir": self.fdir,
+            "by_alias": self.by_alias,
+        }
+
+    @classmethod
+    def from_dict(cls, di: dict, model=None, widgets_map=None) -> "FormPlan":
+        """creates a FormPlan from the output of `FormPlan.to_dict`"""
+        if model is None and di["model"] is not None:
+            model = obj_from_importstr(di["model"])
+        schema = di["schema"]
+        caller = aumap.WidgetCaller.construct(
+            schema_=schema,
+            autoui=obj_from_importstr(di["widget"]),
+            args=[],
+            kwargs=di["kwargs"],
+        )
+        pr = {
+            k: aumap.WidgetCaller.construct(
+                schema_=schema["properties"][k],
+                autoui=obj_from_importstr(v),
+                args=[],
+                kwargs=di["widgets_kwargs"][k],
+            )
+            for k, v in di["widgets"].items()
+        }
+        return cls.construct(
+            key=di["key"],
+            schema_=schema,
+            model=model,
+            caller=caller,
+            pr=pr,
+            labels=di["labels"],
+            default_order=di["default_order"],
+            fdir=di["fdir"],
+            by_alias=di["by_alias"],
+            widgets_map=widgets_map,
+        )
+
+
+def compile_form_plan(
+    schema, by_alias=False, update_map_widgets=None, fdir=None, key=None
+) -> FormPlan:
+    """compiles the FormPlan of a schema. use `get_form_plan` which caches the result.
+
+    Args:
+        schema (dict or pydantic model): json schema or pydantic model
+        by_alias (bool, optional): passed to pydantic `.schema`. Defaults to False.
+        update_map_widgets (dict, optional): passed to `automapschema.widgets_map`.
+            Defaults to None.
+        fdir (str, optional): added to widgets that accept it. Defaults to None.
+        key (str, optional): schema hash. Defaults to None.
+
+    Returns:
+        FormPlan: compiled plan
+    """
+    model, schema = _init_model_schema(schema, by_alias=by_alias)
+    if key is None:
+        key = schema_hash(schema)
+    widgets_map = aumap.widgets_map(update_map_widgets)
+    caller = aumap.map_widget(schema, widgets_map=widgets_map)
+    caller.schema_ = schema  # the resolved schema, so nested widgets find this plan
+    pr = {}
+    if "properties" in schema.keys():
+        pr = {
+            k: aumap.map_widget(v, widgets_map=widgets_map)
+            for k, v in schema["properties"].items()
+        }
+    if fdir is not None:
+        caller = add_fdir_to_widgetcaller(caller, fdir)
+        for v in pr.values():
+            v = add_fdir_to_widgetcaller(v, fdir)
+    return FormPlan.construct(
+        key=key,
+        schema_=schema,
+        model=model,
+        caller=caller,
+        pr=pr,
+        labels={k: _make_label(v.schema_) for k, v in pr.items()},
+        default_order=list(pr.keys()),
+        fdir=fdir,
+        by_alias=by_alias,
+        widgets_map=widgets_map,
+    )
+
+
+#  -- ON-DISK PLAN CACHE ------------------------------------
+PLAN_CACHE_VERSION = 1  # increment if the way plans are compiled changes
+_PLAN_CACHE_DIR = None
+
+
+def default_plan_cache_dir() -> pathlib.Path:
+    """returns the ipyautoui folder within the user cache directory"""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA", pathlib.Path.home() / "AppData" / "Local")
+    elif sys.platform == "darwin":
+        base = pathlib.Path.home() / "Library" / "Caches"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME", pathlib.Path.home() / ".cache")
+    return pathlib.Path(base) / "ipyautoui" / "plans"
+
+
+def enable_plan_cache(fdir=None):
+    """stores the FormPlans of pydantic models on disk, such that they are not
+    compiled again after a kernel restart. plans are keyed by the import path of the
+    model and a content hash of its schema, so a changed model gets a new plan.
+    the cache can also be enabled by setting the env var IPYAUTOUI_PLAN_CACHE_DIR.
+
+    Args:
+        fdir (pathlib.Path, optional): cache directory. Defaults to
+            `default_plan_cache_dir()`.
+    """
+    global _PLAN_CACHE_DIR
+    _PLAN_CACHE_DIR = (
+        pathlib.Path(fdir) if fdir is not None else default_plan_cache_dir()
+    )
+
+
+def disable_plan_cache():
+    global _PLAN_CACHE_DIR
+    _PLAN_CACHE_DIR = None
+
+
+def get_plan_cache_dir() -> typing.Optional[pathlib.Path]:
+    """returns the plan cache directory or None if the cache is disabled"""
+    if _PLAN_CACHE_DIR is not None:
+        return _PLAN_CACHE_DIR
+    if os.environ.get("IPYAUTOUI_PLAN_CACHE_DIR"):
+        return pathlib.Path(os.environ["IPYAUTOUI_PLAN_CACHE_DIR"])
+    return None
+
+
+def _plan_cache_path(model, key, fdir=None, by_alias=False):
+    fdir_cache = get_plan_cache_dir()
+    if fdir_cache is None or model is None:
+        return None
+    try:
+        importstr = obj_to_importstr(model)
+        if obj_from_importstr(importstr) is not model:
+            return None
+    except Exception:
+        return None
+    options = json.dumps([key, fdir, by_alias, PLAN_CACHE_VERSION])
+    h = hashlib.sha1(options.encode("utf-8")).hexdigest()[:16]
+    return fdir_cache / f"{importstr}-{h}.json"
+
+
+def _read_plan_cache(path, model, widgets_map) -> typing.Optional[FormPlan]:
+    if not path.is_file():
+        return None
+    try:
+        di = json.loads(path.read_text(encoding="utf-8"))
+        return FormPlan.from_dict(di, model=model, widgets_map=widgets_map)
+    except Exception:
+        logging.info(f"failed to read cached FormPlan: {str(path)}")
+        return None
+
+
+def _write_plan_cache(path, plan: FormPlan):
+    try:
+        s = json.dumps(plan.to_dict(), indent=None)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(s, encoding="utf-8")
+        os.replace(tmp, path)
+    except Exception:
+        logging.info(f"FormPlan not cached to disk: {str(path)}")
+
+
+#  ----------------------------------------------------------
+
+
+_FORM_PLANS = {}
+
+
+def get_form_plan(
+    schema, by_alias=False, update_map_widgets=None, fdir=None
+) -> FormPlan:
+    """returns the FormPlan of a schema. plans are cached process-wide by schema hash
+    (and the options that change the plan), so the schema work is only done once
+    per schema. plans of pydantic models are also cached on disk if
+    `enable_plan_cache` has been called.
+
+    Args:
+        schema (dict, pydantic model or FormPlan): json schema or pydantic model.
+            a FormPlan is returned as is.
+        by_alias (bool, optional): passed to pydantic `.schema`. Defaults to False.
+        update_map_widgets (dict, optional): passed to `automapschema.widgets_map`.
+            Defaults to None.
+        fdir (str, optional): added to widgets that accept it. Defaults to None.
+
+    Returns:
+        FormPlan: compiled plan
+
+    Example:
+        >>> from ipyautoui.test_schema import TestAutoLogicSimple
+        >>> get_form_plan(TestAutoLogicSimple) is get_form_plan(TestAutoLogicSimple)
+        True
+    """
+    if isinstance(schema, FormPlan):
+        return schema
+    fingerprint = aumap.widgets_map_fingerprint(update_map_widgets)
+    if fingerprint is None or (type(schema) != dict and not isinstance(schema, type)):
+        # ^ unhashable update_map_widgets or an instance of a pydantic model
+        return compile_form_plan(
+            schema,
+            by_alias=by_alias,
+            update_map_widgets=update_map_widgets,
+            fdir=fdir,
+        )
+    if type(schema) == dict:
+        model, raw = None, schema
+    else:
+        model, raw = schema, schema.schema(by_alias=by_alias)
+    widgets_map = aumap.widgets_map(update_map_widgets)
+    opts = (model, fingerprint, fdir, by_alias)
+    key = schema_hash(raw)  # not cached by id, as a schema dict may be edited in place
+    plan = _FORM_PLANS.get((key,) + opts)
+    if plan is None or plan.widgets_map is not widgets_map:
+        path = None
+        if fingerprint == () and not aumap._REGISTERED_WIDGET_MAPPERS:
+            path = _plan_cache_path(model, key, fdir=fdir, by_alias=by_alias)
+        plan = None
+        if path is not None:
+            plan = _read_plan_cache(path, model, widgets_map)
+        if plan is None:
+            plan = compile_form_plan(
+                schema,
+                by_alias=by_alias,
+                update_map_widgets=update_map_widgets,
+                fdir=fdir,
+                key=key,
+            )
+            if path is not None:
+                _write_plan_cache(path, plan)
+        _FORM_PLANS[(key,) + opts] = plan
+        if fingerprint == () and model is not None:
+            # the root widget (e.g. AutoObject) is created from `plan.schema` with
+            # the default widgets_map. it can use the same plan.
+            nested_plan = FormPlan.construct(
+                **{**plan.__dict__, "model": None, "by_alias": False}
+            )
+            nested_key = (schema_hash(plan.schema), None, (), fdir, False)
+            _FORM_PLANS[nested_key] = nested_plan
+    return plan
+
+
+def clear_form_plan_cache():
+    """clears the cached FormPlans"""
+    _FORM_PLANS.clear()
+
+
+#  -- DEFAULT VALUES ------------------------------------------
+def _clamp(value, min_, max_):
+    return min(max(value, min_), max_)
+
+
+def _get_bounds(cls, kw):
+    cls_traits = cls.class_traits()
+    return (
+        kw.get("min", cls_traits["min"].default()),
+        kw.get("max", cls_traits["max"].default()),
+    )
+
+
+def validate_ipywidget_value(cls, kw, value):
+    """returns `value` as it would be stored by an ipywidget subclass initialised with
+    `kw` (i.e. `create_widget_caller(schema)`). raises a TraitError if it is invalid.
+
+    Example:
+        >>> validate_ipywidget_value(widgets.IntSlider, {"max": 10}, 12.5)
+        10
+    """
+    if issubclass(cls, _Selection):
+        if value is not None and value not in kw.get("options", []):
+            raise traitlets.TraitError(f"Invalid selection: {str(value)} not found")
+        return value
+    if issubclass(cls, _MultipleSelection):
+        options = kw.get("options", [])
+        for v in value:
+            if v not in options:
+                raise traitlets.TraitError(f"Invalid selection: {str(v)} not found")
+        return tuple(value)
+    if issubclass(cls, (widgets.IntRangeSlider, widgets.FloatRangeSlider)):
+        min_, max_ = _get_bounds(cls, kw)
+        cast = int if issubclass(cls, widgets.IntRangeSlider) else float
+        lower, upper = (cast(v) for v in value)
+        if lower > upper:
+            raise traitlets.TraitError("setting lower > upper")
+        return (_clamp(lower, min_, max_), _clamp(upper, min_, max_))
+    value = cls.class_traits()["value"].validate(None, value)
+    if issubclass(cls, (widgets.IntSlider, widgets.FloatSlider)):
+        value = _clamp(value, *_get_bounds(cls, kw))
+    return value
+
+
+def _get_default_ipywidget_value(cls, schema):
+    """default value of an ipywidget subclass initialised with
+    `create_widget_caller(schema)`. returns `NotImplemented` if unknown."""
+    from ipyautoui.autowidgets import create_widget_caller
+
+    if not issubclass(cls, widgets.ValueWidget):
+        return NotImplemented
+    kw = create_widget_caller(schema)
+    value = kw.get("value")
+    if value is None:
+        if issubclass(cls, _Selection):
+            options = list(kw.get("options", []))
+            return options[0] if options else None
+        if issubclass(cls, (widgets.IntRangeSlider, widgets.FloatRangeSlider)):
+            min_, max_ = _get_bounds(cls, kw)
+            value = (0.75 * min_ + 0.25 * max_, 0.25 * min_ + 0.75 * max_)
+        else:
+            value = cls.class_traits()["value"].default()
+    return validate_ipywidget_value(cls, kw, value)
+
+
+def get_default_value(caller, build=True):
+    """returns the value that the widget built from `caller` starts with, without
+    building it. used for the nested sections of a lazy AutoObject and by
+    `AutoHeadless`.
+
+    Args:
+        caller (aumap.WidgetCaller): widget caller
+        build (bool, optional): build widgets with an unknown default value and read
+            their value. if False, their "_value" trait default or the schema default
+            is used instead. Defaults to True.
+
+    Returns:
+        typing.Any: default value
+
+    Example:
+        >>> schema = {
+        ...     "type": "object",
+        ...     "properties": {"a": {"type": "integer", "default": 2}},
+        ... }
+        >>> get_default_value(get_form_plan(schema).caller)
+        {'a': 2}
+    """
+    from ipyautoui.custom.iterable import AutoArray
+    from ipyautoui.custom.editgrid import EditGrid
+    import ipyautoui.autowidgets as auiwidgets
+
+    cls, schema = caller.autoui, caller.schema_
+    if inspect.isclass(cls):
+        if issubclass(cls, AutoObject):
+            plan = get_form_plan(schema, fdir=caller.kwargs.get("fdir"))
+            return {k: get_default_value(v, build=build) for k, v in plan.pr.items()}
+        if issubclass(cls, AutoIpywidget):
+            return get_default_value(get_form_plan(schema).caller, build=build)
+        if issubclass(cls, AutoArray):
+            if "default" not in schema.keys():
+                return []
+            item = get_form_plan(schema["items"]).caller
+            return [get_default_value(item, build=build) for v in schema["default"]]
+        if issubclass(cls, auiwidgets.EditGrid):
+            return list(schema.get("default") or [])
+        if issubclass(cls, EditGrid):
+            return list(caller.kwargs.get("value") or [])
+        if issubclass(cls, auiwidgets.AutoPlaceholder):
+            return cls.placeholder_text(schema)
+        if issubclass(cls, auiwidgets.DatePickerString):
+            return None  # NOTE: the schema default is not shown by the widget
+        value = _get_default_ipywidget_value(cls, schema)
+        if value is not NotImplemented:
+            return value
+    if not build:
+        value = auiwidgets.create_widget_caller(schema).get("value")
+        if value is None and inspect.isclass(cls) and "_value" in cls.class_traits():
+            value = cls.class_traits()["_value"].default()
+        return value
+    logging.debug(f"building {str(cls)} to find its default value")
+    widget = aumap.widgetcaller(caller)
+    value = widget.value
+    if isinstance(widget, widgets.Widget):
+        widget.close()
+    return value
+
+
+#  -- LAZY NESTED WIDGETS -------------------------------------
+def is_lazy_caller(caller) -> bool:
+    """nested AutoObject, AutoArray and EditGrid widgets are built lazily"""
+    from ipyautoui.custom.iterable import AutoArray
+    from ipyautoui.custom.editgrid import EditGrid
+
+    return inspect.isclass(caller.autoui) and issubclass(
+        caller.autoui, (AutoObject, AutoArray, EditGrid)
+    )
+
+
+def _caller_with_lazy(caller, lazy=True):
+    """passes `lazy` to widgets that accept it"""
+    if "lazy" in inspect.getfullargspec(caller.autoui).args:
+        return caller.copy(update={"kwargs": {**caller.kwargs, "lazy": lazy}})
+    return caller
+
+
+class LazyWidget(traitlets.HasTraits):
+    """stands in for a nested widget of a lazy AutoObject. the value is held as plain
+    data until `build` is called (when the nested section is first expanded), then
+    the widget is built and kept in sync.
+    """
+
+    _value = traitlets.Any(allow_none=True)
+    value_change = traitlets.Dict(default_value=None, allow_none=True)
+    disabled = traitlets.Bool(default_value=False)
+
+    def __init__(self, caller, value=None):
+        """
+        Args:
+            caller (aumap.WidgetCaller): widget caller of the nested widget
+            value (typing.Any, optional): value. Defaults to the default value of
+                the widget.
+        """
+        super().__init__()
+        self.caller = caller
+        self.widget = None
+        self._value = get_default_value(caller) if value is None else value
+
+    @property
+    def is_built(self):
+        return self.widget is not None
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        if self.widget is not None:
+            self.widget.value = value
+        else:
+            self._value = value
+
+    @traitlets.observe("disabled")
+    def _observe_disabled(self, change):
+        if self.widget is not None:
+            self.widget.disabled = change["new"]
+
+    def build(self):
+        """builds the widget (once) and returns it"""
+        if self.widget is None:
+            widget = aumap.widgetcaller(_caller_with_lazy(self.caller))
+            widget.value = self._value
+            if self.disabled:
+                widget.disabled = True
+            if widget.has_trait("value_change"):
+                widget.observe(self._on_value_change, "value_change")
+            else:
+                name = "value" if widget.has_trait("value") else "_value"
+                widget.observe(self._on_change, name)
+            self.widget = widget
+            self._value = widget.value
+        return self.widget
+
+    def _on_change(self, change):
+        self._value = self.widget.value
+        self.value_change = {"op": "replace", "path": "", "value": self._value}
+
+    def _on_value_change(self, change):
+        self._value = self.widget.value
+        self.value_change = change["new"]
+
+
 def horizontal_row_nested(widget, label, auto_open=False):
     # BUG: Reported defects -@jovyan at 8/23/2022, 10:30:52 PM
     # ^ buggy behaviour associated to ShowHide class for nested objects observed in
     # example form linked to `horizontal_row_nested`
+    if isinstance(widget, LazyWidget):
+        fn_display = widget.build  # built when first expanded
+    else:
+        fn_display = lambda: widget
     return ShowHide(
-        fn_display=lambda: widget,
+        fn_display=fn_display,
         title=label,
         auto_open=auto_open,
         button_width="300px",
@@ -182,11 +736,15 @@ def create_row(
     if nested_widgets is None:
         nested_widgets = []
     if align_horizontal:
-        if True in [isinstance(widget, w) for w in nested_widgets]:
+        if isinstance(widget, LazyWidget):
+            return horizontal_row_nested(widget, label, auto_open=auto_open)
+        elif True in [isinstance(widget, w) for w in nested_widgets]:
             return horizontal_row_nested(widget, label, auto_open=auto_open)
         else:
             return horizontal_row_simple(widget, label)
     else:
+        if isinstance(widget, LazyWidget):
+            widget = widget.build()
         return vertical_row(widget, label)
 
 
@@ -200,6 +758,11 @@ class AutoObject(widgets.VBox):
     nested_widgets = traitlets.List()
     order = traitlets.List(default_value=None, allow_none=True)
     insert_rows = traitlets.Dict(default_value=None, allow_none=True)
+    lazy = traitlets.Bool(default_value=False)
+    value_change = traitlets.Dict(default_value=None, allow_none=True)
+    # ^ the last change to "_value" as a json-patch operation, e.g.
+    # {"op": "replace", "path": "/nested/string1", "value": "a"}
+    _bulk_update = False  # True while the value setter updates the widgets
 
     @traitlets.validate("insert_rows")
     def _insert_rows(self, proposal):
@@ -261,10 +824,17 @@ class AutoObject(widgets.VBox):
 
     @value.setter
     def value(self, value):
-        """this is for setting the value via the API"""
-        self._value = value
-        if hasattr(self, "di_widgets"):
-            self._update_widgets_from_value()
+        """this is for setting the value via the API. only the widgets whose value
+        changes are updated, and a single "_value" change is sent"""
+        if not hasattr(self, "di_widgets"):
+            self._value = value
+            return
+        changed = self._set_widget_values(value)
+        if changed:
+            value = {**self._value, **{k: self.di_widgets[k].value for k in changed}}
+            with self.hold_trait_notifications():
+                self._value = value
+                self.value_change = {"op": "replace", "path": "", "value": value}
 
     def __init__(
         self,
@@ -276,11 +846,12 @@ class AutoObject(widgets.VBox):
         order=None,
         insert_rows=None,
         nested_widgets=None,
+        lazy=False,
     ):
         """creates a widget input form from schema. datatype must be "object"
 
         Args:
-            schema (dict): json schema defining widget to generate
+            schema (dict): json schema, pydantic model or FormPlan defining widget to generate
             value (dict, optional): value of json. Defaults to None.
             update_map_widgets (frozenmap, optional): frozen dict of widgets to map to schema items. Defaults to None.
             fdir (path, optional): fdir to work from. useful for widgets that link to files. Defaults to None.
@@ -289,6 +860,8 @@ class AutoObject(widgets.VBox):
                 is ignored by the widget otherwise.
             nested_widgets (list): e.g. [FileUploadToDir]. allows user to indicate widgets that should be show / hide 
                 type 
+            lazy (bool): if True, nested objects, arrays and grids hold their value as data and their widgets
+                are only built when first expanded. Defaults to False.
 
         Returns: 
             AutoIpywidget(widgets.VBox)
@@ -298,6 +871,7 @@ class AutoObject(widgets.VBox):
         self.insert_rows = insert_rows
         self.update_map_widgets = update_map_widgets
         self.fdir = fdir
+        self.lazy = lazy
         self._init_schema(schema, by_alias=by_alias)
         self._init_ui()
         self.order = setdefault(order, None)
@@ -310,24 +884,30 @@ class AutoObject(widgets.VBox):
         self._init_controls()
 
     def _init_schema(self, schema, by_alias=False):
-        self.model, self.schema = _init_model_schema(schema, by_alias=by_alias)
+        self.plan = get_form_plan(
+            schema,
+            by_alias=by_alias,
+            update_map_widgets=self.update_map_widgets,
+            fdir=self.fdir,
+        )
+        self.model, self.schema = self.plan.model, self.plan.schema
         if "type" not in self.schema.keys() and self.schema["type"] != "object":
             raise ValueError(
                 '"type" must be in schema keys and "type" must == "object"'
             )
-        pr = self.schema["properties"]
-        self.pr = {
-            k: aumap.map_widget(v, widgets_map=self.widgets_map) for k, v in pr.items()
-        }
-        if self.fdir is not None:
-            for v in self.pr.values():
-                v = add_fdir_to_widgetcaller(v, self.fdir)
+        self.pr = self.plan.pr
 
     def _init_widgets(self):
-        self.di_labels, self.di_widgets = _init_widgets_and_labels(self.pr)
+        self.di_labels = dict(self.plan.labels)
+        self.di_widgets = {k: self._init_widget(v) for k, v in self.pr.items()}
         self._value = self.di_widgets_value
         self._update_widgets_from_value()
 
+    def _init_widget(self, caller):
+        if self.lazy and is_lazy_caller(caller):
+            return LazyWidget(caller)
+        return aumap.widgetcaller(caller)
+
     def _init_form(self):
         super().__init__(
             layout=widgets.Layout(width="100%", display="flex", flex="flex-grow",)
@@ -361,7 +941,12 @@ class AutoObject(widgets.VBox):
 
     def _init_watch_widgets(self):
         for k, v in self.di_widgets.items():
-            if v.has_trait("value"):
+            if v.has_trait("value_change"):
+                v.observe(
+                    functools.partial(self._watch_change, key=k, watch="value_change"),
+                    "value_change",
+                )
+            elif v.has_trait("value"):
                 v.observe(
                     functools.partial(self._watch_change, key=k, watch="value"), "value"
                 )
@@ -389,20 +974,57 @@ class AutoObject(widgets.VBox):
         )
 
     def _watch_change(self, change, key=None, watch="value"):
-        self._value = self.di_widgets_value
+        if self._bulk_update:
+            return  # the value setter sends a single change
+        # only the changed key is read from its widget (not every widget). each
+        # AutoObject on the path to the field makes a shallow copy of its own
+        # dict, so a change costs the sum of the widths of those dicts
+        value = self.di_widgets[key].value
+        self._value = {**self._value, key: value}
         # NOTE: it is required to set the whole "_value" otherwise
         # traitlets doesn't register the change. -@jovyan at 7/18/2022, 12:45:48 PM
+        if watch == "value_change" and change["new"] is not None:
+            path, value = change["new"]["path"], change["new"]["value"]
+        else:
+            path = ""
+        self.value_change = {
+            "op": "replace",
+            "path": f"/{json_pointer_token(key)}{path}",
+            "value": value,
+        }
 
     def _update_widgets_from_value(self):
-        for k, v in self.value.items():
-            if k in self.di_widgets.keys():
+        self._set_widget_values(self.value)
+
+    def _set_widget_values(self, value: dict) -> typing.List[str]:
+        """sets the value of the widgets that differ from `value`
+
+        Returns:
+            typing.List[str]: keys of the widgets that were set
+        """
+        changed = []
+        self._bulk_update = True
+        try:
+            for k, v in value.items():
+                if k not in self.di_widgets.keys():
+                    logging.critical(
+                        f"no widget created for {k}, with value {str(v)}. fix this in the schema! TODO: fix the schema reader and UI to support nesting. or use ipyvuetify"
+                    )
+                    continue
+                widget = self.di_widgets[k]
                 if v is None:
-                    v = _get_value_trait(self.di_widgets[k]).default()
-                self.di_widgets[k].value = v
-            else:
-                logging.critical(
-                    f"no widget created for {k}, with value {str(v)}. fix this in the schema! TODO: fix the schema reader and UI to support nesting. or use ipyvuetify"
-                )
+                    v = _get_value_trait(widget).default()
+                if self._value is not None and k in self._value and self._value[k] == v:
+                    continue
+                if isinstance(widget, widgets.Widget):
+                    with widget.hold_sync():
+                        widget.value = v
+                else:
+                    widget.value = v
+                changed.append(k)
+        finally:
+            self._bulk_update = False
+        return changed
 
     @property
     def di_widgets_value(self):
@@ -430,19 +1052,46 @@ class AutoIpywidget(widgets.VBox):
     """Automatically generates the widget based on an input schema"""
 
     fdir = traitlets.Unicode(allow_none=True)
+    value_change = traitlets.Dict(default_value=None, allow_none=True)
+    # ^ passed on from the autowidget if it has one. see `AutoObject`
+    value_debounce_ms = traitlets.Int(default_value=0)
     # TODO: Tasks pending completion -@jovyan at 7/18/2022, 2:06:04 PM
     # consider changing name `update_map_widgets` to `update_widgets_mapper`
 
     # TODO: Tasks pending completion -@jovyan at 9/07/2022, 2:06:04 PM
     # consider whether this shouldn't inherit AutoObject afterall...
-    def __init__(self, schema, value=None, update_map_widgets=None, fdir=None):
+    def __init__(
+        self,
+        schema,
+        value=None,
+        update_map_widgets=None,
+        fdir=None,
+        lazy=False,
+        value_debounce_ms=0,
+    ):
+        """
+        Args:
+            schema (dict): json schema, pydantic model or FormPlan defining widget to generate
+            value (optional): value of widget. Defaults to None.
+            update_map_widgets (frozenmap, optional): frozen dict of widgets to map to schema items. Defaults to None.
+            fdir (path, optional): fdir to work from. useful for widgets that link to files. Defaults to None.
+            lazy (bool, optional): passed to AutoObject. see `AutoObject`. Defaults to False.
+            value_debounce_ms (int, optional): if > 0, a burst of changes to the widget
+                (e.g. typing) is sent as a single "_value" change once there have been no
+                changes for `value_debounce_ms`. runs on the running asyncio event loop
+                (i.e. the kernel's), and if there isn't one changes are sent immediately.
+                Defaults to 0.
+        """
         self.update_map_widgets = update_map_widgets
         self.fdir = fdir
+        self.lazy = lazy  # passed to AutoObject. see `AutoObject`
+        self.value_debounce_ms = value_debounce_ms
+        self._debounce_handle = None
         self._init_ui(schema)
         if value is not None:
             self.value = value
         else:
-            self._on_change("change")
+            self.flush_value()
 
     @property
     def update_map_widgets(self):
@@ -466,16 +1115,18 @@ class AutoIpywidget(widgets.VBox):
         self.add_traits(**{"_value": trait_type()})
 
     def _init_schema(self, schema):
-        self.model, self.schema = _init_model_schema(schema)
-        self.caller = aumap.map_widget(self.schema, widgets_map=self.widgets_map)
-        if self.fdir is not None:
-            v = add_fdir_to_widgetcaller(caller=self.caller, fdir=self.fdir)
+        self.plan = get_form_plan(
+            schema, update_map_widgets=self.update_map_widgets, fdir=self.fdir
+        )
+        self.model, self.schema = self.plan.model, self.plan.schema
+        self.caller = self.plan.caller
 
     def _init_form(self):
         super().__init__(
             layout=widgets.Layout(width="100%", display="flex", flex="flex-grow")
         )
-        self.autowidget = aumap.widgetcaller(self.caller)
+        caller = _caller_with_lazy(self.caller) if self.lazy else self.caller
+        self.autowidget = aumap.widgetcaller(caller)
         self.children = [self.autowidget]
 
     def _init_controls(self):
@@ -485,17 +1136,46 @@ class AutoIpywidget(widgets.VBox):
             self.autowidget.observe(self._on_change, "_value")
         else:
             pass
+        if self.autowidget.has_trait("value_change"):
+            self.autowidget.observe(self._on_value_change, "value_change")
 
     def _on_change(self, change):
+        if self.value_debounce_ms > 0 and self._schedule_flush_value():
+            return
+        self._value = self.autowidget.value
+
+    def _on_value_change(self, change):
+        self.value_change = change["new"]
+
+    def _schedule_flush_value(self) -> bool:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False  # no event loop. e.g. not running in a kernel
+        if self._debounce_handle is not None:
+            self._debounce_handle.cancel()
+        self._debounce_handle = loop.call_later(
+            self.value_debounce_ms / 1000, self.flush_value
+        )
+        return True
+
+    def flush_value(self):
+        """sends any pending (debounced) change to "_value" now"""
+        if self._debounce_handle is not None:
+            self._debounce_handle.cancel()
+            self._debounce_handle = None
         self._value = self.autowidget.value
 
     @property
     def value(self):
+        if self._debounce_handle is not None:
+            return self.autowidget.value
         return self._value
 
     @value.setter
     def value(self, value):
         self.autowidget.value = value
+        self.flush_value()
 
 
 if __name__ == "__main__":
@@ -17,6 +17,10 @@
 # %run __init__.py
 # %load_ext lab_black
 import typing
+import logging
+import weakref
+import functools
+from copy import deepcopy
 from pydantic import BaseModel, Field
 from ipywidgets import widgets
 import ipywidgets as widgets
@@ -44,15 +48,146 @@ def recursive_search_schema(schema: typing.Dict, li: typing.List) -> typing.Dict
         return schema[f]
 
 
+@functools.lru_cache(maxsize=None)
+def parse_json_pointer(ref: str) -> typing.Tuple[str, ...]:
+    """parses a local json pointer (e.g. "#/definitions/Thing") into a tuple of keys
+
+    Args:
+        ref (str): json pointer
+
+    Returns:
+        typing.Tuple[str, ...]: keys to search down the schema tree
+
+    Example:
+        >>> parse_json_pointer("#/definitions/Thing")
+        ('definitions', 'Thing')
+        >>> parse_json_pointer("#/definitions/a~1b")
+        ('definitions', 'a/b')
+    """
+    if not ref.startswith("#"):
+        raise ValueError(f"only local $refs are supported: {ref}")
+    li = ref[1:].split("/")[1:]
+    return tuple(l.replace("~1", "/").replace("~0", "~") for l in li)
+
+
+class SchemaRefResolver:
+    """resolves the $refs of a json schema against its definitions. the input schema is
+    not edited, a new schema is returned. each $ref is resolved once and then copied
+    where it is used. recursive references are expanded lazily: where a definition
+    references itself (directly or indirectly) the unresolved definition is returned
+    together with the schema "definitions", such that it can be resolved again when
+    the nested widget is created.
+    """
+
+    def __init__(self, schema: dict):
+        self.schema = schema
+        self._cache = {}
+        self._resolving = set()
+        self._definitions = None
+
+    def _lookup(self, path):
+        node = self.schema
+        for key in path:
+            if isinstance(node, list):
+                key = int(key)
+            node = node[key]
+        return node
+
+    @property
+    def definitions(self):
+        if self._definitions is None:
+            self._definitions = deepcopy(self.schema.get("definitions", {}))
+        return self._definitions
+
+    def _copy(self, node):
+        if isinstance(node, dict):
+            # the definitions of a lazily expanded schema are shared (they are not edited)
+            return {
+                k: (v if k == "definitions" else self._copy(v))
+                for k, v in node.items()
+            }
+        elif isinstance(node, list):
+            return [self._copy(v) for v in node]
+        else:
+            return node
+
+    def resolve_ref(self, ref: str) -> dict:
+        """returns the resolved definition of a $ref"""
+        path = parse_json_pointer(ref)
+        if path in self._cache:
+            return self._copy(self._cache[path])
+        if path in self._resolving:
+            # recursive definition. expanded when the nested schema is resolved
+            return {**deepcopy(self._lookup(path)), "definitions": self.definitions}
+        self._resolving.add(path)
+        try:
+            resolved = self._resolve(self._lookup(path))
+        finally:
+            self._resolving.discard(path)
+        self._cache[path] = resolved
+        return self._copy(resolved)
+
+    def _resolve(self, node):
+        if isinstance(node, list):
+            return [self._resolve(v) for v in node]
+        elif not isinstance(node, dict):
+            return node
+        elif "definitions" in node.keys() and node is not self.schema:
+            # lazily expanded schema. resolved when it is used as a schema itself
+            return self._copy(node)
+        elif "$ref" in node.keys() and isinstance(node["$ref"], str):
+            return self.resolve_ref(node["$ref"])
+        elif (
+            "allOf" in node.keys()
+            and len(node["allOf"]) == 1
+            and "$ref" in node["allOf"][0].keys()
+        ):
+            # ^ this is an edge case for setting enums with Field values (probs unique to how pydantic does it)
+            ref = self.resolve_ref(node["allOf"][0]["$ref"])
+            di = {k: self._resolve(v) for k, v in node.items() if k != "allOf"}
+            return {k: v for k, v in ref.items() if k not in node.keys()} | di
+        else:
+            return {k: self._resolve(v) for k, v in node.items()}
+
+    def resolve(self) -> dict:
+        """returns a copy of the schema with $refs replaced by their definitions"""
+        return self._resolve(self.schema)
+
+
+def resolve_schema_refs(schema: dict) -> dict:
+    """returns a copy of the schema with $refs replaced by their definitions. the input
+    schema is not edited. recursive definitions are expanded lazily (see
+    SchemaRefResolver).
+
+    Args:
+        schema (dict): json schema
+
+    Returns:
+        dict: schema with $refs replaced with #definitions
+
+    Example:
+        >>> schema = {
+        ...     "title": "Test",
+        ...     "type": "object",
+        ...     "properties": {"nested": {"$ref": "#/definitions/Nested"}},
+        ...     "definitions": {"Nested": {"title": "Nested", "type": "object", "properties": {}}},
+        ... }
+        >>> resolve_schema_refs(schema)["properties"]["nested"]["title"]
+        'Nested'
+        >>> schema["properties"]["nested"]
+        {'$ref': '#/definitions/Nested'}
+    """
+    return SchemaRefResolver(schema).resolve()
+
+
 def attach_schema_refs(schema, schema_base=None):
     """
-    attachs #definitions to $refs within the main schema
-    recursive function. schema_base is constant as is used for retrieving definitions.
-    schema is recursively edited.
+    attachs #definitions to $refs within the main schema. the input schema is not
+    edited (see `resolve_schema_refs`).
 
     Args:
         schema (dict): json schema
-        schema_base (dict): same as above but isn't recursively searched. leave blank
+        schema_base (dict): schema the #definitions are retrieved from. leave blank
             and it defaults to schema
 
     Returns:
@@ -60,42 +195,8 @@ def attach_schema_refs(schema, schema_base=None):
 
     """
     if schema_base is None:
-        schema_base = schema
-    if type(schema) == list:
-        for n, s in enumerate(schema):
-            schema[n] = attach_schema_refs(s, schema_base=schema_base)
-    elif type(schema) == dict:
-        for k, v in schema.items():
-            if type(v) == dict:
-                if "$ref" in v:
-                    # FIXME: Needing refactor or cleanup -@jovyan at 8/31/2022, 12:24:09 AM
-                    # refs are only attached to schema values, meaning that root definitions
-                    # are ignored.
-                    li_filt = v["$ref"].split("/")[1:]
-                    schema[k] = recursive_search_schema(schema_base, li_filt)
-                elif (
-                    "allOf" in v
-                    and len(v["allOf"]) == 1
-                    and "$ref" in v["allOf"][0].keys()
-                ):
-                    # ^ this is an edge case for setting enums with Field values (probs unique to how pydantic does it)
-                    li_filt = v["allOf"][0]["$ref"].split("/")[1:]
-                    ref = recursive_search_schema(schema_base, li_filt)
-                    schema[k] = {
-                        k_: v_
-                        for k_, v_ in ref.items()
-                        if k_ not in list(schema[k].keys())
-                    } | schema[k]
-                    del schema[k]["allOf"]
-                else:
-                    schema[k] = attach_schema_refs(v, schema_base=schema_base)
-            elif type(v) == list:
-                schema[k] = attach_schema_refs(v, schema_base=schema_base)
-            else:
-                pass
-    else:
-        pass
-    return schema
+        return resolve_schema_refs(schema)
+    return SchemaRefResolver(schema_base)._resolve(schema)
 
 
 #  ----------------------------------------------------------
@@ -487,7 +588,16 @@ def update_widgets_map(widgets_map, di_update=None):
     return _
 
 
-def widgets_map(di_update=None):
+def make_widgets_map(di_update=None):
+    """builds the widgets_map. use `widgets_map` which memoizes the result.
+
+    Args:
+        di_update (dict, optional): dict of WidgetMappers to update the defaults with.
+            Defaults to None.
+
+    Returns:
+        frozenmap: dict of WidgetMappers
+    """
 
     WIDGETS_MAP = frozenmap(
         **{
@@ -540,6 +650,7 @@ def widgets_map(di_update=None):
         "DataFrame": WidgetMapper(fn_filt=is_DataFrame, widget=EditGrid),
         "object": WidgetMapper(fn_filt=is_Object, widget=AutoObject),
     }
+    di_update_ = {**di_update_, **_REGISTERED_WIDGET_MAPPERS}
     if di_update is not None:
         di_update = {**di_update_, **di_update}
     else:
@@ -547,6 +658,278 @@ def widgets_map(di_update=None):
     return update_widgets_map(WIDGETS_MAP, di_update=di_update)
 
 
+_REGISTERED_WIDGET_MAPPERS = {}
+_WIDGETS_MAP_REGISTRY = {}
+
+
+def widgets_map_fingerprint(di_update=None) -> typing.Optional[typing.Hashable]:
+    """returns a hashable fingerprint of the update mapping passed to `widgets_map`.
+    returns None if the mapping can't be fingerprinted (it is then not memoized).
+
+    Example:
+        >>> widgets_map_fingerprint() == widgets_map_fingerprint({})
+        True
+        >>> mapper = WidgetMapper(fn_filt=is_Text, widget=auiwidgets.Text)
+        >>> widgets_map_fingerprint({"Text": mapper}) == widgets_map_fingerprint({"Text": mapper.copy()})
+        True
+    """
+    if di_update is None:
+        di_update = {}
+    try:
+        fingerprint = tuple(
+            sorted(
+                ((k, v.fn_filt, v.widget) for k, v in di_update.items()),
+                key=lambda x: x[0],
+            )
+        )
+        hash(fingerprint)
+    except (AttributeError, TypeError):
+        return None
+    return fingerprint
+
+
+def widgets_map(di_update=None):
+    """returns the widgets_map of WidgetMappers updated with `di_update`. the map is
+    memoized process-wide, keyed on a fingerprint of `di_update`, so that the
+    (immutable) map is built once and shared between all widgets that use it.
+
+    Args:
+        di_update (dict, optional): dict of WidgetMappers to update the defaults with.
+            Defaults to None.
+
+    Returns:
+        frozenmap: dict of WidgetMappers
+
+    Example:
+        >>> widgets_map() is widgets_map()
+        True
+    """
+    key = widgets_map_fingerprint(di_update)
+    if key is None:
+        return make_widgets_map(di_update)
+    if key not in _WIDGETS_MAP_REGISTRY:
+        _WIDGETS_MAP_REGISTRY[key] = make_widgets_map(di_update)
+    return _WIDGETS_MAP_REGISTRY[key]
+
+
+def clear_widgets_map_cache():
+    """clears the memoized widgets_maps (and their dispatch indexes). call this if
+    the widgets or filters referenced by the WidgetMappers are changed in place."""
+    _WIDGETS_MAP_REGISTRY.clear()
+    _WIDGETS_MAP_INDEXES.clear()
+
+
+def register_widget_mapper(name: str, mapper: WidgetMapper):
+    """registers a custom WidgetMapper for all widgets_maps created from here on.
+    invalidates the memoized widgets_maps.
+
+    Args:
+        name (str): key in the widgets_map. an existing key is overwritten.
+        mapper (WidgetMapper): filter function and widget
+    """
+    _REGISTERED_WIDGET_MAPPERS[name] = mapper
+    clear_widgets_map_cache()
+
+
+#  -- COMPILED DISPATCH INDEX -------------------------------
+INDEXED_FILTERS = frozenset(
+    [
+        is_AutoOveride,
+        is_IntText,
+        is_IntSlider,
+        is_FloatText,
+        is_FloatSlider,
+        is_IntRangeSlider,
+        is_FloatRangeSlider,
+        is_Text,
+        is_Textarea,
+        is_Markdown,
+        is_Dropdown,
+        is_SelectMultiple,
+        is_Checkbox,
+        is_Date,
+        is_Color,
+        is_Object,
+        is_Array,
+        is_DataFrame,
+    ]
+)
+# ^ the builtin filters only read the attributes returned by `schema_signature`,
+#   so their result can be stored against the signature. custom filters are always called.
+
+
+def _range_signature(di):
+    """returns the item type if the array is a range (see `is_range`), None if not.
+    raises ValueError where `is_range` would behave unpredictably (the property is then
+    not indexed)."""
+    if di["type"] != "array":
+        return None
+    if "items" not in di.keys():
+        raise ValueError("array without items")
+    items = di["items"]
+    if isinstance(items, dict):
+        # `is_range` iterates over the keys of a dict
+        li = list(items.keys())
+        if len(li) > 0 and "minimum" not in li[0] and "maximum" not in li[0]:
+            return None
+        raise ValueError("unsupported items")
+    if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+        raise ValueError("unsupported items")
+    for i in items:
+        if "minimum" not in i and "maximum" not in i:
+            return None
+    if len(items) == 0 or "type" not in items[0].keys():
+        raise ValueError("unsupported items")
+    return items[0]["type"]
+
+
+def schema_signature(di: dict) -> typing.Optional[tuple]:
+    """returns the attributes of a schema property that the builtin widget filters
+    discriminate on (presence of autoui, type, format, presence of enum, maxLength,
+    presence of minimum / maximum, range item type). returns None if the property
+    cannot be keyed.
+
+    Args:
+        di (dict): schema property
+
+    Returns:
+        typing.Optional[tuple]: hashable signature
+
+    Example:
+        >>> schema_signature({'title': 'Int Text', 'default': 1, 'type': 'integer'})
+        (False, 'integer', None, False, None, False, False, None)
+        >>> schema_signature({'title': 'Int Range', 'type': 'array', 'items': [{'type': 'integer', 'minimum': 0, 'maximum': 4}] * 2})
+        (False, 'array', None, False, None, False, False, 'integer')
+        >>> schema_signature({'title': 'No Type'}) is None
+        True
+    """
+    try:
+        sig = (
+            "autoui" in di.keys(),
+            di["type"],
+            di.get("format"),
+            "enum" in di.keys(),
+            di.get("maxLength"),
+            "minimum" in di.keys(),
+            "maximum" in di.keys(),
+            _range_signature(di),
+        )
+        hash(sig)
+    except (KeyError, ValueError, TypeError):
+        return None
+    if sig[2] is not None and not isinstance(sig[2], str):
+        return None
+    return sig
+
+
+class WidgetsMapIndex:
+    """compiled dispatch index for a widgets_map. the matching keys of the builtin
+    filters are stored against the `schema_signature` of a property, such that
+    properties sharing a signature are mapped with a single lookup. when more than one
+    mapping is found the last match wins (as it does when scanning the widgets_map)
+    and the ambiguity is logged once.
+    """
+
+    def __init__(self, widgets_map):
+        self.widgets_map = widgets_map
+        self.keys = tuple(widgets_map.keys())
+        self.indexed = tuple(
+            k for k in self.keys if widgets_map[k].fn_filt in INDEXED_FILTERS
+        )
+        self.residual = tuple(k for k in self.keys if k not in self.indexed)
+        self.position = {k: n for n, k in enumerate(self.keys)}
+        self.index = {}
+        self.ambiguous = set()
+
+    def _filter(self, di, keys):
+        return [k for k in keys if self.widgets_map[k].fn_filt(di)]
+
+    def _report_ambiguous(self, mapped):
+        mapped = tuple(mapped)
+        if mapped not in self.ambiguous:
+            self.ambiguous.add(mapped)
+            logging.warning(
+                f"multiple widget mappings found: {list(mapped)}. using the last one."
+            )
+
+    def _compile(self, di, sig):
+        mapped = tuple(self._filter(di, self.indexed))
+        self.index[sig] = mapped
+        if len(mapped) > 1 and not self.residual:
+            self._report_ambiguous(mapped)
+        return mapped
+
+    def find(self, di: dict) -> typing.List[str]:
+        """returns the keys of the widgets_map that match the schema property
+
+        Args:
+            di (dict): schema property
+
+        Returns:
+            typing.List[str]: keys in widgets_map order
+
+        Example:
+            >>> index = WidgetsMapIndex(widgets_map())
+            >>> index.find({'title': 'floater', 'default': 1.33, 'type': 'number'})
+            ['FloatText']
+        """
+        sig = schema_signature(di)
+        if sig is None:
+            mapped = self._filter(di, self.keys)
+        else:
+            mapped = self.index.get(sig)
+            if mapped is None:
+                mapped = self._compile(di, sig)
+            mapped = list(mapped)
+            if self.residual:
+                mapped = sorted(
+                    mapped + self._filter(di, self.residual),
+                    key=lambda k: self.position[k],
+                )
+        if len(mapped) > 1 and (sig is None or self.residual):
+            self._report_ambiguous(mapped)
+        return mapped
+
+
+_WIDGETS_MAP_INDEXES = {}
+_DICT_WIDGETS_MAP_INDEXES = {}  # {(key, fn_filt, widget) of each mapper: index}
+
+
+def get_widgets_map_index(mapping) -> WidgetsMapIndex:
+    """returns the WidgetsMapIndex of a widgets_map. the index is compiled once and
+    kept for as long as the widgets_map exists. the index of a plain dict (which may
+    be edited in place) is kept by the contents of the dict.
+
+    Args:
+        mapping (frozenmap, dict or WidgetsMapIndex): dict of WidgetMappers. if None
+            the default widgets_map is used.
+
+    Returns:
+        WidgetsMapIndex: compiled dispatch index
+    """
+    if isinstance(mapping, WidgetsMapIndex):
+        return mapping
+    if mapping is None:
+        mapping = widgets_map()
+    if isinstance(mapping, dict):  # can't be weakly referenced
+        try:
+            key = tuple((k, v.fn_filt, v.widget) for k, v in mapping.items())
+            hash(key)
+        except (AttributeError, TypeError):
+            return WidgetsMapIndex(dict(mapping))
+        if key not in _DICT_WIDGETS_MAP_INDEXES:
+            _DICT_WIDGETS_MAP_INDEXES[key] = WidgetsMapIndex(dict(mapping))
+        return _DICT_WIDGETS_MAP_INDEXES[key]
+    key = id(mapping)
+    if key not in _WIDGETS_MAP_INDEXES:
+        _WIDGETS_MAP_INDEXES[key] = WidgetsMapIndex(mapping)
+        weakref.finalize(mapping, _WIDGETS_MAP_INDEXES.pop, key, None)
+    return _WIDGETS_MAP_INDEXES[key]
+
+
+#  ----------------------------------------------------------
+
+
 def get_autooveride(schema):
     aui = schema["autoui"]
     if type(aui) == str:
@@ -557,20 +940,14 @@ def get_autooveride(schema):
 
 
 def map_widget(di, widgets_map=None, fail_on_error=False) -> WidgetCaller:
-    if widgets_map is None:
-        widgets_map = widgets_map()
-
     def get_widget(di, k, widgets_map):
         if k == "AutoOveride":
             return get_autooveride(di)
         else:
             return widgets_map[k].widget
 
-    mapped = []
-    # loop through widgets_map to find a correct mapping...
-    for k, v in widgets_map.items():
-        if v.fn_filt(di):
-            mapped.append(k)
+    index = get_widgets_map_index(widgets_map)
+    mapped = index.find(di)
 
     if len(mapped) == 0:
         if fail_on_error:
@@ -578,17 +955,10 @@ def map_widget(di, widgets_map=None, fail_on_error=False) -> WidgetCaller:
             raise ValueError(f"widget map not found for: {di}")
         else:
             return WidgetCaller(schema_=di, autoui=auiwidgets.AutoPlaceholder)
-    elif len(mapped) == 1:
-        # ONLY THIS ONE SHOULD HAPPEN
-        k = mapped[0]
-        w = get_widget(di, k, widgets_map)
-        return WidgetCaller(schema_=di, autoui=w)
     else:
-        # TODO: add logging. take last map
-        print(f"{di['title']}. multiple matches found. using the last one.")
-        print(mapped)
+        # the last match is used where more than one is found
         k = mapped[-1]
-        w = get_widget(di, k, widgets_map)
+        w = get_widget(di, k, index.widgets_map)
         return WidgetCaller(schema_=di, autoui=w)
 
 
@@ -403,6 +403,8 @@ class AutoUi(AutoIpywidget, AutoUiCommonMethods):
         ] = lambda: None,
         validate_onchange=True,  # TODO: sort out how the validation works
         update_fdir_to_path_parent=True,
+        lazy=False,
+        value_debounce_ms=0,
     ):
         self.path = path
         if self.path is not None:
@@ -420,11 +422,20 @@ class AutoUi(AutoIpywidget, AutoUiCommonMethods):
 
         # init app
         super().__init__(
-            schema=schema, value=value, update_map_widgets=None, fdir=self.fdir,
+            schema=schema,
+            value=value,
+            update_map_widgets=None,
+            fdir=self.fdir,
+            lazy=lazy,
+            value_debounce_ms=value_debounce_ms,
         )
         self._init_AutoUiCommonMethods()
         self.save_controls = save_controls
 
+    def file(self, path=None):
+        self.flush_value()  # send debounced changes before saving
+        super().file(path=path)
+
 
 # -
 
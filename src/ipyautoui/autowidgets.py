@@ -24,7 +24,6 @@ extends standard ipywidgets to facilitate initialisation from jsonschema
 from ipyautoui.constants import MAP_JSONSCHEMA_TO_IPYWIDGET
 import ipywidgets as widgets
 import traitlets
-from copy import deepcopy
 from ipyautoui._utils import obj_from_importstr
 from ipyautoui.custom import modelrun, markdown_widget, editgrid
 from ipyautoui._utils import remove_non_present_kwargs
@@ -64,7 +63,6 @@ def create_widget_caller(schema, calling=None):
             initialised like ```calling(**caller)```
             
     """
-    caller = deepcopy(schema)
     caller = update_keys(schema)
     caller = {k: v for k, v in caller.items() if k != "description"}
     caller = {k: v for k, v in caller.items() if k != "title"}
@@ -269,12 +267,15 @@ class ColorPicker(widgets.ColorPicker):
 
 class AutoPlaceholder(widgets.Textarea):
     def __init__(self, schema):
-        txt = f"""
+        super().__init__(value=self.placeholder_text(schema))
+
+    @staticmethod
+    def placeholder_text(schema):
+        return f"""
 PLACEHOLDER WIDGET 
 schema: 
 {str(schema)}
 """
-        super().__init__(value=txt)
 
 
 class RunName(modelrun.RunName):
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+# ---
+# jupyter:
+#   jupytext:
+#     cell_metadata_filter: -all
+#     formats: py:light
+#     text_representation:
+#       extension: .py
+#       format_name: light
+#       format_version: '1.5'
+#       jupytext_version: 1.14.0
+#   kernelspec:
+#     display_name: Python 3 (ipykernel)
+#     language: python
+#     name: python3
+# ---
+
+# +
+"""paged data sources for grids of tables that are too large to hold in memory (see
+`editgrid.GridWrapper(datasource=...)`). a source counts and fetches slices of rows,
+with sorting and filtering done by the source (e.g. a database query).
+"""
+# %run __init__.py
+# %load_ext lab_black
+
+import abc
+import collections
+import pathlib
+import sqlite3
+import typing
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, Field
+
+OPERATORS = ("in", "=", "!=", "<", ">", "<=", ">=")
+
+
+class Query(BaseModel):
+    """sort and filter of the rows of a data source"""
+
+    sort: typing.List[typing.Tuple[str, bool]] = Field(
+        default_factory=list, description="list of (column, ascending)"
+    )
+    filters: typing.List[typing.Tuple[str, str, typing.Any]] = Field(
+        default_factory=list,
+        description=f"list of (column, operator, value). operators: {OPERATORS}",
+    )
+
+    @property
+    def key(self) -> str:
+        """hashable key of the query"""
+        return self.json()
+
+
+class DataSource(abc.ABC):
+    """paged data source. subclasses implement `count` and `fetch`"""
+
+    columns: typing.List[str] = []
+
+    @abc.abstractmethod
+    def count(self, query: Query = Query()) -> int:
+        """returns the number of rows that match the query"""
+
+    @abc.abstractmethod
+    def fetch(self, start: int, stop: int, query: Query = Query()) -> pd.DataFrame:
+        """returns rows start to stop (positions after sorting and filtering)"""
+
+
+# +
+def _pandas_mask(df: pd.DataFrame, filters) -> np.ndarray:
+    mask = np.ones(len(df), dtype=bool)
+    for column, operator, value in filters:
+        s = df[column]
+        if operator == "in":
+            m = s.isin(value)
+        elif operator == "=":
+            m = s == value
+        elif operator == "!=":
+            m = s != value
+        elif operator == "<":
+            m = s < value
+        elif operator == ">":
+            m = s > value
+        elif operator == "<=":
+            m = s <= value
+        elif operator == ">=":
+            m = s >= value
+        else:
+            raise ValueError(f"operator {operator} not in {OPERATORS}")
+        mask &= np.asarray(m, dtype=bool)
+    return mask
+
+
+class PandasDataSource(DataSource):
+    """data source of a DataFrame held in the kernel. the positions of the rows
+    matching a query are computed once per query.
+
+    Example:
+        >>> source = PandasDataSource(pd.DataFrame({"a": [3, 1, 2]}))
+        >>> query = Query(sort=[("a", True)], filters=[("a", ">", 1)])
+        >>> source.count(query), source.fetch(0, 2, query)["a"].tolist()
+        (2, [2, 3])
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df.reset_index(drop=True)
+        self.columns = list(self.df.columns)
+        self._positions = {}  # {query: positions of matching rows in order}
+
+    def _get_positions(self, query: Query) -> np.ndarray:
+        if query.key not in self._positions:
+            positions = np.flatnonzero(_pandas_mask(self.df, query.filters))
+            if query.sort:
+                columns, ascending = zip(*query.sort)
+                order = (
+                    self.df.iloc[positions]
+                    .reset_index(drop=True)
+                    .sort_values(list(columns), ascending=list(ascending))
+                    .index.to_numpy()
+                )
+                positions = positions[order]
+            self._positions = {query.key: positions}  # only the last query is kept
+        return self._positions[query.key]
+
+    def count(self, query: Query = Query()) -> int:
+        if not query.filters:
+            return len(self.df)
+        return len(self._get_positions(query))
+
+    def fetch(self, start: int, stop: int, query: Query = Query()) -> pd.DataFrame:
+        if not query.filters and not query.sort:
+            return self.df.iloc[start:stop]
+        return self.df.iloc[self._get_positions(query)[start:stop]]
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SqliteDataSource(DataSource):
+    """data source of a SQLite table. count and fetch are run as SQL queries, with
+    sorting (ORDER BY), filtering (WHERE) and paging (LIMIT / OFFSET) done by SQLite.
+    """
+
+    def __init__(
+        self,
+        con: typing.Union[sqlite3.Connection, str, pathlib.Path],
+        table: str,
+        columns: typing.List[str] = None,
+    ):
+        """
+        Args:
+            con (sqlite3.Connection or path): connection or path of the database
+            table (str): table name
+            columns (typing.List[str], optional): columns to fetch. Defaults to all.
+        """
+        if not isinstance(con, sqlite3.Connection):
+            con = sqlite3.connect(str(con))
+        self.con = con
+        self.table = table
+        if columns is None:
+            cursor = con.execute(f"SELECT * FROM {_quote(table)} LIMIT 0")
+            columns = [d[0] for d in cursor.description]
+        self.columns = list(columns)
+
+    def _where(self, query: Query) -> typing.Tuple[str, list]:
+        clauses, params = [], []
+        for column, operator, value in query.filters:
+            if operator not in OPERATORS:
+                raise ValueError(f"operator {operator} not in {OPERATORS}")
+            if column not in self.columns:
+                raise ValueError(f"{column} not in {self.columns}")
+            if operator == "in":
+                value = list(value)
+                placeholders = ", ".join("?" * len(value))
+                clauses.append(f"{_quote(column)} IN ({placeholders})")
+                params += value
+            else:
+                clauses.append(f"{_quote(column)} {operator} ?")
+                params.append(value)
+        if not clauses:
+            return "", params
+        return " WHERE " + " AND ".join(clauses), params
+
+    def _order_by(self, query: Query) -> str:
+        if not query.sort:
+            return " ORDER BY rowid"
+        return " ORDER BY " + ", ".join(
+            f"{_quote(c)} {'ASC' if asc else 'DESC'}" for c, asc in query.sort
+        )
+
+    def count(self, query: Query = Query()) -> int:
+        where, params = self._where(query)
+        sql = f"SELECT COUNT(*) FROM {_quote(self.table)}{where}"
+        return self.con.execute(sql, params).fetchone()[0]
+
+    def fetch(self, start: int, stop: int, query: Query = Query()) -> pd.DataFrame:
+        where, params = self._where(query)
+        columns = ", ".join(_quote(c) for c in self.columns)
+        sql = (
+            f"SELECT {columns} FROM {_quote(self.table)}{where}{self._order_by(query)}"
+            " LIMIT ? OFFSET ?"
+        )
+        rows = self.con.execute(sql, params + [max(stop - start, 0), start]).fetchall()
+        return pd.DataFrame.from_records(rows, columns=self.columns)
+
+
+# +
+class PageCache:
+    """LRU cache of pages of rows of a data source, for one query at a time
+
+    Example:
+        >>> cache = PageCache(PandasDataSource(pd.DataFrame({"a": range(10)})), 4, 2)
+        >>> cache.rows(3, 6)["a"].tolist()
+        [3, 4, 5]
+        >>> list(cache.pages.keys())
+        [0, 1]
+    """
+
+    def __init__(self, source: DataSource, page_size: int = 500, max_pages: int = 20):
+        self.source = source
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.pages = collections.OrderedDict()  # {page number: DataFrame}
+        self.query = Query()
+        self._count = None
+        self.n_fetches = 0
+
+    def set_query(self, query: Query):
+        if query != self.query:
+            self.query = query
+            self.clear()
+
+    def clear(self):
+        """clears the cache, e.g. after the rows of the source have changed"""
+        self.pages.clear()
+        self._count = None
+
+    def count(self) -> int:
+        if self._count is None:
+            self._count = self.source.count(self.query)
+        return self._count
+
+    def _page(self, n: int) -> pd.DataFrame:
+        if n in self.pages:
+            self.pages.move_to_end(n)
+        else:
+            start = n * self.page_size
+            self.pages[n] = self.source.fetch(start, start + self.page_size, self.query)
+            self.n_fetches += 1
+            while len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+        return self.pages[n]
+
+    def rows(self, start: int, stop: int, margin: int = 0) -> pd.DataFrame:
+        """returns rows start to stop. pages within `margin` rows of the window are
+        fetched too (prefetched), so scrolling nearby is served from the cache."""
+        total = self.count()
+        stop = min(stop, total)
+        if stop <= start:
+            return self.source.fetch(0, 0, self.query)
+        first, last = start // self.page_size, (stop - 1) // self.page_size
+        prefetch_first = max(start - margin, 0) // self.page_size
+        prefetch_last = (min(stop + margin, total) - 1) // self.page_size
+        for n in range(prefetch_first, prefetch_last + 1):
+            if not first <= n <= last:
+                self._page(n)
+        pages = [self._page(n) for n in range(first, last + 1)]
+        df = pd.concat(pages, ignore_index=True) if len(pages) > 1 else pages[0]
+        offset = first * self.page_size
+        return df.iloc[start - offset : stop - offset].reset_index(drop=True)
+
+
+# -
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
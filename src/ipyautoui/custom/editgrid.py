@@ -21,14 +21,20 @@
 # %run ../__init__.py
 # %load_ext lab_black
 
+import asyncio
+import logging
 import traitlets
 import typing
 import collections
+import itertools
+import pathlib
+import time
 import traceback
 
 import immutables
 import numpy as np
 import pandas as pd
+from pandas.api.types import is_numeric_dtype, is_bool_dtype
 import ipywidgets as widgets
 from typing import List
 from markdown import markdown
@@ -37,8 +43,17 @@ from ipydatagrid import DataGrid, TextRenderer, Expr, VegaExpr
 
 import ipyautoui.autoipywidget as aui
 import ipyautoui.custom.save_button_bar as sb
-from ipyautoui._utils import round_sig_figs
+from ipyautoui._utils import round_sig_figs, round_sig_figs_array
 from ipyautoui.automapschema import attach_schema_refs
+from ipyautoui.custom.gridstore import (
+    GridStore,
+    ChangeSet,
+    AGGREGATES,
+    keys_to_mask,
+)
+from ipyautoui.custom.datasource import DataSource, PageCache, Query, OPERATORS
+from ipyautoui.custom.gridvalidation import validate_frame, ERROR_COLUMNS
+from ipyautoui.custom.gridhistory import Operation, OperationLog
 
 # from ipyautoui.autoipywidget import AutoIpywidget
 
@@ -49,6 +64,10 @@ from ipyautoui.constants import (
 )
 
 frozenmap = immutables.Map
+ROW_STATE_COLUMN = "state"  # title of the row state column of an EditGrid
+ERROR_COLOR = "#f8d7da"  # background of invalid cells
+MAX_HIGHLIGHTED_ROWS = 1000  # per column. the error report has every invalid cell
+MAX_CELL_MESSAGES = 1000  # changed cells sent one by one, above this the table is synced
 
 # TODO: Tasks pending completion -@jovyan at 9/14/2022, 5:09:18 PM
 #       review how ipydatagrid works. it has a _data trait which has
@@ -197,6 +216,9 @@ class ButtonBar(widgets.HBox):
         delete: typing.Callable,
         backward: typing.Callable,
         show_message: bool = True,
+        commit: typing.Callable = None,
+        undo: typing.Callable = None,
+        redo: typing.Callable = None,
     ):
         self.show_message = show_message
         self.fn_add = add
@@ -204,6 +226,9 @@ class ButtonBar(widgets.HBox):
         self.fn_copy = copy
         self.fn_delete = delete
         self.fn_backward = backward
+        self.fn_commit = commit  # optional. a button is shown if given
+        self.fn_undo = undo  # optional. undo and redo buttons are shown if given
+        self.fn_redo = redo
         self.out = widgets.Output()
         self._init_form()
         self._init_controls()
@@ -231,8 +256,27 @@ class ButtonBar(widgets.HBox):
             button_style="danger",
             layout=widgets.Layout(width=BUTTON_WIDTH_MIN),
         )
+        self.commit = widgets.Button(
+            icon="upload",
+            tooltip="Save changes",
+            layout=widgets.Layout(width=BUTTON_WIDTH_MIN),
+        )
+        self.undo = widgets.Button(
+            icon="undo",
+            tooltip="Undo",
+            layout=widgets.Layout(width=BUTTON_WIDTH_MIN),
+        )
+        self.redo = widgets.Button(
+            icon="repeat",
+            tooltip="Redo",
+            layout=widgets.Layout(width=BUTTON_WIDTH_MIN),
+        )
         self.message = widgets.HTML()
         children = [self.add, self.edit, self.copy, self.delete]
+        if self.fn_undo is not None and self.fn_redo is not None:
+            children += [self.undo, self.redo]
+        if self.fn_commit is not None:
+            children.append(self.commit)
         children.append(self.message)
         self.children = children
 
@@ -241,6 +285,9 @@ class ButtonBar(widgets.HBox):
         self.edit.observe(self._edit, "value")
         self.copy.on_click(self._copy)
         self.delete.on_click(self._delete)
+        self.commit.on_click(self._commit)
+        self.undo.on_click(self._undo)
+        self.redo.on_click(self._redo)
 
     def _add(self, onchange):
         self._reset_message()
@@ -290,6 +337,18 @@ class ButtonBar(widgets.HBox):
         if self.show_message:
             self.message.value = markdown("  🗑️ _Deleting Value_ ")
 
+    def _commit(self, click):
+        self._reset_message()
+        self.fn_commit()
+
+    def _undo(self, click):
+        self._reset_message()
+        self.fn_undo()
+
+    def _redo(self, click):
+        self._reset_message()
+        self.fn_redo()
+
     def _reset_message(self):
         self.message.value = ""  # Reset message
 
@@ -327,8 +386,63 @@ def is_incremental(li):
     return li == list(range(li[0], li[0] + len(li)))
 
 
+def merge_ranges(ranges: typing.Iterable[range]) -> List[range]:
+    """Sort and merge overlapping or adjacent ranges (step 1).
+
+    Example:
+        >>> merge_ranges([range(5, 8), range(0, 2), range(1, 3), range(8, 9)])
+        [range(0, 3), range(5, 9)]
+    """
+    merged = []
+    for r in sorted((r for r in ranges if len(r)), key=lambda r: r.start):
+        if merged and r.start <= merged[-1].stop:
+            merged[-1] = range(merged[-1].start, max(merged[-1].stop, r.stop))
+        else:
+            merged.append(r)
+    return merged
+
+
+def array_to_ranges(arr) -> List[range]:
+    """Compress integers into sorted, merged ranges.
+
+    Example:
+        >>> array_to_ranges([7, 1, 2, 3, 6])
+        [range(1, 4), range(6, 8)]
+    """
+    arr = np.unique(np.asarray(arr, dtype=np.int64))
+    if not len(arr):
+        return []
+    breaks = np.flatnonzero(np.diff(arr) != 1) + 1
+    starts = np.concatenate([[0], breaks])
+    stops = np.concatenate([breaks, [len(arr)]])
+    return [range(int(arr[a]), int(arr[b - 1]) + 1) for a, b in zip(starts, stops)]
+
+
+def _is_missing(v) -> bool:
+    return v is None or v is pd.NA or v is pd.NaT or (isinstance(v, float) and v != v)
+
+
+def _same_cell(a, b) -> bool:
+    """True if two cell values of the DataGrid records are the same"""
+    if _is_missing(a) or _is_missing(b):
+        return _is_missing(a) and _is_missing(b)
+    return bool(a == b)
+
+
 class GridWrapper(DataGrid, traitlets.HasTraits):
-    _value = traitlets.List()
+    """DataGrid of the rows of a json schema array. the rows are held in a columnar
+    `GridStore` (`self.store`), so rows can be appended, inserted, updated and
+    deleted without rebuilding the grid. `value` is a list of dicts produced from the
+    store when read.
+    """
+
+    _value = traitlets.List(
+        help="the rows as a list of dicts, kept in sync with the store (see `value`)"
+    )
+    aggregates = traitlets.Dict(
+        help="{field: {aggregate: value}} of the columns with aui_aggregates in the"
+        " schema. kept up to date as rows change (see GridStore.aggregates)"
+    )
 
     def __init__(
         self,
@@ -340,7 +454,43 @@ class GridWrapper(DataGrid, traitlets.HasTraits):
         order_cols: list = [],
         ignore_cols: list = [],
         idx_start_from_one: bool = False,
+        row_state_column: str = None,
+        datasource: DataSource = None,
+        window_size: int = 100,
+        page_size: int = 500,
+        max_pages: int = 20,
+        validate_value: bool = True,
+        history_depth: int = 50,
+        history_max_cells: int = 1_000_000,
     ):
+        """
+        Args:
+            schema (dict): json schema of an array of objects, or pydantic model
+            value (list, optional): rows. Defaults to None.
+            row_state_column (str, optional): if given, a column with this title is
+                shown first, with the state of each row (see `set_row_state`).
+                Defaults to None.
+            datasource (DataSource, optional): paged source of the rows, for tables
+                too large to hold in memory. Only a window of `window_size` rows is
+                held in the store and sent to the grid (see `load_window`), and the
+                source does the sorting and filtering. value is ignored. Defaults to
+                None.
+            window_size (int, optional): rows shown at once from the datasource.
+                Defaults to 100.
+            page_size (int, optional): rows fetched at once from the datasource.
+                Defaults to 500.
+            max_pages (int, optional): pages of the datasource held in the LRU cache.
+                Defaults to 20.
+            validate_value (bool, optional): validate the rows against the schema of
+                the items when the value is set, and highlight invalid cells (see
+                `validate`). Defaults to True.
+            history_depth (int, optional): number of row operations (add, update,
+                delete, move) that can be undone (see `undo`). 0 for no undo.
+                Defaults to 50.
+            history_max_cells (int, optional): the oldest operations are dropped
+                from the history when the cells they hold add up to more than this.
+                Defaults to 1M.
+        """
         # accept schema or pydantic schema
         self.model, self.schema = aui._init_model_schema(schema, by_alias=by_alias)
         self.kwargs_datagrid_default = kwargs_datagrid_default
@@ -350,25 +500,50 @@ class GridWrapper(DataGrid, traitlets.HasTraits):
         ]  # Obtain each column's properties
         self.ignore_cols = ignore_cols
         self.order_cols = order_cols
+        self.row_state_column = row_state_column
+        self.row_states = {}  # {row id: state}. see GridStore.ids
+        self.validate_value = validate_value
+        self.history = OperationLog(history_depth, history_max_cells)
+        self.errors = pd.DataFrame(columns=ERROR_COLUMNS)  # see `validate`
+        self.store = GridStore(self.di_cols_properties)
+        self.datasource = datasource
+        self.window_size = window_size
+        self.window_start = 0  # position in the datasource of the first row
+        self.query = Query()
+        if datasource is not None:
+            self.page_cache = PageCache(datasource, page_size, max_pages)
         self._init_df()
         self._init_form()
         self.kwargs_datagrid_update = kwargs_datagrid_update
-        self.value = value
+        if datasource is not None:
+            self.load_window(0)
+        else:
+            self.value = value
 
     def _init_df(self):
         """Preparing initial empty dataframe."""
-        li_default_value = [
-            {
-                col_data["title"]: (
-                    col_data["default"] if "default" in col_data.keys() else None
-                )
-                for col_name, col_data in self.di_cols_properties.items()
-            }
-        ]  # default value
-        df = pd.DataFrame.from_dict(li_default_value)
-        df = df.drop(
-            df.index
-        )  # Empty dataframe to revert to when everything is deleted
+        self.df_empty = self._display_frame(self.store.frame([]))
+        # ^ Empty dataframe to revert to when everything is deleted
+
+    def _display_frame(
+        self, df: pd.DataFrame, keys: typing.Sequence[int] = None
+    ) -> pd.DataFrame:
+        """Convert rows of the store to the dataframe shown in the grid. Field names are
+        replaced with titles, and ignore_cols, order_cols and sig figs are applied.
+
+        Args:
+            df (pd.DataFrame): rows of the store
+            keys (typing.Sequence[int], optional): positions of the rows. Defaults to
+                range(len(df)).
+        """
+        if keys is None:
+            keys = range(len(df))
+        offset = self.window_start + (1 if self.idx_start_from_one else 0)
+        df = df.rename(columns=self.di_field_to_titles)
+        for k, date_format in self.store.date_formats.items():
+            title = self.di_field_to_titles[k]
+            if pd.api.types.is_datetime64_dtype(df[title].dtype):
+                df[title] = df[title].dt.strftime(date_format)  # shown as in value
         if self.ignore_cols:
             df = df.drop(
                 columns=self.ignore_cols
@@ -378,11 +553,38 @@ class GridWrapper(DataGrid, traitlets.HasTraits):
                 col for col in df.columns if col not in self.order_cols
             ]
             df = df[order_cols]
+        if self.row_state_column is not None:
+            ids = self.store.ids[np.asarray(keys, dtype=np.int64)]
+            states = [self.row_states.get(i, "") for i in ids]
+            df.insert(0, self.row_state_column, states)
+        index = pd.Index([k + offset for k in keys], dtype="int64")
         if self.idx_start_from_one is True:
-            df = df.set_index(
-                pd.Index(range(1, len(df) + 1), dtype="int64", name="idx")
-            )
-        self.df_empty = df
+            index.name = "idx"
+        df = df.set_index(index)
+        return self._round_sig_figs(df)
+
+    def _display_records(
+        self, df: pd.DataFrame, keys: typing.Sequence[int] = None
+    ) -> List[dict]:
+        """Rows of the store as the records held by the DataGrid (`_data["data"]`)."""
+        if keys is None:
+            keys = range(len(df))
+        display = self._display_frame(df, keys=keys)
+        records = self.generate_data_object(
+            display, "ipydguuid", self.get_dataframe_index(display)
+        )["data"]
+        for key, record in zip(keys, records):
+            record["ipydguuid"] = key
+        return records
+
+    def _renumber_records(self, start: int = 0):
+        """Update the keys of the DataGrid records from position `start` onwards."""
+        key = self._data["schema"]["primaryKey"][0]
+        offset = self.window_start + (1 if self.idx_start_from_one else 0)
+        data = self._data["data"]
+        for i in range(start, len(data)):
+            data[i][key] = i + offset
+            data[i]["ipydguuid"] = i
 
     def _init_form(self):
         """Initialise grid and apply schema properties."""
@@ -391,6 +593,10 @@ class GridWrapper(DataGrid, traitlets.HasTraits):
             selection_mode="row",
             **self.kwargs_datagrid_default,
         )  # main container. # TODO: may be causing "DeprecationWarning: Passing unrecognized arguments..." in pytest
+        self._base_renderers = dict(self.renderers)  # renderers without highlights
+        self._highlighted = False  # error highlights are shown
+        self._highlighting = False
+        self.observe(self._update_base_renderers, "renderers")
         if self.aui_column_widths:
             self._set_column_widths()
         if self.aui_sig_figs and self._data["data"] != []:
@@ -405,28 +611,229 @@ class GridWrapper(DataGrid, traitlets.HasTraits):
             key (int): The key of the row.
             value (dict): The data we want to input into the row.
         """
-        if set([col for col, v in value.items()]) != set(
-            [col for col, v in self.value[0].items()]
-        ):
+        if set(value.keys()) != set(self.li_field_names):
             raise Exception("Columns of value given do not match with value keys.")
+        self.patch_rows({key: value})
 
-        # value_with_titles is used for datagrid
-        value_with_titles = {
-            self.di_field_to_titles.get(name): v for name, v in value.items()
-        }
-        for col, sig_fig in self.aui_sig_figs.items():
-            value_with_titles[col] = round_sig_figs(
-                value_with_titles[col], sig_figs=sig_fig
-            )
+    def patch_rows(self, changes: typing.Dict[int, dict]):
+        """Update many cells at once. The changed rows are converted together and only
+        the cells that changed are sent to the frontend (see `_update_records`).
 
-        for column, v in value_with_titles.items():
-            if self.idx_start_from_one is True:
-                # ^ If idx start from one then we must add one to the key
-                self.set_cell_value(column, key + 1, v)
-            else:
-                self.set_cell_value(column, key, v)
+        Args:
+            changes (typing.Dict[int, dict]): {key: {field: value}} of the cells to
+                change. Fields that are not given are unchanged.
+        """
+        if not changes:
+            return
+        fields = set(self.li_field_names)
+        for key, value in changes.items():
+            if not set(value.keys()) <= fields:
+                raise Exception(
+                    "Columns of value given do not match with value keys."
+                    f"\nRejected Columns: {set(value.keys()) - fields}"
+                )
+        keys = sorted(changes.keys())
+        if self.history.max_depth:
+            old = dict(zip(keys, self.store.records(keys)))
+            inverse = {k: {f: old[k][f] for f in changes[k]} for k in keys}
+            size = sum(len(v) for v in inverse.values())
+            self.history.record(Operation("patch_rows", (inverse,), size))
+        self.store.patch(changes)
+        records = self._display_records(self.store.take(keys), keys=keys)
+        self._update_records(keys, records)
+        self._store_changed()
+
+    def _update_records(self, keys: typing.Sequence[int], records: List[dict]):
+        """Replace the DataGrid records of the given keys. A message is sent to the
+        frontend for each changed cell, or the whole table is synced once if more
+        than MAX_CELL_MESSAGES cells changed."""
+        data = self._data["data"]
+        changed = []
+        for key, record in zip(keys, records):
+            old = data[key]
+            for column, v in record.items():
+                if not _same_cell(old.get(column), v):
+                    changed.append((key, column, v))
+            data[key] = record
+        if len(changed) > MAX_CELL_MESSAGES:
+            self.send_state("_data")
+            return
+        with self.hold_sync():
+            for key, column, v in changed:
+                self._notify_cell_change(key, column, v)
+
+    def move_rows(self, keys: typing.Iterable[int], offset: int) -> List[int]:
+        """Move rows up (offset < 0) or down (offset > 0). The rows are moved as a
+        block, placed at the position of the first row plus offset (limited to the
+        start and end of the grid). The store is reordered in one go and the grid is
+        synced once.
+
+        Args:
+            keys (typing.Iterable[int]): keys of the rows to move.
+            offset (int): number of rows to move by.
+
+        Returns:
+            List[int]: new keys of the moved rows.
+        """
+        keys = sorted(set(keys))
+        if not keys:
+            return []
+        moved = np.asarray(keys, dtype=np.int64)
+        rest = np.flatnonzero(~keys_to_mask(moved, len(self.store)))
+        position = min(max(keys[0] + offset, 0), len(rest))
+        order = np.concatenate([rest[:position], moved, rest[position:]])
+        self._reorder_rows(order.tolist())
+        self.history.record(
+            Operation("_unmove_rows", (keys, position, offset), len(keys))
+        )
+        return list(range(position, position + len(keys)))
+
+    def _reorder_rows(self, order: List[int]):
+        """Reorder the rows. `order` gives the current key of each row in its new
+        position."""
+        self.store.reorder(order)
+        data = self._data["data"]
+        self._data["data"] = [data[i] for i in order]
+        self._renumber_records(start=0)
+        self.send_state("_data")
+        self._store_changed()
+
+    def _unmove_rows(self, keys: List[int], position: int, offset: int):
+        """Put rows moved by `move_rows(keys, offset)` to `position` back where they
+        were (undo of `move_rows`)."""
+        n = len(self.store)
+        moved = np.arange(position, position + len(keys))
+        target = keys_to_mask(keys, n)
+        order = np.empty(n, dtype=np.int64)
+        order[target] = moved
+        order[~target] = np.flatnonzero(~keys_to_mask(moved, n))
+        self._reorder_rows(order.tolist())
+        self.history.record(Operation("move_rows", (keys, offset), len(keys)))
+
+    def append_rows(self, rows) -> range:
+        """Append rows to the end of the grid. Only the new rows are converted and
+        added to the DataGrid.
+
+        Args:
+            rows (list or pd.DataFrame): rows to append.
+
+        Returns:
+            range: keys of the new rows.
+        """
+        self._check_value(rows)
+        start = len(self.store)
+        keys = self.store.append(rows)
+        new = self.store.df.iloc[keys.start : keys.stop]
+        self._data["data"].extend(self._display_records(new, keys=keys))
+        self.send_state("_data")
+        self._store_changed()
+        self.history.record(Operation("delete_rows", ([keys],), 1))
+        return keys
+
+    def insert_rows(self, key: int, rows) -> range:
+        """Insert rows before the row with the given key.
+
+        Args:
+            key (int): key of the row to insert before.
+            rows (list or pd.DataFrame): rows to insert.
+
+        Returns:
+            range: keys of the new rows.
+        """
+        if key >= len(self.store):
+            return self.append_rows(rows)
+        self._check_value(rows)
+        keys = self.store.insert(key, rows)
+        new = self.store.df.iloc[keys.start : keys.stop]
+        self._data["data"][key:key] = self._display_records(new, keys=keys)
+        self._renumber_records(start=keys.stop)
+        self.send_state("_data")
+        self._store_changed()
+        self.history.record(Operation("delete_rows", ([keys],), 1))
+        return keys
+
+    def delete_rows(self, keys):
+        """Delete the rows with the given keys. A boolean mask of the rows is built
+        once and applied to the store and the grid in one step.
+
+        Args:
+            keys (typing.Iterable[int] or List[range] or np.ndarray): keys, ranges of
+                keys (e.g. `selected_key_ranges`) or a boolean mask of the rows to
+                delete.
+        """
+        mask = keys_to_mask(keys, len(self.store))
+        if not mask.any():
+            return
+        start = int(mask.argmax())
+        for row_id in self.store.ids[mask]:
+            self.row_states.pop(row_id, None)
+        if self.history.max_depth:
+            positions = np.flatnonzero(mask)
+            removed = self.store.take(positions).copy()
+            args = (positions, removed, self.store.ids[mask].copy())
+            size = removed.size
+            self.history.record(Operation("_restore_rows", args, size))
+        self.store.delete(mask)
+        data = self._data["data"]
+        self._data["data"] = data[:start] + list(
+            itertools.compress(data[start:], ~mask[start:])
+        )
+        self._renumber_records(start=start)
+        self.send_state("_data")
+        self._store_changed()
+
+    def _restore_rows(self, positions: np.ndarray, rows: pd.DataFrame, ids):
+        """Put deleted rows back where they were (undo of `delete_rows`). The rows are
+        restored in the store in one step and the grid is synced once."""
+        self.store.restore(positions, rows, ids)
+        new = iter(self._display_records(rows, keys=positions))
+        old = iter(self._data["data"])
+        restored = keys_to_mask(positions, len(self.store))
+        self._data["data"] = [next(new) if r else next(old) for r in restored]
+        self._renumber_records(start=int(positions[0]))
+        self.send_state("_data")
+        self._store_changed()
+        self.history.record(Operation("delete_rows", (positions,), 1))
+
+    def _apply_operation(self, op: Operation):
+        getattr(self, op.name)(*op.args)
+
+    def undo(self) -> bool:
+        """Undo the last row operation (add, update, delete or move).
+
+        Returns:
+            bool: False if there is nothing to undo.
+        """
+        return self.history.undo(self._apply_operation)
 
-        self._value[key] = {k: v for k, v in value.items()}
+    def redo(self) -> bool:
+        """Redo the last undone row operation.
+
+        Returns:
+            bool: False if there is nothing to redo.
+        """
+        return self.history.redo(self._apply_operation)
+
+    def set_row_state(self, key: int, state: str = None):
+        """Set the state of a row (e.g. "pending" or "failed"), or clear it with None.
+        The state stays with the row when rows are added, deleted or moved, and is
+        shown in the `row_state_column` (if there is one).
+
+        Args:
+            key (int): key of the row.
+            state (str, optional): state. Defaults to None.
+        """
+        row_id = self.store.ids[key]
+        if state:
+            self.row_states[row_id] = state
+        else:
+            self.row_states.pop(row_id, None)
+        if self.row_state_column is not None:
+            self.set_cell_value_by_index(self.row_state_column, key, state or "")
+
+    def get_row_state(self, key: int) -> typing.Optional[str]:
+        """Get the state of a row (see `set_row_state`)."""
+        return self.row_states.get(self.store.ids[key])
 
     def _round_sig_figs(self, df):
         """Round values in dataframe to desired significant figures as given in the schema.
@@ -435,27 +842,36 @@ class GridWrapper(DataGrid, traitlets.HasTraits):
             df (pd.DataFrame): dataframe to round sig figs on.
         """
         for k, v in self.aui_sig_figs.items():
-            df.loc[:, k] = df.loc[:, k].apply(lambda x: round_sig_figs(x, sig_figs=v))
+            col = df[k]
+            if is_numeric_dtype(col.dtype) and not is_bool_dtype(col.dtype):
+                # vectorized, and keeps the column dtype (e.g. nullable Int64)
+                arr = col.to_numpy(dtype=float, na_value=np.nan)
+                rounded = round_sig_figs_array(arr, sig_figs=v)
+                df[k] = pd.Series(rounded, index=col.index).astype(col.dtype)
+            else:
+                df[k] = col.apply(lambda x: round_sig_figs(x, sig_figs=v))
         return df
 
     def _set_column_widths(self):
         """Set the column widths of the data grid based on aui_column_widths given in the schema."""
         self.column_widths = self.aui_column_widths  # Set column widths for data grid.
 
-    def _check_value(self, value: list):
+    def _check_value(self, value):
         """Checking column names in value passed match those within the dataframe.
 
         Args:
-            value (list): list of dicts.
+            value (list or pd.DataFrame): list of dicts.
         """
-        for di_value in value:
-            columns = [name for name in di_value.keys()]
-            if not collections.Counter(columns) == collections.Counter(
-                self.li_field_names
-            ):
+        fields = set(self.li_field_names)
+        if isinstance(value, pd.DataFrame):
+            li_columns = [list(value.columns)]
+        else:
+            li_columns = [di.keys() for di in value if di.keys() != fields]
+        for columns in li_columns:
+            if set(columns) != fields or len(columns) != len(fields):
                 raise Exception(
                     "Schema fields and data fields do not match.\nRejected Columns:"
-                    f" {set(columns) ^ set(self.li_field_names)}"
+                    f" {set(columns) ^ fields}"
                 )
 
     def _set_titles(self, value: list):
@@ -473,6 +889,90 @@ class GridWrapper(DataGrid, traitlets.HasTraits):
         ]
         return data
 
+    @property
+    def di_title_to_field(self):
+        return {v: k for k, v in self.di_field_to_titles.items()}
+
+    @property
+    def n_rows(self) -> int:
+        """Number of rows (of the datasource matching the query if paged)."""
+        if self.datasource is not None:
+            return self.page_cache.count()
+        return len(self.store)
+
+    def load_window(self, start: int):
+        """Show the rows of the datasource from position `start`. Pages around the
+        window are prefetched into the page cache.
+
+        Args:
+            start (int): position of the first row to show.
+        """
+        total = self.page_cache.count()
+        start = max(0, min(start, total - self.window_size))
+        stop = start + self.window_size
+        df = self.page_cache.rows(start, stop, margin=self.window_size)
+        self.window_start = start
+        self.row_states = {}
+        self.store.set(df[self.li_field_names])
+        self.data = self._display_frame(self.store.df)
+        self._store_changed()
+        self.history.clear()
+
+    def refresh(self):
+        """Clear the page cache and reload the window from the datasource."""
+        self.page_cache.clear()
+        self.load_window(self.window_start)
+
+    def set_query(self, query: Query):
+        """Set the sort and filter of the datasource rows, and show the first rows."""
+        self.query = query
+        self.page_cache.set_query(query)
+        self.load_window(0)
+
+    def sort_by(self, column_name: str, ascending: bool = True):
+        """Sort rows by a column. Sorting is done by the datasource if there is one.
+
+        Args:
+            column_name (str): column name (title) to sort by.
+            ascending (bool, optional): sort order. Defaults to True.
+        """
+        if self.datasource is not None:
+            field = self.di_title_to_field[column_name]
+            self.set_query(Query(sort=[(field, ascending)], filters=self.query.filters))
+        else:
+            self.transform(
+                [
+                    {
+                        "type": "sort",
+                        "columnIndex": self.df_empty.columns.get_loc(column_name) + 1,
+                        "desc": not ascending,
+                    }
+                ]
+            )
+
+    @traitlets.observe("_transforms")
+    def _push_down_transforms(self, change):
+        """Sorts and filters set in the grid are done by the datasource (if there is
+        one), so they apply to all rows and not only the window."""
+        if self.datasource is None:
+            return
+        columns = [self.df_empty.index.name] + list(self.df_empty.columns)
+        sort, filters = [], []
+        for t in change["new"]:
+            column = columns[t["columnIndex"]]
+            field = self.di_title_to_field.get(column)
+            if field is None:
+                continue
+            if t["type"] == "sort":
+                sort = [(field, not t["desc"])]
+            elif t["type"] == "filter" and t["operator"] in OPERATORS:
+                filters.append((field, t["operator"], t["value"]))
+            else:
+                logging.warning(f"transform not done by the datasource: {t}")
+        query = Query(sort=sort, filters=filters)
+        if query.key != self.query.key:
+            self.set_query(query)
+
     def filter_by_column_name(self, column_name: str, li_filter: list):
         """Filter rows to display based on a column name and a list of objects belonging to that column.
 
@@ -480,11 +980,17 @@ class GridWrapper(DataGrid, traitlets.HasTraits):
             column_name (str): column name we want to apply the transform to.
             li_filter (list): Values within the column we want to display in the grid.
         """
+        if self.datasource is not None:
+            field = self.di_title_to_field[column_name]
+            filters = [f for f in self.query.filters if f[0] != field]
+            filters.append((field, "in", list(li_filter)))
+            self.set_query(Query(sort=self.query.sort, filters=filters))
+            return
         self.transform(
             [
                 {
                     "type": "filter",
-                    "columnIndex": self.data.columns.get_loc(column_name) + 1,
+                    "columnIndex": self.df_empty.columns.get_loc(column_name) + 1,
                     "operator": "in",
                     "value": li_filter,
                 }
@@ -498,10 +1004,10 @@ class GridWrapper(DataGrid, traitlets.HasTraits):
             key_a (int): Key of a row.
             key_b (int): Key of another row.
         """
-        di_a = self.value[key_a]
-        di_b = self.value[key_b]
-        self.set_row_value(key=key_b, value=di_a)
-        self.set_row_value(key=key_a, value=di_b)
+        order = list(range(len(self.store)))
+        order[key_a], order[key_b] = key_b, key_a
+        self._reorder_rows(order)
+        self.history.record(Operation("_swap_rows", (key_a, key_b), 2))
 
     def _move_row_down(self, key: int):
         """Move a row down.
@@ -509,9 +1015,9 @@ class GridWrapper(DataGrid, traitlets.HasTraits):
         Args:
             key (int): Key of the row
         """
-        if key + 1 == len(self.data):
+        if key + 1 == len(self.store):
             raise Exception("Can't move down last row.")
-        self._swap_rows(key_a=key, key_b=key + 1)
+        self.move_rows([key], 1)
 
     def _move_row_up(self, key: int):
         """Move a row up.
@@ -521,7 +1027,11 @@ class GridWrapper(DataGrid, traitlets.HasTraits):
         """
         if key - 1 == -1:
             raise Exception("Can't move up first row.")
-        self._swap_rows(key_a=key, key_b=key - 1)
+        self.move_rows([key], -1)
+
+    def _select_rows(self, keys: List[int]):
+        c2 = len(self.df_empty.columns) - 1
+        self.selections = [{"r1": min(keys), "r2": max(keys), "c1": 0, "c2": c2}]
 
     def _move_rows_up(self, li_keys: List[int]):
         """Move multiple rows up.
@@ -531,11 +1041,9 @@ class GridWrapper(DataGrid, traitlets.HasTraits):
         """
         if is_incremental(sorted(li_keys)) is False:
             raise Exception("Only select a property or block of properties.")
-        for key in sorted(li_keys):
-            self._move_row_up(key)
-        self.selections = [
-            {"r1": min(li_keys) - 1, "r2": max(li_keys) - 1, "c1": 0, "c2": 2}
-        ]
+        if min(li_keys) == 0:
+            raise Exception("Can't move up first row.")
+        self._select_rows(self.move_rows(li_keys, -1))
 
     def _move_rows_down(self, li_keys: List[int]):
         """Move multiple rows down.
@@ -545,11 +1053,9 @@ class GridWrapper(DataGrid, traitlets.HasTraits):
         """
         if is_incremental(sorted(li_keys)) is False:
             raise Exception("Only select a property or block of properties.")
-        for key in sorted(li_keys, reverse=True):
-            self._move_row_down(key)
-        self.selections = [
-            {"r1": min(li_keys) + 1, "r2": max(li_keys) + 1, "c1": 0, "c2": 2}
-        ]
+        if max(li_keys) + 1 == len(self.store):
+            raise Exception("Can't move down last row.")
+        self._select_rows(self.move_rows(li_keys, 1))
 
     @property
     def di_default_value(self):
@@ -563,30 +1069,67 @@ class GridWrapper(DataGrid, traitlets.HasTraits):
     def di_field_to_titles(self):
         return {field: di["title"] for field, di in self.di_cols_properties.items()}
 
+    @property
+    def selection_ranges(self) -> List[range]:
+        """Selected rows as sorted, merged ranges of positions in the (transformed)
+        view."""
+        return merge_ranges(range(di["r1"], di["r2"] + 1) for di in self.selections)
+
+    @property
+    def n_selected_rows(self) -> int:
+        """Number of selected rows."""
+        return sum(len(r) for r in self.selection_ranges)
+
     @property
     def selected_rows(self):
-        """Get position of rows selected."""
-        _selected_rows = set()
-        for di in self.selections:
-            r1 = di["r1"]
-            r2 = di["r2"]
-            if r1 == r2:
-                _selected_rows.add(r1)
-            else:
-                for i in range(r1, r2 + 1):
-                    _selected_rows.add(i)
-        return list(_selected_rows)
+        """Get position of rows selected (in the view)."""
+        return [i for r in self.selection_ranges for i in r]
+
+    @traitlets.observe("_visible_rows")
+    def _reset_visible_rows(self, change):
+        self._visible_rows_array = None
 
     @property
-    def get_selected_data(self):
-        """Get the data selected in the table which is returned as a dataframe."""
-        df_tmp = self.get_visible_data()
-        return df_tmp.iloc[self.selected_rows]
+    def visible_rows_array(self) -> typing.Optional[np.ndarray]:
+        """Keys of the rows in the order shown, or None if the rows are not
+        transformed (filtered / sorted)."""
+        if not self._visible_rows:
+            return None
+        if getattr(self, "_visible_rows_array", None) is None:
+            self._visible_rows_array = np.asarray(self._visible_rows, dtype=np.int64)
+        return self._visible_rows_array
+
+    @property
+    def selected_key_ranges(self) -> List[range]:
+        """Keys of the selected rows as sorted, merged ranges. View positions are
+        translated through the grid transforms without copying the visible data."""
+        ranges = self.selection_ranges
+        visible = self.visible_rows_array
+        if visible is None or not ranges:
+            return ranges
+        return array_to_ranges(
+            np.concatenate([visible[r.start : r.stop] for r in ranges])
+        )
 
     @property
     def selected_keys(self):
         """Return the keys of the selected rows."""
-        return list(self.get_selected_data.index.values)
+        return [i for r in self.selected_key_ranges for i in r]
+
+    @property
+    def get_selected_data(self):
+        """Get the rows of the store that are selected as a dataframe. A view of the
+        store is returned if one block of rows is selected."""
+        ranges = self.selected_key_ranges
+        if len(ranges) == 1:
+            return self.store.take(ranges[0])
+        keys = [np.arange(r.start, r.stop) for r in ranges]
+        return self.store.take(np.concatenate(keys) if keys else [])
+
+    @property
+    def selected_values(self) -> List[dict]:
+        """Return the values of the selected rows."""
+        return self.store.to_records(self.get_selected_data)
 
     @property
     def li_field_names(self):
@@ -601,6 +1144,25 @@ class GridWrapper(DataGrid, traitlets.HasTraits):
         }
         return self._aui_sig_figs
 
+    @property
+    def aui_aggregates(self):
+        """{title: aggregates} of the columns with aui_aggregates in the schema."""
+        return {
+            col_data["title"]: col_data["aui_aggregates"]
+            for col_name, col_data in self.di_cols_properties.items()
+            if col_data.get("aui_aggregates")
+            and col_data["title"] not in self.ignore_cols
+        }
+
+    def _store_changed(self):
+        """Update `_value` and the aggregates after the rows of the store change."""
+        self._value = self.store.records()
+        self._update_aggregates()
+
+    def _update_aggregates(self):
+        if self.aui_aggregates:
+            self.aggregates = self.store.aggregates()
+
     @property
     def aui_column_widths(self):
         self._aui_column_widths = {
@@ -623,32 +1185,164 @@ class GridWrapper(DataGrid, traitlets.HasTraits):
 
     @property
     def value(self):
-        return self._value
+        return self.store.records()
 
     @value.setter
     def value(self, value):
-        if value == [] or value is None:
-            self._value = []
-            self.data = self.df_empty
+        if value is None or len(value) == 0:
+            self.store.set([])
         else:
             self._check_value(value)
-            self._value = value
-            data = self._set_titles(self._value)
-            df = pd.DataFrame.from_dict(data)
-            if self.ignore_cols:
-                df = df.drop(
-                    columns=self.ignore_cols
-                )  # Drop columns we want to ignore from datagrid
-            if self.order_cols:
-                order_cols = self.order_cols + [
-                    col for col in df.columns if col not in self.order_cols
-                ]
-                df = df[order_cols]
-            if self.idx_start_from_one is True:
-                df = df.set_index(
-                    pd.Index(range(1, len(df) + 1), dtype="int64", name="idx")
-                )
-            self.data = self._round_sig_figs(df)
+            self.store.set(value)
+        self._show_store()
+
+    def _show_store(self):
+        """Show all rows of the store in the grid."""
+        self.row_states = {}
+        self.history.clear()
+        if len(self.store) == 0:
+            self.data = self.df_empty
+        else:
+            self.data = self._display_frame(self.store.df)
+        self._store_changed()
+        if self.validate_value:
+            self.validate()
+
+    @property
+    def is_dirty(self) -> bool:
+        """True if rows have been added, changed or deleted since the last save."""
+        return self.store.is_dirty
+
+    def changes(self) -> ChangeSet:
+        """Return the rows added, changed (changed fields only) and deleted since the
+        value was set or `mark_saved` was called (see `GridStore.changes`)."""
+        return self.store.changes()
+
+    def mark_saved(self, changes: ChangeSet = None):
+        """Mark changes as saved (defaults to all changes)."""
+        self.store.mark_clean(changes)
+
+    @property
+    def item_model(self) -> typing.Optional[typing.Type[BaseModel]]:
+        """Pydantic model of the rows (if the grid was made from a pydantic model)."""
+        if self.model is None or "__root__" not in self.model.__fields__:
+            return None
+        return self.model.__fields__["__root__"].type_
+
+    def validate(self, highlight: bool = True) -> pd.DataFrame:
+        """Validate all rows against the schema of the items. Columns are checked as
+        a whole (see `gridvalidation.validate_frame`).
+
+        Args:
+            highlight (bool, optional): highlight invalid cells. Defaults to True.
+
+        Returns:
+            pd.DataFrame: one row per invalid cell, with columns "row" (position of
+                the row), "column" (field name) and "error". Also set as `errors`.
+        """
+        self.errors = validate_frame(
+            self.store.df,
+            self.di_cols_properties,
+            required=self.schema["items"].get("required", []),
+            item_model=self.item_model,
+        )
+        if highlight:
+            self._highlight_errors()
+        return self.errors
+
+    def _update_base_renderers(self, onchange):
+        """Keep the renderers set by the user, with the highlights on top of them."""
+        if self._highlighting:
+            return
+        self._base_renderers = dict(onchange["new"])
+        if self._highlighted:
+            self._highlight_errors()
+
+    def _error_renderer(self, title: str, expr: str) -> TextRenderer:
+        """Renderer of a column that colours the cells where `expr` is true. Other
+        settings of the user's renderer of the column are kept."""
+        base = self._base_renderers.get(title)
+        if not isinstance(base, TextRenderer):
+            return TextRenderer(
+                background_color=VegaExpr(f"{expr} ? '{ERROR_COLOR}' : 'white'")
+            )
+        kwargs = {
+            k: getattr(base, k)
+            for k in base.keys
+            if not k.startswith("_") and k != "background_color"
+        }
+        background = base.background_color
+        if isinstance(background, VegaExpr):
+            background = f"({background.value})"
+        elif isinstance(background, str):
+            background = f"'{background}'"
+        else:
+            background = "'white'"
+        return type(base)(
+            **kwargs,
+            background_color=VegaExpr(f"{expr} ? '{ERROR_COLOR}' : {background}"),
+        )
+
+    def _set_renderers(self, renderers: dict):
+        self._highlighting = True
+        try:
+            self.renderers = renderers
+        finally:
+            self._highlighting = False
+
+    def _highlight_errors(self):
+        """Set renderers that colour the cells listed in `errors`, on top of the
+        renderers set by the user."""
+        if self.errors.empty:
+            if self._highlighted:
+                self._set_renderers(dict(self._base_renderers))
+                self._highlighted = False
+            return
+        renderers = dict(self._base_renderers)
+        key = self._data["schema"]["primaryKey"][0]
+        offset = self.window_start + (1 if self.idx_start_from_one else 0)
+        for field, rows in self.errors.groupby("column")["row"]:
+            title = self.di_field_to_titles.get(field)
+            if title not in self.df_empty.columns:
+                continue
+            keys = (np.unique(rows)[:MAX_HIGHLIGHTED_ROWS] + offset).tolist()
+            expr = f"indexof({keys}, cell.metadata.data['{key}']) >= 0"
+            renderers[title] = self._error_renderer(title, expr)
+        self._set_renderers(renderers)
+        self._highlighted = True
+
+    def from_arrow(self, table):
+        """Set the value from a pyarrow Table. Columns are checked against the schema
+        and converted as whole columns, skipping the list of dicts.
+
+        Args:
+            table (pyarrow.Table): table with a column per field of the schema.
+        """
+        self.store.from_arrow(table)
+        self._show_store()
+
+    def to_arrow(self):
+        """Return the value as a pyarrow Table."""
+        return self.store.to_arrow()
+
+    def from_parquet(self, path: pathlib.Path, memory_map: bool = True):
+        """Set the value from a Parquet file (see `from_arrow`)."""
+        self.store.read_parquet(path, memory_map=memory_map)
+        self._show_store()
+
+    def to_parquet(self, path: pathlib.Path, **kwargs):
+        """Write the value to a Parquet file."""
+        self.store.write_parquet(path, **kwargs)
+
+    def from_feather(self, path: pathlib.Path, memory_map: bool = True):
+        """Set the value from a Feather (Arrow IPC) file. The file is memory-mapped
+        by default (see `from_arrow`)."""
+        self.store.read_feather(path, memory_map=memory_map)
+        self._show_store()
+
+    def to_feather(self, path: pathlib.Path, **kwargs):
+        """Write the value to a Feather (Arrow IPC) file."""
+        self.store.write_feather(path, **kwargs)
 
 
 if __name__ == "__main__":
@@ -702,12 +1396,123 @@ if __name__ == "__main__":
 
 
 # +
+class GridPager(widgets.HBox):
+    """Buttons to move through the rows of a GridWrapper with a datasource (only a
+    window of the rows is shown at once)."""
+
+    def __init__(self, grid: GridWrapper):
+        self.grid = grid
+        super().__init__()
+        self.first = widgets.Button(icon="angle-double-up", tooltip="first rows")
+        self.previous = widgets.Button(icon="angle-up", tooltip="previous rows")
+        self.next = widgets.Button(icon="angle-down", tooltip="next rows")
+        self.last = widgets.Button(icon="angle-double-down", tooltip="last rows")
+        self.label = widgets.HTML()
+        buttons = [self.first, self.previous, self.next, self.last]
+        for button in buttons:
+            button.layout = widgets.Layout(width=BUTTON_WIDTH_MIN)
+        self.children = buttons + [self.label]
+        self.first.on_click(lambda _: self.grid.load_window(0))
+        self.previous.on_click(lambda _: self._move(-1))
+        self.next.on_click(lambda _: self._move(1))
+        self.last.on_click(lambda _: self.grid.load_window(self.grid.n_rows))
+        self.grid.observe(self._update_label, "_data")
+        self._update_label()
+
+    def _move(self, n_windows: int):
+        grid = self.grid
+        grid.load_window(grid.window_start + n_windows * grid.window_size)
+
+    def _update_label(self, change=None):
+        n, start = self.grid.n_rows, self.grid.window_start
+        if n:
+            stop = start + len(self.grid.store)
+            self.label.value = f"rows {start + 1:,} to {stop:,} of {n:,}"
+        else:
+            self.label.value = "no rows"
+
+
+class AggregatesFooter(widgets.HTML):
+    """Table of the aggregates of the columns of a GridWrapper (sum, mean, etc., set
+    with aui_aggregates in the schema of a column). Updated as the rows change."""
+
+    def __init__(self, grid: GridWrapper):
+        self.grid = grid
+        super().__init__()
+        self.grid.observe(self._update, "aggregates")
+        self._update()
+
+    def _format(self, field: str, value) -> str:
+        if value is None:
+            return ""
+        if isinstance(value, float):
+            sig_fig = self.grid.di_cols_properties[field].get("aui_sig_fig")
+            if sig_fig is not None:
+                value = round_sig_figs(value, sig_figs=sig_fig)
+            return f"{value:,.6g}"
+        return f"{value:,}" if isinstance(value, int) else str(value)
+
+    def _update(self, change=None):
+        aggregates = self.grid.aggregates
+        names = [n for n in AGGREGATES if any(n in v for v in aggregates.values())]
+        titles = {k: self.grid.di_field_to_titles[k] for k in aggregates.keys()}
+        header = "".join(f"<th>{t}</th>" for t in titles.values())
+        rows = "".join(
+            f"<tr><th>{n}</th>"
+            + "".join(
+                f"<td>{self._format(k, v.get(n))}</td>" for k, v in aggregates.items()
+            )
+            + "</tr>"
+            for n in names
+        )
+        self.value = f"<table><tr><th></th>{header}</tr>{rows}</table>"
+
+
 class DataHandler(BaseModel):
+    """functions that read and write the rows of an EditGrid from a data source. they
+    can be plain functions or coroutine functions (`async def`). coroutine functions
+    are run on the event loop of the kernel without blocking it (see EditGrid)."""
+
     fn_get_all_data: typing.Callable
     fn_post: typing.Callable
     fn_patch: typing.Callable
     fn_delete: typing.Callable
     fn_copy: typing.Callable
+    fn_delete_many: typing.Callable = Field(
+        None,
+        description="optional. deletes a list of rows in one call (in place of"
+        " fn_delete per row)",
+    )
+    fn_post_many: typing.Callable = Field(
+        None,
+        description="optional. posts a list of rows in one call. used to add copied"
+        " rows (in place of fn_copy per row)",
+    )
+    fn_commit: typing.Callable = Field(
+        None,
+        description="optional. writes a ChangeSet (rows inserted, updated and deleted"
+        " since the last commit) in one call. if given, edits are kept in the grid"
+        " and written with EditGrid.commit, in place of a request per edit",
+    )
+    incremental: bool = Field(
+        False,
+        description="if True, fn_post, fn_patch and fn_copy return the written row"
+        " (fn_post_many a list of rows) and the grid applies the change locally in"
+        " place of reloading all data with fn_get_all_data",
+    )
+
+
+def is_async_datahandler(datahandler: DataHandler) -> bool:
+    """True if any of the datahandler functions are coroutine functions"""
+    return datahandler is not None and any(
+        asyncio.iscoroutinefunction(v) for v in datahandler.__dict__.values()
+    )
+
+
+class DataHandlerConflict(Exception):
+    """raised by a DataHandler write when the row has been changed by someone else
+    since it was read (e.g. its version / ETag is out of date). EditGrid shows a
+    message and reloads all data."""
 
 
 class RowUiCallables(BaseModel):
@@ -739,13 +1544,48 @@ class EditGrid(widgets.VBox):
         ignore_cols: list = [],
         description: str = "",
         fn_on_copy: typing.Callable = None,
+        reload_interval_ms: int = 0,
+        max_concurrent_requests: int = 4,
+        datasource: DataSource = None,
+        window_size: int = 100,
+        undo_depth: int = 50,
     ):
+        """
+        Args:
+            schema (dict): json schema of an array of objects, or pydantic model
+            value (list, optional): rows. Defaults to None.
+            datahandler (DataHandler, optional): reads and writes the rows from a
+                data source (e.g. a database). Defaults to None.
+            reload_interval_ms (int, optional): reload all data from the datahandler
+                at this interval, 0 for no reloads. Needs a running event loop (e.g.
+                a jupyter kernel). Defaults to 0.
+            max_concurrent_requests (int, optional): if the datahandler has coroutine
+                functions, the number of requests run at once. Other requests are
+                queued. Changes are shown in the grid before the request completes,
+                with a "pending" row state, and are reverted with a "failed" row
+                state if it fails. Defaults to 4.
+            datasource (DataSource, optional): paged source of the rows for large
+                tables, see GridWrapper. Only a window of the rows is held and shown
+                at once, with buttons to move through them. After writes, the
+                window is reloaded in place of fn_get_all_data. Defaults to None.
+            window_size (int, optional): rows shown at once from the datasource.
+                Defaults to 100.
+            undo_depth (int, optional): number of changes to the rows that can be
+                undone with the undo button, 0 for no undo. Not available if the
+                datahandler writes each change straight away (no fn_commit).
+                Defaults to 50.
+        """
+        self.max_concurrent_requests = max_concurrent_requests
+        self._tasks = set()
+        self._stream_task = None
+        self._semaphore, self._semaphore_loop = None, None
         self.ui_add = ui_add
         self.ui_edit = ui_edit
         self.fn_on_copy = fn_on_copy
         self.model, self.schema = aui._init_model_schema(schema, by_alias=by_alias)
         self.datahandler = datahandler
-        if self.datahandler is not None:
+        is_async = is_async_datahandler(datahandler)
+        if self.datahandler is not None and not is_async and datasource is None:
             value = self.datahandler.fn_get_all_data()
         self.out = widgets.Output()
         self._init_form(
@@ -756,9 +1596,19 @@ class EditGrid(widgets.VBox):
             order_cols=order_cols,
             ignore_cols=ignore_cols,
             description=description,
+            row_state_column=ROW_STATE_COLUMN if is_async else None,
+            datasource=datasource,
+            window_size=window_size,
+            undo_depth=0 if self._writes_each_edit else undo_depth,
         )
         self._init_controls()
         self._edit_bool = False  # Initially define edit mode to be false
+        self._conflict, self._error = None, None
+        self._reload_handle = None
+        self.reload_interval_ms = reload_interval_ms
+        if is_async and datasource is None:
+            self._reload_all_data()
+        self._schedule_reload()
 
     def _init_form(
         self,
@@ -769,6 +1619,10 @@ class EditGrid(widgets.VBox):
         order_cols,
         ignore_cols,
         description,
+        row_state_column=None,
+        datasource=None,
+        window_size=100,
+        undo_depth=50,
     ):
         super().__init__(layout={"width": "100%"})  # main container
         self.button_bar = ButtonBar(
@@ -778,6 +1632,9 @@ class EditGrid(widgets.VBox):
             delete=self._delete,
             backward=self._backward,
             show_message=False,
+            commit=self.commit if self._commits else None,
+            undo=self.undo if undo_depth else None,
+            redo=self.redo if undo_depth else None,
         )
         self.description = widgets.HTML(description)
         self.grid = GridWrapper(
@@ -787,6 +1644,10 @@ class EditGrid(widgets.VBox):
             kwargs_datagrid_update=kwargs_datagrid_update,
             order_cols=order_cols,
             ignore_cols=ignore_cols,
+            row_state_column=row_state_column,
+            datasource=datasource,
+            window_size=window_size,
+            history_depth=undo_depth,
         )
         self.baseform = BaseForm(
             schema=self.schema["items"],
@@ -799,16 +1660,19 @@ class EditGrid(widgets.VBox):
         self.baseform.save_button_bar.layout = widgets.Layout(padding="0px 20px")
         self.baseform.layout = widgets.Layout(padding="0px 0px 40px 0px")
         self.children = [self.description, self.button_bar, self.baseform, self.grid]
+        if self.grid.aui_aggregates:
+            self.footer = AggregatesFooter(self.grid)
+            self.children = self.children + (self.footer,)
+        if datasource is not None:
+            self.pager = GridPager(self.grid)
+            self.children = self.children + (self.pager,)
         self.baseform.layout.display = "none"  # Hide base form menu
 
     def _init_controls(self):
         self.grid.observe(self._update_baseform, "selections")
 
     def _update_baseform(self, onchange):
-        if (
-            len(self.grid.selected_rows) == 1
-            and self.baseform.layout.display == "block"
-        ):
+        if self.grid.n_selected_rows == 1 and self.baseform.layout.display == "block":
             print(self.di_row_value)
             self.baseform.value = self.di_row_value
             self.baseform.save_button_bar._unsaved_changes(False)
@@ -835,7 +1699,7 @@ class EditGrid(widgets.VBox):
         self.baseform.cls_ui = self.ui_edit
         try:
             self._check_one_row_selected()
-            if len(self.grid.selected_keys) == 0:
+            if self.grid.n_selected_rows == 0:
                 raise ValueError("you must select a row")
             self.initial_value = self.di_row_value
             self.baseform.value = self.di_row_value  # Set values in fields
@@ -853,26 +1717,36 @@ class EditGrid(widgets.VBox):
             traceback.print_exc()
 
     def _copy(self):
+        self._conflict, self._error = None, None
         try:
-            if self.grid.selected_keys == set():
+            if self.grid.n_selected_rows == 0:
                 self.button_bar.message.value = markdown(
                     "  👇 _Please select a row from the table!_ "
                 )
             else:
-                li_values_selected = [
-                    self.value[i] for i in sorted([i for i in self.grid.selected_keys])
-                ]
-                if self.fn_on_copy is not None:
-                    li_values_selected = self.fn_on_copy(li_values_selected)
-                if self.datahandler is not None:
-                    for value in li_values_selected:
-                        self.datahandler.fn_copy(value)
-                    self._reload_all_data()
+                if self.fn_on_copy is None and not self._writes_each_edit:
+                    # copy the rows of the store directly
+                    self.grid.append_rows(self.grid.get_selected_data)
+                    self._value = self.grid.value
                 else:
-                    self.value += li_values_selected
-                    # ^ add copied values
-
-                self.button_bar.message.value = markdown("  📝 _Copied Data_ ")
+                    li_values_selected = self.grid.selected_values
+                    if self.fn_on_copy is not None:
+                        li_values_selected = self.fn_on_copy(li_values_selected)
+                    if self._writes_each_edit:
+                        if self.datahandler.fn_post_many is not None:
+                            self._write_new_rows(
+                                self.datahandler.fn_post_many, li_values_selected
+                            )
+                        else:
+                            fn = self.datahandler.fn_copy
+                            self._write_new_rows(fn, li_values_selected, many=False)
+                    else:
+                        self.grid.append_rows(li_values_selected)
+                        self._value = self.grid.value
+                        # ^ add copied values
+
+                if self._conflict is None and self._error is None:
+                    self.button_bar.message.value = markdown("  📝 _Copied Data_ ")
                 self._edit_bool = False  # Want to add the values
         except Exception as e:
             self.button_bar.message.value = markdown(
@@ -881,23 +1755,19 @@ class EditGrid(widgets.VBox):
             traceback.print_exc()
 
     def _delete(self):
+        self._conflict, self._error = None, None
         try:
             self._set_toggle_buttons_to_false()
-            if self.grid.selected_keys:
-                print(f"Row Number: {self.grid.selected_keys}")
-                if self.datahandler is not None:
-                    value = [self.value[i] for i in self.grid.selected_keys]
-                    for v in value:
-                        self.datahandler.fn_delete(v)
-                    self._reload_all_data()
+            if self.grid.n_selected_rows:
+                print(f"Row Number: {self.grid.selected_key_ranges}")
+                if self._writes_each_edit:
+                    self._write_delete_rows(self.grid.selected_key_ranges)
                 else:
-                    self.value = [
-                        value
-                        for i, value in enumerate(self.value)
-                        if i not in self.grid.selected_keys
-                    ]
-                    # ^ Only set for values NOT in self.grid.selected_keys
-                self.button_bar.message.value = markdown("  🗑️ _Deleted Row_ ")
+                    self.grid.delete_rows(self.grid.selected_key_ranges)
+                    self._value = self.grid.value
+                    # ^ Only keep values NOT in self.grid.selected_keys
+                if self._conflict is None and self._error is None:
+                    self.button_bar.message.value = markdown("  🗑️ _Deleted Row_ ")
 
             else:
                 self.button_bar.message.value = markdown(
@@ -907,40 +1777,46 @@ class EditGrid(widgets.VBox):
             traceback.print_exc()
 
     def _check_one_row_selected(self):
-        if len(self.grid.selected_rows) > 1:
+        if self.grid.n_selected_rows > 1:
             raise Exception(
                 markdown("  👇 _Please only select ONLY one row from the table!_")
             )
 
     def _save(self):
+        self._conflict, self._error = None, None
         if self._edit_bool:  # If editing then use patch
-            if self.datahandler is not None:
-                value = self.baseform.value
-                self.datahandler.fn_patch(value)
-                self._reload_all_data()
+            if self._writes_each_edit:
+                key = self.grid.selected_keys[0]
+                self._write_patch_row(key, self.baseform.value)
             else:
-                value = self.value
-                value[self.selected_row] = self.baseform.value
-                self.value = value
-                # ^ Call setter
+                self.grid.set_row_value(
+                    self.grid.selected_keys[0], self.baseform.value
+                )
+                self._value = self.grid.value
         else:  # Else, if adding values, use post
-            if self.datahandler is not None:
-                value = self.baseform.value
-                self.datahandler.fn_post(value)
-                self._reload_all_data()
+            if self._writes_each_edit:
+                self._write_new_rows(
+                    self.datahandler.fn_post, [self.baseform.value], many=False
+                )
             else:
-                if not self.grid._data["data"]:  # If no data in grid
-                    self.value = [self.baseform.value]
-                else:
-                    # Append new row onto data frame and set to grid's data.
-                    value = self.value
-                    value.append(self.baseform.value)
-                    self.value = value  # Call setter
+                # Append new row onto the grid without rebuilding it.
+                self.grid.append_rows([self.baseform.value])
+                self._value = self.grid.value
 
     def _onsave(self):
         self._display_grid()
         self._set_toggle_buttons_to_false()
-        if self._edit_bool:  # If editing
+        if self._conflict is not None:
+            self.button_bar.message.value = markdown(
+                f"  ⚠️ _Not saved, the row was changed elsewhere: {self._conflict}_ "
+            )
+        elif self._error is not None:
+            self.button_bar.message.value = markdown(
+                f"  ☠️ _Not saved: {self._error}_ "
+            )
+        elif self._tasks:
+            self.button_bar.message.value = markdown("  ⏳ _Saving..._ ")
+        elif self._edit_bool:  # If editing
             self.button_bar.message.value = markdown(
                 "  💾 _Successfully updated row_ "
             )  # TODO: Make generic
@@ -973,12 +1849,409 @@ class EditGrid(widgets.VBox):
         self.baseform.layout.display = "block"  # Displays base form menu
 
     def _reload_all_data(self):
-        if self.datahandler is not None:
-            self.value = self.datahandler.fn_get_all_data()
+        if self.grid.datasource is not None:
+            self.grid.refresh()
+        elif self.datahandler is not None:
+            self._submit(
+                self.datahandler.fn_get_all_data,
+                [()],
+                on_success=lambda results: setattr(self, "value", results[0]),
+                on_failure=self._on_error,
+            )
+
+    def reload(self):
+        """Reload all data from the datahandler."""
+        self._reload_all_data()
+
+    @property
+    def _commits(self) -> bool:
+        """True if edits are kept in the grid and written together by `commit`."""
+        return self.datahandler is not None and self.datahandler.fn_commit is not None
+
+    @property
+    def _writes_each_edit(self) -> bool:
+        """True if each edit is written to the datahandler straight away."""
+        return self.datahandler is not None and self.datahandler.fn_commit is None
+
+    def undo(self):
+        """Undo the last change to the rows (see `GridWrapper.undo`)."""
+        self._set_toggle_buttons_to_false()
+        if self.grid.undo():
+            self._value = self.grid.value
+            self.button_bar.message.value = markdown("  ↩️ _Undone_ ")
+        else:
+            self.button_bar.message.value = markdown("  _Nothing to undo_ ")
+
+    def redo(self):
+        """Redo the last undone change to the rows."""
+        self._set_toggle_buttons_to_false()
+        if self.grid.redo():
+            self._value = self.grid.value
+            self.button_bar.message.value = markdown("  ↪️ _Redone_ ")
+        else:
+            self.button_bar.message.value = markdown("  _Nothing to redo_ ")
+
+    def commit(self):
+        """Write the rows added, changed and deleted since the last commit with
+        `datahandler.fn_commit`, in one call (see `GridWrapper.changes`)."""
+        changes = self.grid.changes()
+        if changes.is_empty:
+            self.button_bar.message.value = markdown("  💾 _No changes to save_ ")
+            return
+        self._conflict, self._error = None, None
+
+        def on_success(results):
+            self.grid.mark_saved(changes)
+            if not self.datahandler.incremental:
+                self._reload_all_data()
+            self.button_bar.message.value = markdown("  💾 _Saved changes_ ")
+
+        self._submit(
+            self.datahandler.fn_commit,
+            [(changes,)],
+            on_success,
+            self._on_error,
+            done_message="  💾 _Saved changes_ ",
+        )
+
+    # datahandler requests
+    # --------------------
+    # each write is sent to the datahandler with `_submit`. plain functions are called
+    # straight away. coroutine functions are run as tasks on the running event loop,
+    # with the change shown in the grid first ("pending" row state) and reverted if
+    # the request fails ("failed" row state).
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _submit(
+        self,
+        fn: typing.Callable,
+        li_args: List[tuple],
+        on_success: typing.Callable,
+        on_failure: typing.Callable,
+        done_message: str = None,
+    ):
+        """Call `fn(*args)` for each args in li_args, then `on_success(results)`, or
+        `on_failure(exception)` if a call fails. `done_message` is shown when the last
+        pending request completes."""
+        if self._writes_each_edit:  # the grid matches the datahandler once done
+            on_success = self._then_mark_saved(on_success)
+            on_failure = self._then_mark_saved(on_failure)
+        if not asyncio.iscoroutinefunction(fn):
+            try:
+                results = [fn(*args) for args in li_args]
+            except Exception as e:
+                on_failure(e)
+                return
+            on_success(results)
+            return
+
+        async def limited(args):
+            async with self._get_semaphore():
+                return await fn(*args)
+
+        async def run():
+            return await asyncio.gather(*[limited(args) for args in li_args])
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # no event loop. e.g. not running in a kernel
+            try:
+                results = asyncio.run(run())
+            except Exception as e:
+                on_failure(e)
+                return
+            on_success(results)
+            return
+
+        def done(task):
+            self._tasks.discard(task)
+            if task.cancelled():
+                return
+            try:
+                if task.exception() is not None:
+                    on_failure(task.exception())
+                else:
+                    on_success(task.result())
+            except Exception:
+                traceback.print_exc()
+            if done_message and not self._tasks and self._error is None:
+                self.button_bar.message.value = markdown(done_message)
+
+        task = loop.create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(done)
+
+    def _then_mark_saved(self, fn: typing.Callable) -> typing.Callable:
+        def wrapped(*args):
+            fn(*args)
+            if not self._tasks:
+                self.grid.mark_saved()
+
+        return wrapped
+
+    async def wait(self):
+        """Wait for all pending datahandler requests to complete."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def _keys_of(self, row_ids) -> List[int]:
+        keys = [self.grid.store.position(i) for i in row_ids]
+        return [k for k in keys if k is not None]
+
+    def _write_new_rows(self, fn: typing.Callable, values: List[dict], many=True):
+        """Post new rows, with `fn(values)` if many else `fn(value)` per row."""
+        optimistic = asyncio.iscoroutinefunction(fn)
+        row_ids = None
+        if optimistic:
+            keys = self.grid.append_rows(values)
+            row_ids = list(self.grid.store.ids[keys.start : keys.stop])
+            for key in keys:
+                self.grid.set_row_state(key, "pending")
+            self._value = self.grid.value
+
+        def on_success(results):
+            rows = results[0] if many else results
+            if not self.datahandler.incremental:
+                self._reload_all_data()
+                return
+            if row_ids is None:
+                self.grid.append_rows(rows)
+            else:
+                keys = self._keys_of(row_ids)
+                self.grid.patch_rows(dict(zip(keys, rows)))
+                for key in keys:
+                    self.grid.set_row_state(key, None)
+            self._value = self.grid.value
+
+        def on_failure(e):
+            if row_ids is not None:
+                self.grid.delete_rows(self._keys_of(row_ids))
+                self._value = self.grid.value
+            self._on_error(e)
+
+        li_args = [(values,)] if many else [(v,) for v in values]
+        self._submit(
+            fn, li_args, on_success, on_failure, done_message="  💾 _Saved_ "
+        )
+
+    def _write_patch_row(self, key: int, value: dict):
+        fn = self.datahandler.fn_patch
+        optimistic = asyncio.iscoroutinefunction(fn)
+        row_id = self.grid.store.ids[key]
+        previous = self.grid.store.records([key])[0]
+        if optimistic:
+            self.grid.patch_rows({key: value})
+            self.grid.set_row_state(key, "pending")
+            self._value = self.grid.value
+
+        def on_success(results):
+            if not self.datahandler.incremental:
+                self._reload_all_data()
+                return
+            for key in self._keys_of([row_id]):
+                self.grid.patch_rows({key: results[0]})
+                self.grid.set_row_state(key, None)
+            self._value = self.grid.value
+
+        def on_failure(e):
+            if optimistic:
+                for key in self._keys_of([row_id]):
+                    self.grid.patch_rows({key: previous})
+                    self.grid.set_row_state(key, "failed")
+                self._value = self.grid.value
+            self._on_error(e)
+
+        self._submit(
+            fn, [(value,)], on_success, on_failure, done_message="  💾 _Saved_ "
+        )
+
+    def _write_delete_rows(self, key_ranges: List[range]):
+        values = self.grid.selected_values
+        mask = keys_to_mask(key_ranges, len(self.grid.store))
+        row_ids = list(self.grid.store.ids[mask])
+        if self.datahandler.fn_delete_many is not None:
+            fn, li_args = self.datahandler.fn_delete_many, [(values,)]
+        else:
+            fn, li_args = self.datahandler.fn_delete, [(v,) for v in values]
+        optimistic = asyncio.iscoroutinefunction(fn)
+        if optimistic:
+            self.grid.delete_rows(key_ranges)
+            self._value = self.grid.value
+
+        def on_success(results):
+            if not self.datahandler.incremental:
+                self._reload_all_data()
+            elif not optimistic:
+                self.grid.delete_rows(self._keys_of(row_ids))
+                self._value = self.grid.value
+
+        def on_failure(e):
+            if optimistic:  # put the rows back where they were
+                it = iter(values)
+                for r in key_ranges:
+                    rows = [next(it) for _ in r]
+                    key = min(r.start, len(self.grid.store))
+                    keys = self.grid.insert_rows(key, rows)
+                    for key in keys:
+                        self.grid.set_row_state(key, "failed")
+                self._value = self.grid.value
+            self._on_error(e)
+
+        self._submit(
+            fn, li_args, on_success, on_failure, done_message="  💾 _Saved_ "
+        )
+
+    def _on_error(self, e: Exception):
+        if isinstance(e, DataHandlerConflict):
+            self._on_conflict(e)
+            return
+        logging.error(f"datahandler request failed: {e!r}")
+        self._error = e
+        self.button_bar.message.value = markdown(f"  ☠️ _Request failed: {e}_ ")
+
+    def _on_conflict(self, e: DataHandlerConflict):
+        logging.warning(f"datahandler conflict: {e}")
+        self._conflict = e
+        self.button_bar.message.value = markdown(
+            f"  ⚠️ _The row was changed elsewhere, reloading: {e}_ "
+        )
+        self._reload_all_data()
+
+    def _schedule_reload(self):
+        if not self.reload_interval_ms or self.datahandler is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logging.info("no event loop running. reload_interval_ms is ignored.")
+            return
+        self._reload_handle = loop.call_later(
+            self.reload_interval_ms / 1000, self._on_reload_interval
+        )
+
+    def _on_reload_interval(self):
+        self._reload_handle = None
+        self._reload_all_data()
+        self._schedule_reload()
+
+    def close(self):
+        if self._reload_handle is not None:
+            self._reload_handle.cancel()
+            self._reload_handle = None
+        self.stop_stream()
+        super().close()
+
+    # streaming
+    # ---------
+    # rows from an iterator are buffered and appended to the grid store in batches,
+    # at most `max_rate_hz` times a second. rows are shown in the grid only (they are
+    # not written to the datahandler).
+
+    def stream(
+        self,
+        source: typing.Union[typing.Iterable[dict], typing.AsyncIterable[dict]],
+        max_rate_hz: float = 10.0,
+        max_rows: int = None,
+    ) -> typing.Optional[asyncio.Task]:
+        """Append rows to the grid as they arrive from an iterator or async iterator
+        (e.g. the results of a running simulation).
+
+        Args:
+            source (typing.Iterable[dict] or typing.AsyncIterable[dict]): rows. a
+                plain iterator is read in a thread so it doesn't block the kernel.
+            max_rate_hz (float, optional): the grid is updated at most this many
+                times a second, with all the rows that arrived since the last
+                update. Defaults to 10.
+            max_rows (int, optional): keep only the last `max_rows` rows, dropping
+                the oldest (a ring buffer). Defaults to None.
+
+        Returns:
+            asyncio.Task: if an event loop is running (e.g. in a kernel), the task
+                streaming the rows. cancel it or call `stop_stream` to stop. None if
+                there is no event loop: the rows are appended before returning.
+        """
+        period = 1 / max_rate_hz
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # no event loop. e.g. not running in a kernel
+            if hasattr(source, "__aiter__"):
+                asyncio.run(self._stream(source, period, max_rows))
+            else:
+                self._stream_sync(source, period, max_rows)
+            return None
+        self.stop_stream()
+        self._stream_task = loop.create_task(self._stream(source, period, max_rows))
+        self._stream_task.add_done_callback(self._on_stream_done)
+        return self._stream_task
+
+    def stop_stream(self):
+        """Stop streaming rows (see `stream`). Rows that have arrived are shown."""
+        if self._stream_task is not None and not self._stream_task.done():
+            self._stream_task.cancel()
+        self._stream_task = None
+
+    def _on_stream_done(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            self._on_error(task.exception())
+
+    def _flush_stream(self, buffer: list, max_rows: int = None):
+        """Append the buffered rows to the grid, dropping the oldest rows if there
+        are more than `max_rows`."""
+        rows = buffer[:]
+        del buffer[:]
+        if max_rows is not None:
+            rows = rows[-max_rows:]
+        if rows:
+            self.grid.append_rows(rows)
+        n = len(self.grid.store)
+        if max_rows is not None and n > max_rows:
+            self.grid.delete_rows([range(0, n - max_rows)])
+        if rows:
+            self._value = self.grid.value
+
+    def _stream_sync(self, source: typing.Iterable[dict], period: float, max_rows):
+        buffer, flushed = [], time.monotonic()
+        for row in source:
+            buffer.append(row)
+            if time.monotonic() - flushed >= period:
+                self._flush_stream(buffer, max_rows)
+                flushed = time.monotonic()
+        self._flush_stream(buffer, max_rows)
+
+    async def _stream(self, source, period: float, max_rows):
+        buffer = []
+
+        async def read():
+            if hasattr(source, "__aiter__"):
+                async for row in source:
+                    buffer.append(row)
+            else:
+                loop, it, end = asyncio.get_running_loop(), iter(source), object()
+                while True:
+                    row = await loop.run_in_executor(None, next, it, end)
+                    if row is end:
+                        break
+                    buffer.append(row)
+
+        reader = asyncio.ensure_future(read())
+        try:
+            while not reader.done():
+                await asyncio.wait({reader}, timeout=period)
+                self._flush_stream(buffer, max_rows)
+            reader.result()  # raises errors of the source
+        finally:
+            reader.cancel()
+            self._flush_stream(buffer, max_rows)
 
     @property
     def value(self):
-        self._value = self.grid._value
+        self._value = self.grid.value
         return self._value
 
     @value.setter
@@ -986,11 +2259,39 @@ class EditGrid(widgets.VBox):
         self.grid.value = value
         self._value = self.grid.value
 
+    def from_arrow(self, table):
+        """Set the value from a pyarrow Table (see `GridWrapper.from_arrow`)."""
+        self.grid.from_arrow(table)
+        self._value = self.grid.value
+
+    def to_arrow(self):
+        """Return the value as a pyarrow Table."""
+        return self.grid.to_arrow()
+
+    def from_parquet(self, path: pathlib.Path, memory_map: bool = True):
+        """Set the value from a Parquet file (see `GridWrapper.from_parquet`)."""
+        self.grid.from_parquet(path, memory_map=memory_map)
+        self._value = self.grid.value
+
+    def to_parquet(self, path: pathlib.Path, **kwargs):
+        """Write the value to a Parquet file."""
+        self.grid.to_parquet(path, **kwargs)
+
+    def from_feather(self, path: pathlib.Path, memory_map: bool = True):
+        """Set the value from a memory-mapped Feather (Arrow IPC) file (see
+        `GridWrapper.from_feather`)."""
+        self.grid.from_feather(path, memory_map=memory_map)
+        self._value = self.grid.value
+
+    def to_feather(self, path: pathlib.Path, **kwargs):
+        """Write the value to a Feather (Arrow IPC) file."""
+        self.grid.to_feather(path, **kwargs)
+
     @property
     def di_row_value(self):
         try:
             self._check_one_row_selected()  # Performing checks to see if only one row is selected
-            return self.value[self.grid.selected_rows[0]]
+            return self.grid.selected_values[0]
 
         except Exception as e:
             self.button_bar.message.value = markdown(f"_{e}_")
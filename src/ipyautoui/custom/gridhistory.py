@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# ---
+# jupyter:
+#   jupytext:
+#     cell_metadata_filter: -all
+#     formats: py:light
+#     text_representation:
+#       extension: .py
+#       format_name: light
+#       format_version: '1.5'
+#       jupytext_version: 1.14.0
+#   kernelspec:
+#     display_name: Python 3 (ipykernel)
+#     language: python
+#     name: python3
+# ---
+
+# +
+"""undo / redo of the row operations of a grid (see `editgrid.GridWrapper`). each
+operation records its inverse (e.g. the rows removed by a delete, or the old values
+of patched cells), not a copy of the table.
+"""
+# %run __init__.py
+# %load_ext lab_black
+
+import collections
+import contextlib
+import logging
+import typing
+
+
+# +
+class Operation(typing.NamedTuple):
+    """a call of a grid method, `getattr(grid, name)(*args)`"""
+
+    name: str
+    args: tuple
+    size: int  # number of cells held by args, used to bound the memory of the log
+
+
+class OperationLog:
+    """bounded undo / redo stacks of operations. `record` is called by the grid with
+    the inverse of each operation it applies. undoing an operation applies its
+    inverse, which records the inverse of that (the redo) in turn.
+
+    Example:
+        >>> log, value = OperationLog(), [1]
+        >>> def append(x):
+        ...     value.append(x)
+        ...     log.record(Operation("pop", (), 1))
+        >>> def pop():
+        ...     log.record(Operation("append", (value.pop(),), 1))
+        >>> methods = {"append": append, "pop": pop}
+        >>> def apply(op):
+        ...     methods[op.name](*op.args)
+        >>> append(2)
+        >>> log.undo(apply), value
+        (True, [1])
+        >>> log.redo(apply), value
+        (True, [1, 2])
+    """
+
+    def __init__(self, max_depth: int = 50, max_cells: int = 1_000_000):
+        """
+        Args:
+            max_depth (int, optional): number of operations that can be undone. 0
+                turns off recording. Defaults to 50.
+            max_cells (int, optional): the oldest operations are dropped when the
+                operations held add up to more cells than this. Defaults to 1M.
+        """
+        self.max_depth = max_depth
+        self.max_cells = max_cells
+        self.undo_stack = collections.deque()
+        self.redo_stack = collections.deque()
+        self._n_cells = 0  # total size of the operations in both stacks
+        self._mode = None  # "undo" or "redo" while applying an operation
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
+
+    @property
+    def n_cells(self) -> int:
+        return self._n_cells
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self._n_cells = 0
+
+    def _push(self, stack: collections.deque, op: Operation):
+        stack.append(op)
+        self._n_cells += op.size
+
+    def _pop(self, stack: collections.deque, oldest: bool = False) -> Operation:
+        op = stack.popleft() if oldest else stack.pop()
+        self._n_cells -= op.size
+        return op
+
+    def record(self, op: Operation):
+        """records the inverse of an operation that has just been applied"""
+        if not self.max_depth:
+            return
+        if self._mode == "undo":
+            self._push(self.redo_stack, op)
+        elif self._mode == "redo":
+            self._push(self.undo_stack, op)
+        else:
+            self._push(self.undo_stack, op)
+            while self.redo_stack:
+                self._pop(self.redo_stack)
+        for stack in (self.undo_stack, self.redo_stack):
+            while len(stack) > self.max_depth:
+                self._pop(stack, oldest=True)
+        while self._n_cells > self.max_cells and (self.undo_stack or self.redo_stack):
+            # the oldest undo goes first, then the redo furthest from the current state
+            stack = self.undo_stack if self.undo_stack else self.redo_stack
+            dropped = self._pop(stack, oldest=True)
+            logging.info(f"dropped {dropped.name} from the undo history (too large)")
+
+    @contextlib.contextmanager
+    def _applying(self, mode: str):
+        self._mode = mode
+        try:
+            yield
+        finally:
+            self._mode = None
+
+    def undo(self, apply: typing.Callable[[Operation], typing.Any]) -> bool:
+        """applies the inverse of the last operation with `apply(op)`
+
+        Returns:
+            bool: False if there is nothing to undo
+        """
+        if not self.undo_stack:
+            return False
+        op = self._pop(self.undo_stack)
+        with self._applying("undo"):
+            apply(op)
+        return True
+
+    def redo(self, apply: typing.Callable[[Operation], typing.Any]) -> bool:
+        """applies again the last undone operation with `apply(op)`
+
+        Returns:
+            bool: False if there is nothing to redo
+        """
+        if not self.redo_stack:
+            return False
+        op = self._pop(self.redo_stack)
+        with self._applying("redo"):
+            apply(op)
+        return True
+
+
+# -
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
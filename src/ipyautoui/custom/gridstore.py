@@ -0,0 +1,851 @@
+# -*- coding: utf-8 -*-
+# ---
+# jupyter:
+#   jupytext:
+#     cell_metadata_filter: -all
+#     formats: py:light
+#     text_representation:
+#       extension: .py
+#       format_name: light
+#       format_version: '1.5'
+#       jupytext_version: 1.14.0
+#   kernelspec:
+#     display_name: Python 3 (ipykernel)
+#     language: python
+#     name: python3
+# ---
+
+# +
+"""columnar store for the rows of a grid (see `editgrid.GridWrapper`)"""
+# %run __init__.py
+# %load_ext lab_black
+
+import itertools
+import logging
+import pathlib
+import typing
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, Field
+
+from ipyautoui._utils import check_installed
+
+if check_installed("pyarrow"):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+# +
+DATE_FORMAT = "%Y-%m-%d"  # default `strftime_format` of date strings (see DatePickerString)
+
+
+def _int_dtype(schema: dict) -> str:
+    """returns the smallest nullable integer dtype that holds the range given by
+    "minimum" and "maximum" in the schema (Int64 if the range is not bounded)"""
+    lo, hi = schema.get("minimum"), schema.get("maximum")
+    if lo is None or hi is None:
+        return "Int64"
+    for bits in (8, 16, 32):
+        if lo >= 0 and hi < 2**bits:
+            return f"UInt{bits}"
+        if lo >= -(2 ** (bits - 1)) and hi < 2 ** (bits - 1):
+            return f"Int{bits}"
+    return "Int64"
+
+
+def dtype_from_schema(schema: dict):
+    """returns the pandas dtype used to store a column with the given json schema.
+    enums are categorical, numbers and booleans use the nullable dtypes (so missing
+    values don't change the type), and dates are datetimes.
+
+    Example:
+        >>> dtype_from_schema({"type": "integer"})
+        'Int64'
+        >>> dtype_from_schema({"type": "integer", "minimum": 0, "maximum": 100})
+        'UInt8'
+        >>> dtype_from_schema({"type": "string", "enum": ["a", "b"]})
+        CategoricalDtype(categories=['a', 'b'], ordered=False)
+        >>> dtype_from_schema({"type": "string", "format": "date"})
+        'datetime64[ns]'
+    """
+    type_ = schema.get("type")
+    enum = schema.get("enum")
+    if enum and None not in enum:
+        return pd.CategoricalDtype(enum)
+    elif type_ == "integer":
+        return _int_dtype(schema)
+    elif type_ == "number":
+        return "Float64"
+    elif type_ == "boolean":
+        return "boolean"
+    elif type_ == "string" and schema.get("format") == "date":
+        return "datetime64[ns]"
+    else:
+        return "object"
+
+
+def _to_datetime(s: pd.Series, date_format: str = None) -> pd.Series:
+    """parses dates. strings are parsed with `date_format` (if given), such that
+    e.g. day-first dates are not read as month-first"""
+    kind = pd.api.types.infer_dtype(s, skipna=True)
+    if date_format is None or kind not in ("string", "mixed"):
+        return pd.to_datetime(s, errors="raise")
+    if kind == "string":
+        return pd.to_datetime(s, format=date_format, errors="raise")
+    is_str = np.fromiter((isinstance(v, str) for v in s), dtype=bool, count=len(s))
+    out = pd.to_datetime(s.where(~is_str), errors="raise")
+    out[is_str] = pd.to_datetime(s[is_str], format=date_format, errors="raise")
+    return out
+
+
+def to_dtype(s: pd.Series, dtype, date_format: str = None) -> pd.Series:
+    """returns the column as the given dtype
+
+    Args:
+        s (pd.Series): column
+        dtype: pandas dtype (see `dtype_from_schema`)
+        date_format (str, optional): strftime format of date strings. Defaults to
+            None (the format is inferred).
+
+    Raises:
+        ValueError: if a value can't be stored as the dtype (including values that
+            are not one of the categories of a categorical dtype, which pandas would
+            otherwise replace with NaN)
+
+    Example:
+        >>> to_dtype(pd.Series(["03/04/2022"]), "datetime64[ns]", "%d/%m/%Y")[0]
+        Timestamp('2022-04-03 00:00:00')
+    """
+    if isinstance(dtype, pd.CategoricalDtype):
+        if (s.notna() & ~s.isin(dtype.categories)).any():
+            raise ValueError(f"values not in categories {list(dtype.categories)}")
+    elif dtype == "datetime64[ns]" and not pd.api.types.is_datetime64_dtype(s.dtype):
+        return _to_datetime(s, date_format)
+    return s.astype(dtype)
+
+
+def column_to_list(s: pd.Series, date_format: str = None) -> list:
+    """returns the values of a column as python objects, with None for missing values.
+    datetimes are returned as strings if a `date_format` is given."""
+    if date_format is not None and pd.api.types.is_datetime64_dtype(s.dtype):
+        s = s.dt.strftime(date_format)
+    if s.dtype == object or pd.api.types.is_extension_array_dtype(s.dtype):
+        return s.astype(object).where(s.notna(), None).tolist()
+    if s.hasnans:
+        return s.astype(object).where(s.notna(), None).tolist()
+    return s.tolist()
+
+
+def frame_to_records(
+    df: pd.DataFrame, date_formats: typing.Dict[str, str] = None
+) -> typing.List[dict]:
+    """returns the rows of a dataframe as a list of dicts of python objects
+
+    Args:
+        df (pd.DataFrame): rows
+        date_formats (typing.Dict[str, str], optional): {column: strftime format} of
+            datetime columns returned as strings. Defaults to None.
+    """
+    date_formats = date_formats or {}
+    names = list(df.columns)
+    lists = [column_to_list(df[c], date_formats.get(c)) for c in names]
+    return [dict(zip(names, row)) for row in zip(*lists)]
+
+
+def keys_to_mask(keys, n: int) -> np.ndarray:
+    """returns a boolean mask of length `n` that is True at the given positions
+
+    Args:
+        keys (typing.Iterable[int] or typing.Iterable[range] or np.ndarray):
+            positions, ranges of positions or a boolean mask
+        n (int): number of rows
+
+    Example:
+        >>> keys_to_mask([range(0, 2), range(3, 4)], 5).tolist()
+        [True, True, False, True, False]
+    """
+    if isinstance(keys, np.ndarray) and keys.dtype == bool:
+        return keys
+    mask = np.zeros(n, dtype=bool)
+    if isinstance(keys, range):
+        keys = [keys]
+    keys = list(keys)
+    if keys and all(isinstance(k, range) for k in keys):
+        for r in keys:
+            mask[r.start : r.stop] = True
+    elif keys:
+        mask[np.asarray(keys, dtype=np.int64)] = True
+    return mask
+
+
+def _check_pyarrow():
+    if not check_installed("pyarrow"):
+        raise ImportError("pyarrow is required to read and write Arrow files")
+
+
+def _arrow_type_is_valid(type_, schema: dict) -> bool:
+    """checks that an arrow type can be stored in a column with the given json schema"""
+    if pa.types.is_null(type_):
+        return True
+    if pa.types.is_dictionary(type_):
+        type_ = type_.value_type
+    is_string = pa.types.is_string(type_) or pa.types.is_large_string(type_)
+    json_type = schema.get("type")
+    if json_type == "integer":
+        return pa.types.is_integer(type_)
+    elif json_type == "number":
+        return pa.types.is_integer(type_) or pa.types.is_floating(type_)
+    elif json_type == "boolean":
+        return pa.types.is_boolean(type_)
+    elif json_type == "string" and schema.get("format") == "date":
+        return pa.types.is_date(type_) or pa.types.is_timestamp(type_) or is_string
+    elif json_type == "string":
+        return is_string
+    else:
+        return True
+
+
+def validate_arrow_table(table, properties: dict):
+    """checks the columns of an arrow table against the json schema of the grid items.
+    each column is checked once as a whole (name, type and enum values).
+
+    Args:
+        table (pa.Table): table
+        properties (dict): json schema properties of the grid items
+
+    Raises:
+        ValueError: listing every column that is missing or has invalid values
+    """
+    errors = []
+    for k, schema in properties.items():
+        if k not in table.column_names:
+            errors.append(f"{k}: missing")
+            continue
+        column = table.column(k)
+        if not _arrow_type_is_valid(column.type, schema):
+            errors.append(f"{k}: type {column.type} is not valid for {schema}")
+            continue
+        enum = schema.get("enum")
+        if enum and column.null_count < len(column):
+            unique = pc.unique(column.drop_null()).to_pylist()
+            invalid = [v for v in unique if v not in enum]
+            if invalid:
+                errors.append(f"{k}: {invalid} not in {enum}")
+    if errors:
+        raise ValueError("table does not match the schema:\n" + "\n".join(errors))
+
+
+AGGREGATES = ("sum", "mean", "min", "max", "count")
+
+
+def _scalar(v):
+    """numpy / pandas scalar as a python object (None if missing)"""
+    if v is None or v is pd.NA or (isinstance(v, float) and np.isnan(v)):
+        return None
+    return v.item() if hasattr(v, "item") else v
+
+
+class ColumnAggregate:
+    """running count, sum, min and max of a column. rows are added and removed
+    without reading the rest of the column. min / max are recomputed from the column
+    (in one vectorized pass) only when a row holding the min / max is removed.
+    values outside `minimum` / `maximum` (invalid for the schema) are left out.
+
+    Example:
+        >>> s = pd.Series([1.0, 2.0, None])
+        >>> agg = ColumnAggregate(lambda: s)
+        >>> agg.reset(s)
+        >>> agg.add(pd.Series([7.0]))
+        >>> agg.remove(pd.Series([1.0]))
+        >>> agg.values(["sum", "mean", "count"])
+        {'sum': 9.0, 'mean': 4.5, 'count': 2}
+    """
+
+    def __init__(
+        self,
+        get_column: typing.Callable[[], pd.Series],
+        minimum: float = None,
+        maximum: float = None,
+    ):
+        """
+        Args:
+            get_column (typing.Callable): returns the current column. used to
+                recompute min / max
+            minimum (float, optional): smaller values are left out. Defaults to None.
+            maximum (float, optional): larger values are left out. Defaults to None.
+        """
+        self.get_column = get_column
+        self.minimum, self.maximum = minimum, maximum
+        self.count, self.sum, self.min, self.max = 0, 0, None, None
+        self._stale = False  # min / max need recomputing
+
+    @staticmethod
+    def _is_numeric(s: pd.Series) -> bool:
+        return pd.api.types.is_numeric_dtype(s.dtype)
+
+    def _in_range(self, s: pd.Series) -> pd.Series:
+        if not self._is_numeric(s):
+            return s
+        if self.minimum is not None:
+            s = s[(s >= self.minimum).fillna(False).to_numpy(dtype=bool)]
+        if self.maximum is not None:
+            s = s[(s <= self.maximum).fillna(False).to_numpy(dtype=bool)]
+        return s
+
+    def reset(self, s: pd.Series):
+        """computes the aggregates of the whole column"""
+        s = self._in_range(s)
+        self.count = int(s.count())
+        if self._is_numeric(s):
+            self.sum = _scalar(s.sum()) or 0
+            self.min, self.max = _scalar(s.min()), _scalar(s.max())
+        self._stale = False
+
+    def add(self, s: pd.Series):
+        """adds the values of new rows"""
+        s = self._in_range(s)
+        if not s.count():
+            return
+        self.count += int(s.count())
+        if self._is_numeric(s):
+            self.sum += _scalar(s.sum())
+            lo, hi = _scalar(s.min()), _scalar(s.max())
+            self.min = lo if self.min is None else min(self.min, lo)
+            self.max = hi if self.max is None else max(self.max, hi)
+
+    def remove(self, s: pd.Series):
+        """removes the values of deleted rows (or the old values of updated rows)"""
+        s = self._in_range(s)
+        if not s.count():
+            return
+        self.count -= int(s.count())
+        if self._is_numeric(s):
+            self.sum -= _scalar(s.sum())
+            if self.min is not None and _scalar(s.min()) <= self.min:
+                self._stale = True
+            if self.max is not None and _scalar(s.max()) >= self.max:
+                self._stale = True
+
+    def values(self, names: typing.Iterable[str] = AGGREGATES) -> dict:
+        """returns the aggregates with the given names (see AGGREGATES)"""
+        if self._stale and {"min", "max"} & set(names):
+            self.reset(self.get_column())
+        out = {
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "count": self.count,
+        }
+        return {k: out[k] for k in names}
+
+
+class RowUpdate(BaseModel):
+    """changed fields of a row"""
+
+    value: dict = Field(description="new values of the changed fields")
+    original: dict = Field(description="values of the changed fields when last saved")
+    row: dict = Field(description="the whole row, with the new values")
+
+
+class ChangeSet(BaseModel):
+    """the rows inserted, updated and deleted since the last save, keyed by row id
+    (see `GridStore.ids`)"""
+
+    inserted: typing.Dict[int, dict] = Field(default_factory=dict)
+    updated: typing.Dict[int, RowUpdate] = Field(default_factory=dict)
+    deleted: typing.Dict[int, dict] = Field(
+        default_factory=dict, description="the rows as they were when last saved"
+    )
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.inserted or self.updated or self.deleted)
+
+
+class GridStore:
+    """columnar store of the rows of a grid. the columns are typed from the json schema
+    of the grid items, rows are positional (0 to len - 1).
+
+    rows are added, updated and deleted in place of rebuilding the whole table. the
+    list of dicts value is produced lazily by `records` and kept up-to-date with
+    appends and updates. every row also has a stable id (`ids`) that does not change
+    when rows are inserted, deleted or moved.
+
+    changes are tracked by row id from when the rows are set (or `mark_clean` is
+    called): inserted rows, the original values of updated fields and deleted rows.
+    `changes` returns them as a `ChangeSet` without comparing the whole table.
+
+    columns with "aui_aggregates" in their schema (e.g. ["sum", "mean"]) have running
+    aggregates (see `ColumnAggregate` and `aggregates`).
+
+    Example:
+        >>> store = GridStore({"a": {"type": "integer"}, "b": {"type": "string"}})
+        >>> store.append([{"a": 1, "b": "x"}, {"a": 2, "b": "y"}])
+        range(0, 2)
+        >>> store.update(1, {"b": "z"})
+        >>> store.delete([0])
+        >>> store.records()
+        [{'a': 2, 'b': 'z'}]
+        >>> store.mark_clean()
+        >>> store.update(0, {"b": "w"})
+        >>> store.changes().updated[1].value
+        {'b': 'w'}
+    """
+
+    def __init__(self, properties: dict, value=None):
+        """
+        Args:
+            properties (dict): json schema properties of the grid items
+            value (list or pd.DataFrame, optional): rows. Defaults to None.
+        """
+        self.properties = properties
+        self.columns = list(properties.keys())
+        self.dtypes = {k: dtype_from_schema(v) for k, v in properties.items()}
+        self.date_formats = {
+            k: v.get("strftime_format", DATE_FORMAT)
+            for k, v in properties.items()
+            if self.dtypes[k] == "datetime64[ns]"
+        }  # dates are stored as datetimes and returned as strings
+        self._df = self.frame([])
+        self._chunks = []  # appended frames, concatenated when `df` is next read
+        self._records = None  # cached list of dicts
+        self._ids = np.empty(0, dtype=np.int64)
+        self._next_id = 0
+        self._inserted = set()  # ids of rows added since the last save
+        self._original = {}  # {id: {field: value when last saved}} of updated rows
+        self._deleted = {}  # {id: row when last saved} of deleted rows
+        self._aggregates = {
+            k: ColumnAggregate(
+                lambda k=k: self.df[k], v.get("minimum"), v.get("maximum")
+            )
+            for k, v in properties.items()
+            if v.get("aui_aggregates")
+        }  # values outside minimum / maximum are left out (see `gridvalidation`)
+        self.version = 0  # incremented on every change
+        if value is not None:
+            self.set(value)
+
+    def __len__(self):
+        return len(self._df) + sum(len(c) for c in self._chunks)
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """the store as a dataframe with a RangeIndex. don't edit it in place"""
+        if self._chunks:
+            self._df = pd.concat([self._df] + self._chunks, ignore_index=True)
+            self._chunks = []
+        return self._df
+
+    def _as_object(self, s: pd.Series) -> pd.Series:
+        """returns a column as python objects, with dates as strings, for values that
+        can't be stored as the dtype of the column"""
+        date_format = self.date_formats.get(s.name)
+        if date_format is not None and pd.api.types.is_datetime64_dtype(s.dtype):
+            s = s.dt.strftime(date_format)
+        return s.astype(object).where(s.notna(), None)
+
+    def _astype(self, df: pd.DataFrame) -> pd.DataFrame:
+        for k, dtype in self.dtypes.items():
+            if df[k].dtype == dtype:
+                continue
+            try:
+                df[k] = to_dtype(df[k], dtype, self.date_formats.get(k))
+            except (TypeError, ValueError):
+                logging.info(f"column '{k}' can't be stored as {dtype}")
+                df[k] = self._as_object(df[k])
+        return df
+
+    def _match_dtypes(self, new: pd.DataFrame):
+        """columns of new rows that fell back to object (see `_astype`) are stored as
+        object in the store too, and the other way around"""
+        df = self._df
+        for k in self.columns:
+            if new[k].dtype == object and df[k].dtype != object:
+                self._df = df = self.df
+                df[k] = self._as_object(df[k])
+            elif df[k].dtype == object and new[k].dtype != object:
+                new[k] = self._as_object(new[k])
+
+    def frame(self, rows) -> pd.DataFrame:
+        """returns rows (list of dicts or dataframe) as a typed dataframe"""
+        if isinstance(rows, pd.DataFrame):
+            df = rows.reindex(columns=self.columns).reset_index(drop=True)
+        else:
+            df = pd.DataFrame.from_records(list(rows), columns=self.columns)
+        return self._astype(df)
+
+    def to_records(self, df: pd.DataFrame) -> typing.List[dict]:
+        """returns rows of the store as a list of dicts (dates as strings)"""
+        return frame_to_records(df, self.date_formats)
+
+    def _changed(self):
+        self.version += 1
+
+    def _new_ids(self, n: int) -> np.ndarray:
+        ids = np.arange(self._next_id, self._next_id + n, dtype=np.int64)
+        self._next_id += n
+        return ids
+
+    @property
+    def ids(self) -> np.ndarray:
+        """stable ids of the rows, in row order"""
+        return self._ids
+
+    def position(self, row_id: int) -> typing.Optional[int]:
+        """returns the current position of the row with the given id, or None if the
+        row has been deleted"""
+        found = np.flatnonzero(self._ids == row_id)
+        return int(found[0]) if len(found) else None
+
+    def set(self, value):
+        """replaces all rows
+
+        Args:
+            value (list or pd.DataFrame): rows
+        """
+        self._df = self.frame(value if value is not None else [])
+        self._chunks = []
+        self._records = None
+        self._ids = self._new_ids(len(self._df))
+        for k, aggregate in self._aggregates.items():
+            aggregate.reset(self._df[k])
+        self.mark_clean()
+        self._changed()
+
+    def append(self, rows) -> range:
+        """appends rows to the end of the store
+
+        Args:
+            rows (list or pd.DataFrame): rows
+
+        Returns:
+            range: positions of the new rows
+        """
+        start = len(self)
+        df = self.frame(rows)
+        self._match_dtypes(df)
+        self._chunks.append(df)
+        self._aggregate_rows(df, add=True)
+        new_ids = self._new_ids(len(df))
+        self._ids = np.concatenate([self._ids, new_ids])
+        self._inserted.update(new_ids.tolist())
+        if self._records is not None:
+            self._records.extend(self.to_records(df))
+        self._changed()
+        return range(start, start + len(df))
+
+    def insert(self, index: int, rows) -> range:
+        """inserts rows before position `index`
+
+        Returns:
+            range: positions of the new rows
+        """
+        if index >= len(self):
+            return self.append(rows)
+        new = self.frame(rows)
+        self._match_dtypes(new)
+        df = self.df
+        self._aggregate_rows(new, add=True)
+        self._df = pd.concat(
+            [df.iloc[:index], new, df.iloc[index:]], ignore_index=True
+        )
+        ids, new_ids = self._ids, self._new_ids(len(new))
+        self._ids = np.concatenate([ids[:index], new_ids, ids[index:]])
+        self._inserted.update(new_ids.tolist())
+        if self._records is not None:
+            self._records[index:index] = self.to_records(new)
+        self._changed()
+        return range(index, index + len(new))
+
+    def update(self, index: int, value: dict):
+        """updates the fields given in `value` of the row at position `index`"""
+        self.patch({index: value})
+
+    def patch(self, changes: typing.Dict[int, dict]):
+        """updates many rows at once
+
+        Args:
+            changes (typing.Dict[int, dict]): {position: {column: value}}
+        """
+        df = self.df
+        by_column = {}
+        for index, value in changes.items():
+            for k, v in value.items():
+                by_column.setdefault(k, ([], []))
+                by_column[k][0].append(index)
+                by_column[k][1].append(v)
+        for k, (indexes, values) in by_column.items():
+            col = df.columns.get_loc(k)
+            self._track_original(k, indexes)
+            if k in self._aggregates:
+                self._aggregates[k].remove(df[k].iloc[indexes])
+            try:
+                values = to_dtype(
+                    pd.Series(values, dtype=object),
+                    df[k].dtype,
+                    self.date_formats.get(k),
+                )
+                df.iloc[indexes, col] = values.array
+            except (TypeError, ValueError):
+                df[k] = self._as_object(df[k])
+                df.iloc[indexes, col] = pd.Series(values, dtype=object).values
+            if k in self._aggregates:
+                self._aggregates[k].add(df[k].iloc[indexes])
+        if self._records is not None:
+            indexes = list(changes.keys())
+            for index, record in zip(indexes, self.to_records(df.iloc[indexes])):
+                self._records[index] = record
+        self._untrack_reverted(list(changes.keys()))
+        self._changed()
+
+    def reorder(self, order: typing.Sequence[int]):
+        """reorders the rows. `order` gives the current position of each row in its
+        new position"""
+        self._df = self.df.iloc[list(order)].reset_index(drop=True)
+        self._ids = self._ids[list(order)]
+        if self._records is not None:
+            self._records = [self._records[i] for i in order]
+        self._changed()
+
+    def delete(self, indexes):
+        """deletes the rows at the given positions (positions, ranges of positions or
+        a boolean mask, see `keys_to_mask`)"""
+        keep = ~keys_to_mask(indexes, len(self))
+        self._track_deleted(np.flatnonzero(~keep))
+        self._aggregate_rows(self.df[~keep], add=False)
+        self._df = self.df[keep].reset_index(drop=True)
+        self._ids = self._ids[keep]
+        if self._records is not None:
+            self._records = list(itertools.compress(self._records, keep))
+        self._changed()
+
+    # aggregates
+    # ----------
+
+    def _aggregate_rows(self, df: pd.DataFrame, add: bool):
+        for k, aggregate in self._aggregates.items():
+            if add:
+                aggregate.add(df[k])
+            else:
+                aggregate.remove(df[k])
+
+    def aggregates(self) -> typing.Dict[str, dict]:
+        """returns the aggregates of the columns with "aui_aggregates" in their
+        schema, as {field: {aggregate: value}}"""
+        return {
+            k: aggregate.values(self.properties[k]["aui_aggregates"])
+            for k, aggregate in self._aggregates.items()
+        }
+
+    # change tracking
+    # ---------------
+
+    def _track_original(self, field: str, indexes: typing.List[int]):
+        """keeps the saved value of a field of rows about to be updated"""
+        date_format = self.date_formats.get(field)
+        old = column_to_list(self.df[field].iloc[indexes], date_format)
+        for index, value in zip(indexes, old):
+            row_id = int(self._ids[index])
+            if row_id not in self._inserted:
+                self._original.setdefault(row_id, {}).setdefault(field, value)
+
+    def _untrack_reverted(self, indexes: typing.List[int]):
+        """forgets the saved value of fields set back to it (e.g. by an undo)"""
+        indexes = [i for i in indexes if int(self._ids[i]) in self._original]
+        for index, record in zip(indexes, self.records(indexes)):
+            row_id = int(self._ids[index])
+            original = self._original[row_id]
+            for k in [k for k, v in original.items() if record[k] == v]:
+                del original[k]
+            if not original:
+                del self._original[row_id]
+
+    def _track_deleted(self, indexes: np.ndarray):
+        """keeps the saved values of rows about to be deleted"""
+        ids = self._ids[indexes].tolist()
+        saved = [i not in self._inserted for i in ids]
+        records = self.records(list(itertools.compress(indexes, saved)))
+        for row_id, record in zip(itertools.compress(ids, saved), records):
+            self._deleted[row_id] = {**record, **self._original.pop(row_id, {})}
+        self._inserted.difference_update(ids)
+
+    def _positions(self, ids: typing.Iterable[int]) -> typing.Dict[int, int]:
+        """{id: position} of the rows with the given ids (deleted rows are left out)"""
+        ids = list(ids)
+        mask = np.isin(self._ids, ids)
+        return dict(zip(self._ids[mask].tolist(), np.flatnonzero(mask).tolist()))
+
+    @property
+    def is_dirty(self) -> bool:
+        """True if rows have been inserted, updated or deleted since the last save"""
+        return bool(self._inserted or self._original or self._deleted)
+
+    def changes(self) -> ChangeSet:
+        """returns the rows inserted, updated (changed fields only) and deleted since
+        the last save. the cost depends on the number of changed rows, not the size
+        of the table."""
+        positions = self._positions(list(self._inserted) + list(self._original))
+        ids = list(positions.keys())
+        rows = dict(zip(ids, self.records([positions[i] for i in ids])))
+        inserted = {i: rows[i] for i in ids if i in self._inserted}
+        updated = {}
+        for row_id, original in self._original.items():
+            row = rows[row_id]
+            changed = {k: v for k, v in original.items() if row[k] != v}
+            if changed:
+                updated[row_id] = RowUpdate(
+                    value={k: row[k] for k in changed}, original=changed, row=row
+                )
+        return ChangeSet(
+            inserted=inserted, updated=updated, deleted=dict(self._deleted)
+        )
+
+    def mark_clean(self, changes: ChangeSet = None):
+        """marks changes as saved
+
+        Args:
+            changes (ChangeSet, optional): the changes that were saved. rows changed
+                again since `changes` was made stay dirty. Defaults to all changes.
+        """
+        if changes is None:
+            self._inserted, self._original, self._deleted = set(), {}, {}
+            return
+        for row_id in changes.deleted.keys():
+            self._deleted.pop(row_id, None)
+        saved = {**changes.inserted, **{k: v.row for k, v in changes.updated.items()}}
+        positions = self._positions(saved.keys())
+        ids = list(positions.keys())
+        for row_id, row in zip(ids, self.records([positions[i] for i in ids])):
+            self._inserted.discard(row_id)
+            original = {k: v for k, v in saved[row_id].items() if row[k] != v}
+            if original:  # changed again since it was saved
+                self._original[row_id] = original
+            else:
+                self._original.pop(row_id, None)
+
+    def from_arrow(self, table):
+        """replaces all rows with the rows of an arrow table. the columns are checked
+        against the schema and converted as whole columns, without building a dict
+        per row.
+
+        Args:
+            table (pa.Table): table with a column per field of the schema
+        """
+        _check_pyarrow()
+        validate_arrow_table(table, self.properties)
+        table = table.select(self.columns)
+        self.set(table.to_pandas(date_as_object=False))
+
+    def to_arrow(self):
+        """returns the rows as an arrow table. dates are stored as date32"""
+        _check_pyarrow()
+        table = pa.Table.from_pandas(self.df, preserve_index=False)
+        for k in self.date_formats.keys():
+            if pa.types.is_timestamp(table.schema.field(k).type):
+                i = table.column_names.index(k)
+                table = table.set_column(i, k, table.column(k).cast(pa.date32()))
+        return table
+
+    def read_parquet(self, path: pathlib.Path, memory_map: bool = True):
+        """replaces all rows with the rows of a Parquet file. only the columns in the
+        schema are read.
+
+        Args:
+            path (pathlib.Path): file path
+            memory_map (bool, optional): memory-map the file in place of reading it
+                into memory. Defaults to True.
+        """
+        _check_pyarrow()
+        names = pq.read_schema(path).names
+        columns = [k for k in self.columns if k in names]
+        self.from_arrow(pq.read_table(path, columns=columns, memory_map=memory_map))
+
+    def read_feather(self, path: pathlib.Path, memory_map: bool = True):
+        """replaces all rows with the rows of a Feather (Arrow IPC) file. with
+        `memory_map` the columns are read from the mapped file without a copy."""
+        _check_pyarrow()
+        with pa.memory_map(str(path)) as source:
+            names = pa.ipc.open_file(source).schema.names
+        columns = [k for k in self.columns if k in names]
+        self.from_arrow(
+            feather.read_table(path, columns=columns, memory_map=memory_map)
+        )
+
+    def write_parquet(self, path: pathlib.Path, **kwargs):
+        """writes the rows to a Parquet file (kwargs are passed to
+        `pyarrow.parquet.write_table`)"""
+        pq.write_table(self.to_arrow(), path, **kwargs)
+
+    def write_feather(self, path: pathlib.Path, **kwargs):
+        """writes the rows to a Feather (Arrow IPC) file (kwargs are passed to
+        `pyarrow.feather.write_feather`)"""
+        feather.write_feather(self.to_arrow(), path, **kwargs)
+
+    def restore(self, positions: typing.Sequence[int], rows: pd.DataFrame, ids):
+        """puts deleted rows back, at the positions and with the ids they had (e.g. to
+        undo `delete`). all rows are restored in one step.
+
+        Args:
+            positions (typing.Sequence[int]): positions of the rows after restoring
+                (as they were before they were deleted), in ascending order
+            rows (pd.DataFrame): the deleted rows
+            ids (np.ndarray): ids of the deleted rows
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        n_old, n_new = len(self), len(positions)
+        restored = np.zeros(n_old + n_new, dtype=bool)
+        restored[positions] = True
+        order = np.empty(n_old + n_new, dtype=np.int64)
+        order[~restored] = np.arange(n_old)
+        order[restored] = np.arange(n_old, n_old + n_new)
+        rows = self.frame(rows)
+        self._match_dtypes(rows)
+        records = self.to_records(rows)
+        combined = pd.concat([self.df, rows], ignore_index=True)
+        self._df = combined.iloc[order].reset_index(drop=True)
+        self._ids = np.concatenate([self._ids, np.asarray(ids, dtype=np.int64)])[order]
+        if self._records is not None:
+            combined_records = self._records + records
+            self._records = [combined_records[i] for i in order]
+        self._aggregate_rows(rows, add=True)
+        for row_id, record in zip(np.asarray(ids).tolist(), records):
+            saved = self._deleted.pop(row_id, None)
+            if saved is None:  # added since the last save
+                self._inserted.add(row_id)
+                continue
+            original = {k: v for k, v in saved.items() if record[k] != v}
+            if original:
+                self._original[row_id] = original
+        self._changed()
+
+    def take(self, indexes: typing.Iterable[int]) -> pd.DataFrame:
+        """returns the rows at the given positions. a view is returned for a range"""
+        if isinstance(indexes, range) and indexes.step == 1:
+            return self.df.iloc[indexes.start : indexes.stop]
+        if not isinstance(indexes, np.ndarray):
+            indexes = list(indexes)
+        return self.df.iloc[indexes]
+
+    def records(self, indexes: typing.Iterable[int] = None) -> typing.List[dict]:
+        """returns the rows as a list of dicts
+
+        Args:
+            indexes (typing.Iterable[int], optional): positions of the rows to
+                return. Defaults to all rows.
+        """
+        if indexes is not None:
+            return self.to_records(self.take(indexes))
+        if self._records is None:
+            self._records = self.to_records(self.df)
+        return list(self._records)
+
+
+# -
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
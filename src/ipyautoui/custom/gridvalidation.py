@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# ---
+# jupyter:
+#   jupytext:
+#     cell_metadata_filter: -all
+#     formats: py:light
+#     text_representation:
+#       extension: .py
+#       format_name: light
+#       format_version: '1.5'
+#       jupytext_version: 1.14.0
+#   kernelspec:
+#     display_name: Python 3 (ipykernel)
+#     language: python
+#     name: python3
+# ---
+
+# +
+"""validation of the rows of a grid against the json schema of the items. columns
+are checked as a whole with pandas / numpy (type, enum, minimum / maximum, length,
+pattern and required). columns that can't be checked that way (e.g. nested objects)
+are validated cell by cell with the pydantic item model, if there is one.
+"""
+# %run __init__.py
+# %load_ext lab_black
+
+import logging
+import typing
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, ValidationError
+
+VECTORIZED_TYPES = ("integer", "number", "boolean", "string")
+ERROR_COLUMNS = ["row", "column", "error"]
+
+
+# +
+def _to_mask(m) -> np.ndarray:
+    """boolean mask with missing values as False"""
+    if isinstance(m, pd.Series):
+        m = m.fillna(False) if m.dtype != bool else m
+        return m.to_numpy(dtype=bool)
+    return np.asarray(m, dtype=bool)
+
+
+def _is_vectorized(schema: dict) -> bool:
+    if any(k in schema for k in ("anyOf", "allOf", "oneOf", "$ref")):
+        return False
+    type_ = schema.get("type")
+    return type_ in VECTORIZED_TYPES or (type_ is None and "enum" in schema)
+
+
+def _is_str(s: pd.Series) -> np.ndarray:
+    if pd.api.types.infer_dtype(s, skipna=True) in ("string", "empty"):
+        return np.ones(len(s), dtype=bool)
+    return np.fromiter((isinstance(v, str) for v in s), dtype=bool, count=len(s))
+
+
+def _column_errors(
+    s: pd.Series, schema: dict
+) -> typing.List[typing.Tuple[np.ndarray, str]]:
+    """returns (mask of invalid rows, message) for each check the column fails.
+    missing values are not checked (see `required`)."""
+    notna = _to_mask(s.notna())
+    errors = []
+    numbers = None  # values as numbers, for minimum / maximum
+    type_ = schema.get("type")
+
+    if type_ == "integer":
+        if pd.api.types.is_integer_dtype(s.dtype):
+            numbers = s
+        else:
+            numbers = pd.to_numeric(s.astype(object), errors="coerce")
+            valid = _to_mask(numbers % 1 == 0)  # False for non-numbers (NaN)
+            errors.append((notna & ~valid, "value is not a valid integer"))
+    elif type_ == "number":
+        if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(
+            s.dtype
+        ):
+            numbers = s
+        else:
+            numbers = pd.to_numeric(s.astype(object), errors="coerce")
+            valid = _to_mask(numbers.notna())
+            errors.append((notna & ~valid, "value is not a valid float"))
+    elif type_ == "boolean":
+        if not pd.api.types.is_bool_dtype(s.dtype):
+            valid = s.astype(object).isin([True, False])
+            errors.append(
+                (notna & ~_to_mask(valid), "value could not be parsed to a boolean")
+            )
+    elif type_ == "string" and schema.get("format") == "date":
+        if not pd.api.types.is_datetime64_dtype(s.dtype):
+            dates = pd.to_datetime(s, errors="coerce")
+            errors.append((notna & _to_mask(dates.isna()), "invalid date format"))
+    elif type_ == "string" and not isinstance(s.dtype, pd.CategoricalDtype):
+        is_str = _is_str(s)
+        errors.append((notna & ~is_str, "str type expected"))
+        strings = s.where(is_str)
+        if "minLength" in schema or "maxLength" in schema:
+            lengths = strings.str.len()
+            if "minLength" in schema:
+                n = schema["minLength"]
+                errors.append(
+                    (
+                        _to_mask(lengths < n),
+                        f"ensure this value has at least {n} characters",
+                    )
+                )
+            if "maxLength" in schema:
+                n = schema["maxLength"]
+                errors.append(
+                    (
+                        _to_mask(lengths > n),
+                        f"ensure this value has at most {n} characters",
+                    )
+                )
+        if "pattern" in schema:
+            pattern = schema["pattern"]
+            matches = strings.str.contains(pattern, regex=True)
+            errors.append(
+                (
+                    is_str & notna & ~_to_mask(matches),
+                    f'string does not match regex "{pattern}"',
+                )
+            )
+
+    enum = schema.get("enum")
+    if enum:
+        categories = getattr(s.dtype, "categories", None)
+        if categories is None or not set(categories) <= set(enum):
+            valid = s.astype(object).isin(enum)
+            errors.append(
+                (
+                    notna & ~_to_mask(valid),
+                    f"value is not a valid enumeration member; permitted: {enum}",
+                )
+            )
+
+    if numbers is not None:
+        bounds = [
+            ("minimum", lambda x, v: x < v, "greater than or equal to"),
+            ("exclusiveMinimum", lambda x, v: x <= v, "greater than"),
+            ("maximum", lambda x, v: x > v, "less than or equal to"),
+            ("exclusiveMaximum", lambda x, v: x >= v, "less than"),
+        ]
+        for k, fails, text in bounds:
+            if k in schema:
+                mask = _to_mask(fails(numbers, schema[k]))
+                errors.append((mask, f"ensure this value is {text} {schema[k]}"))
+    return [(mask, msg) for mask, msg in errors if mask.any()]
+
+
+def _model_errors(
+    s: pd.Series, field: str, item_model: typing.Type[BaseModel]
+) -> typing.List[typing.Tuple[np.ndarray, str]]:
+    """validates each cell of a column with the pydantic field of the item model"""
+    model_field = item_model.__fields__[field]
+    by_message = {}
+    for i, v in enumerate(s.astype(object).where(s.notna(), None)):
+        _, error = model_field.validate(v, {}, loc=field, cls=item_model)
+        if error is not None:
+            msg = ValidationError([error], item_model).errors()[0]["msg"]
+            by_message.setdefault(msg, []).append(i)
+    return [
+        (np.isin(np.arange(len(s)), rows), msg) for msg, rows in by_message.items()
+    ]
+
+
+def validate_frame(
+    df: pd.DataFrame,
+    properties: dict,
+    required: typing.Iterable[str] = (),
+    item_model: typing.Type[BaseModel] = None,
+) -> pd.DataFrame:
+    """validates the rows of a dataframe column by column against a json schema
+
+    Args:
+        df (pd.DataFrame): rows, with a column per field
+        properties (dict): json schema properties of the items
+        required (typing.Iterable[str], optional): required fields. Defaults to ().
+        item_model (BaseModel, optional): pydantic model of the items. used to
+            validate the columns that can't be checked as a whole. Defaults to None.
+
+    Returns:
+        pd.DataFrame: one row per invalid cell, with columns "row" (position in df),
+            "column" (field) and "error" (message)
+
+    Example:
+        >>> df = pd.DataFrame({"a": [1, -2, None], "b": ["x", "y", "z"]})
+        >>> properties = {
+        ...     "a": {"type": "integer", "minimum": 0},
+        ...     "b": {"type": "string", "enum": ["x", "y"]},
+        ... }
+        >>> validate_frame(df, properties, required=["a"]).values.tolist()
+        [[2, 'a', 'field required'], [1, 'a', 'ensure this value is greater than or equal to 0'], [2, 'b', "value is not a valid enumeration member; permitted: ['x', 'y']"]]
+    """
+    required = set(required)
+    rows, columns, messages = [], [], []
+    for k, schema in properties.items():
+        if k not in df.columns:
+            continue
+        s = df[k]
+        if k in required:
+            errors = [(_to_mask(s.isna()), "field required")]
+        else:
+            errors = []
+        if _is_vectorized(schema):
+            errors += _column_errors(s, schema)
+        elif item_model is not None and k in item_model.__fields__:
+            errors += _model_errors(s, k, item_model)
+        else:
+            logging.info(f"column '{k}' not validated")
+        for mask, msg in errors:
+            invalid = np.flatnonzero(mask)
+            rows.append(invalid)
+            columns += [k] * len(invalid)
+            messages += [msg] * len(invalid)
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    return pd.DataFrame(
+        {"row": rows.astype(np.int64), "column": columns, "error": messages},
+        columns=ERROR_COLUMNS,
+    )
+
+
+# -
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
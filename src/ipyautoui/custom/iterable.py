@@ -105,7 +105,7 @@ TOGGLE_BUTTON_KWARGS = frozenmap(
 )
 # -
 from ipyautoui.autowidgets import create_widget_caller
-from ipyautoui.autoipywidget import AutoIpywidget
+from ipyautoui.autoipywidget import AutoIpywidget, FormPlan, get_form_plan
 
 
 # +
@@ -778,8 +778,7 @@ class AutoArray(Array):
             items = [AutoIpywidget(schema=self.schema) for v in value]
         elif "default" in self.schema.keys():
             items = [
-                AutoIpywidget(schema=self.schema["items"])
-                for v in self.schema["default"]
+                AutoIpywidget(schema=self.item_plan) for v in self.schema["default"]
             ]
             # [display(i) for i in items]
         else:
@@ -799,7 +798,8 @@ class AutoArray(Array):
 
     @schema.setter
     def schema(self, value):
-
+        if isinstance(value, FormPlan):
+            value = value.schema
         self._schema = value
         self.caller = create_widget_caller(value)
         if "title" in self.schema.keys():
@@ -814,7 +814,8 @@ class AutoArray(Array):
             self.maxlen = self.schema["maxItems"]
         else:
             self.maxlen = 100
-        self.fn_add = functools.partial(AutoIpywidget, schema=self.caller["items"])
+        self.item_plan = get_form_plan(self.caller["items"])
+        self.fn_add = functools.partial(AutoIpywidget, schema=self.item_plan)
 
 
 # -
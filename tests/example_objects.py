@@ -1,3 +1,5 @@
+import asyncio
+import datetime
 import ipywidgets as widgets
 import random
 import traitlets
@@ -74,4 +76,164 @@ def get_descriptions():
     """
     words = set([word.lower() for word in words.splitlines()])
     descriptions = list(words)[:10]
-    return descriptions
\ No newline at end of file
+    return descriptions
+
+
+class ExampleVersionedCols(BaseModel):
+    id: int = Field(0, aui_column_width=50)
+    string: str = Field("string", aui_column_width=100)
+    version: int = Field(0, aui_column_width=50)
+
+
+class ExampleVersionedSchema(BaseModel):
+    dataframe: typing.List[ExampleVersionedCols] = Field(
+        default_factory=lambda: [], format="dataframe"
+    )
+
+
+class ExampleTypedCols(BaseModel):
+    status: typing.Literal["open", "closed", "pending"] = "open"
+    count: typing.Optional[int] = Field(
+        None, ge=0, le=1000, aui_aggregates=["sum", "count"]
+    )
+    start: datetime.date = datetime.date(2022, 1, 1)
+    ratio: typing.Optional[float] = Field(
+        None, aui_aggregates=["sum", "mean", "min", "max", "count"]
+    )
+
+
+class ExampleTypedSchema(BaseModel):
+    dataframe: typing.List[ExampleTypedCols] = Field(
+        default_factory=lambda: [], format="dataframe"
+    )
+
+
+class ExampleValidatedCols(BaseModel):
+    name: str = Field(..., min_length=1, max_length=5)
+    level: int = Field(0, ge=0, le=10)
+    weight: float = Field(1.0, gt=0)
+    status: typing.Literal["open", "closed"] = "open"
+    tags: typing.List[str] = Field(default_factory=list)  # validated by the model
+
+
+class ExampleValidatedSchema(BaseModel):
+    __root__: typing.List[ExampleValidatedCols] = Field(
+        default_factory=lambda: [], format="dataframe"
+    )
+
+
+class InMemoryData:
+    """in-memory stand-in for a database table behind an EditGrid DataHandler. rows
+    are keyed by "id" and carry a "version" that is incremented on every write; a
+    write with an out of date version raises DataHandlerConflict."""
+
+    def __init__(self, rows: typing.List[dict]):
+        self.rows = {r["id"]: dict(r) for r in rows}
+        self.calls = []
+
+    def get_all(self):
+        self.calls.append("get_all")
+        return [dict(r) for r in self.rows.values()]
+
+    def _check(self, row):
+        from ipyautoui.custom.editgrid import DataHandlerConflict
+
+        stored = self.rows.get(row["id"])
+        if stored is None or stored["version"] != row["version"]:
+            raise DataHandlerConflict(f"id={row['id']}")
+
+    def post(self, row):
+        self.calls.append("post")
+        row = {**row, "id": max(self.rows, default=-1) + 1, "version": 0}
+        self.rows[row["id"]] = row
+        return dict(row)
+
+    def patch(self, row):
+        self.calls.append("patch")
+        self._check(row)
+        row = {**row, "version": row["version"] + 1}
+        self.rows[row["id"]] = row
+        return dict(row)
+
+    def delete(self, row):
+        self.calls.append("delete")
+        self._check(row)
+        del self.rows[row["id"]]
+
+    def commit(self, changes):
+        """writes a ChangeSet. updates only write the changed fields"""
+        self.calls.append("commit")
+        for row in changes.deleted.values():
+            self._check(row)
+        for update in changes.updated.values():
+            self._check({**update.row, **update.original})
+        for row in changes.deleted.values():
+            del self.rows[row["id"]]
+        for update in changes.updated.values():
+            stored = self.rows[update.row["id"]]
+            self.rows[stored["id"]] = {
+                **stored, **update.value, "version": stored["version"] + 1
+            }
+        for row in changes.inserted.values():
+            row = {**row, "id": max(self.rows, default=-1) + 1, "version": 0}
+            self.rows[row["id"]] = row
+
+    def datahandler(self, incremental=True, commit=False):
+        from ipyautoui.custom.editgrid import DataHandler
+
+        return DataHandler(
+            fn_get_all_data=self.get_all,
+            fn_post=self.post,
+            fn_patch=self.patch,
+            fn_delete=self.delete,
+            fn_copy=self.post,
+            fn_commit=self.commit if commit else None,
+            incremental=incremental,
+        )
+
+
+class AsyncInMemoryData(InMemoryData):
+    """async version of InMemoryData with injected latency. `fail` is a set of ids
+    whose writes raise an error. records the maximum number of concurrent requests."""
+
+    def __init__(self, rows: typing.List[dict], latency: float = 0.01):
+        super().__init__(rows)
+        self.latency = latency
+        self.fail = set()
+        self.running = 0
+        self.max_running = 0
+
+    async def _call(self, fn, row=None):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.latency)
+            if row is not None and row.get("id") in self.fail:
+                raise ValueError(f"failed id={row['id']}")
+            return fn(row) if row is not None else fn()
+        finally:
+            self.running -= 1
+
+    async def async_get_all(self):
+        return await self._call(self.get_all)
+
+    async def async_post(self, row):
+        return await self._call(self.post, row)
+
+    async def async_patch(self, row):
+        return await self._call(self.patch, row)
+
+    async def async_delete(self, row):
+        return await self._call(self.delete, row)
+
+    def datahandler(self, incremental=True):
+        from ipyautoui.custom.editgrid import DataHandler
+
+        return DataHandler(
+            fn_get_all_data=self.async_get_all,
+            fn_post=self.async_post,
+            fn_patch=self.async_patch,
+            fn_delete=self.async_delete,
+            fn_copy=self.async_post,
+            incremental=incremental,
+        )
@@ -0,0 +1,44 @@
+import json
+import pytest
+from pydantic import ValidationError
+
+from ipyautoui import AutoUi
+from ipyautoui.autoheadless import AutoHeadless
+from ipyautoui.test_schema import TestAutoLogic, TestArrays
+
+
+class TestAutoHeadless:
+    def test_defaults_match_autoui(self):
+        for model in [TestAutoLogic, TestArrays]:
+            assert AutoHeadless(model).value == AutoUi(model).value
+            assert AutoHeadless(model).json == AutoUi(model).json
+
+    def test_coercion_matches_autoui(self):
+        ui, form = AutoUi(TestAutoLogic), AutoHeadless(TestAutoLogic)
+        value = {
+            **ui.value,
+            "int_slider": 9.7,
+            "select_multiple_from_list": ["male"],
+            "float_range_slider": [1, 2],
+            "nested": {"string1": "a"},
+        }
+        ui.value = value
+        form.value = value
+        assert form.value == ui.value
+
+    def test_validate(self):
+        form = AutoHeadless(TestAutoLogic)
+        assert isinstance(form.validate(), TestAutoLogic)
+        form._value = {**form.value, "int_text": "not an int"}
+        with pytest.raises(ValidationError):
+            form.validate()
+
+    def test_file(self, tmp_path):
+        path = tmp_path / "test.json"
+        form = AutoHeadless(TestAutoLogic, path=path)
+        form.value = {**form.value, "text": "headless"}
+        form.file()
+        assert json.loads(path.read_text())["text"] == "headless"
+        form1 = AutoHeadless(TestAutoLogic, path=path)
+        form1.load_file()
+        assert form1.value["text"] == "headless"
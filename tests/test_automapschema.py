@@ -0,0 +1,112 @@
+from ipyautoui.test_schema import TestAutoLogic
+import ipyautoui.automapschema as aumap
+from ipyautoui.autoipywidget import _init_model_schema
+
+
+def map_widget_linear(di, widgets_map):
+    mapped = [k for k, v in widgets_map.items() if v.fn_filt(di)]
+    return mapped
+
+
+class TestWidgetsMapIndex:
+    def test_index_matches_linear_scan(self):
+        model, schema = _init_model_schema(TestAutoLogic)
+        widgets_map = aumap.widgets_map()
+        index = aumap.WidgetsMapIndex(widgets_map)
+        for v in schema["properties"].values():
+            assert index.find(v) == map_widget_linear(v, widgets_map)
+        assert len(index.index) < len(schema["properties"])
+
+    def test_index_custom_filter(self):
+        is_Special = lambda di: "special" in di.get("title", "").lower()
+        widgets_map = aumap.widgets_map(
+            {"Special": aumap.WidgetMapper(fn_filt=is_Special, widget=lambda x: x)}
+        )
+        index = aumap.get_widgets_map_index(widgets_map)
+        di = {"title": "Special Text", "type": "string"}
+        assert index.find(di) == map_widget_linear(di, widgets_map)
+        assert "Special" in index.find(di)
+        assert aumap.get_widgets_map_index(widgets_map) is index
+
+
+    def test_index_plain_dict(self):
+        widgets_map = dict(aumap.widgets_map())
+        caller = aumap.map_widget({"type": "string"}, widgets_map=widgets_map)
+        assert caller.autoui == aumap.map_widget({"type": "string"}).autoui
+        index = aumap.get_widgets_map_index(widgets_map)
+        assert aumap.get_widgets_map_index(dict(widgets_map)) is index
+        widgets_map.pop("Text")
+        assert aumap.get_widgets_map_index(widgets_map) is not index
+
+class TestWidgetsMapRegistry:
+    def test_widgets_map_memoized(self):
+        assert aumap.widgets_map() is aumap.widgets_map(None)
+        mapper = aumap.WidgetMapper(fn_filt=aumap.is_Text, widget=lambda x: x)
+        assert aumap.widgets_map({"Text": mapper}) is aumap.widgets_map(
+            {"Text": mapper.copy()}
+        )
+        assert aumap.widgets_map({"Text": mapper}) is not aumap.widgets_map()
+
+    def test_array_of_objects_builds_map_once(self, monkeypatch):
+        from ipyautoui.custom.iterable import AutoArray
+        from ipyautoui.test_schema import TestArrays
+
+        aumap.clear_widgets_map_cache()
+        calls = []
+        make_widgets_map = aumap.make_widgets_map
+
+        def counted(di_update=None):
+            calls.append(di_update)
+            return make_widgets_map(di_update)
+
+        monkeypatch.setattr(aumap, "make_widgets_map", counted)
+        model, schema = _init_model_schema(TestArrays)
+        sch = dict(schema["properties"]["array_objects"])
+        sch["default"] = [{}] * 20
+        AutoArray(sch)
+        assert len(calls) == 1
+
+    def test_register_widget_mapper(self, monkeypatch):
+        monkeypatch.setattr(aumap, "_REGISTERED_WIDGET_MAPPERS", {})
+        before = aumap.widgets_map()
+        mapper = aumap.WidgetMapper(fn_filt=aumap.is_Text, widget=lambda x: x)
+        aumap.register_widget_mapper("Text", mapper)
+        after = aumap.widgets_map()
+        assert after is not before
+        assert after["Text"] is mapper
+        aumap.clear_widgets_map_cache()
+
+
+class TestResolveSchemaRefs:
+    def test_input_not_edited(self):
+        import copy
+
+        schema = TestAutoLogic.schema()
+        schema_copy = copy.deepcopy(schema)
+        resolved = aumap.resolve_schema_refs(schema)
+        assert schema == schema_copy
+        assert resolved["properties"]["nested"]["type"] == "object"
+        assert (
+            resolved["properties"]["nested"]
+            is not resolved["properties"]["recursive_nest"]["properties"]["nested"]
+        )
+
+    def test_recursive_model(self):
+        import typing
+        from pydantic import BaseModel
+        from ipyautoui import AutoUi
+
+        class Node(BaseModel):
+            name: str = "node"
+            children: typing.List["Node"] = []
+
+        Node.update_forward_refs()
+        schema = aumap.resolve_schema_refs(Node.schema())
+        assert schema["type"] == "object"
+        items = schema["properties"]["children"]["items"]
+        assert items["title"] == "Node"
+        assert "definitions" in items
+        nested = aumap.resolve_schema_refs(items)
+        assert nested["properties"]["children"]["type"] == "array"
+        ui = AutoUi(Node)
+        assert ui.value == {"name": "node", "children": []}
@@ -30,3 +30,195 @@ class TestUi:
     # def test_display_file(self):
     #     fpths = list(pathlib.Path(DIR_FILETYPES).glob("*"))
     #     d0 = DisplayFile(fpths[0])
+
+
+class TestFormPlan:
+    def test_plan_reused(self, monkeypatch):
+        import ipyautoui.automapschema as aumap
+        from ipyautoui.autoipywidget import get_form_plan, clear_form_plan_cache
+        from ipyautoui.test_schema import TestAutoLogicSimple
+
+        clear_form_plan_cache()
+        ui = AutoUi(TestAutoLogicSimple)
+        calls = []
+        map_widget = aumap.map_widget
+
+        def counted(*args, **kwargs):
+            calls.append(args)
+            return map_widget(*args, **kwargs)
+
+        monkeypatch.setattr(aumap, "map_widget", counted)
+        ui1 = AutoUi(TestAutoLogicSimple)
+        assert calls == []
+        assert ui1.plan is ui.plan
+        assert ui1.autowidget.plan is ui.autowidget.plan
+        assert ui1.value == ui.value
+
+    def test_plan_from_plan(self):
+        from ipyautoui.autoipywidget import get_form_plan, FormPlan
+        from ipyautoui.test_schema import TestAutoLogicSimple
+
+        plan = get_form_plan(TestAutoLogicSimple)
+        plan1 = FormPlan.from_dict(plan.to_dict())
+        ui = AutoObject(plan1)
+        assert ui.value == AutoObject(TestAutoLogicSimple).value
+        assert AutoUi(plan1).model is TestAutoLogicSimple
+
+    def test_schema_edited_in_place(self):
+        schema = {
+            "type": "object",
+            "properties": {"a": {"type": "integer", "default": 1}},
+        }
+        assert AutoObject(schema).value == {"a": 1}
+        schema["properties"]["a"]["default"] = 5
+        schema["properties"]["b"] = {"type": "string", "default": "x"}
+        assert AutoObject(schema).value == {"a": 5, "b": "x"}
+
+    def test_plan_cache_on_disk(self, tmp_path, monkeypatch):
+        import json
+        import ipyautoui.autoipywidget as aui
+        from ipyautoui.test_schema import TestAutoLogicSimple
+
+        aui.clear_form_plan_cache()
+        aui.enable_plan_cache(tmp_path)
+        try:
+            plan = aui.get_form_plan(TestAutoLogicSimple)
+            assert len(list(tmp_path.glob("*.json"))) == 1
+
+            def fail(*args, **kwargs):
+                raise AssertionError("plan should be read from disk")
+
+            aui.clear_form_plan_cache()
+            monkeypatch.setattr(aui, "compile_form_plan", fail)
+            plan1 = aui.get_form_plan(TestAutoLogicSimple)
+            assert plan1 is not plan
+            assert json.dumps(plan1.schema) == json.dumps(plan.schema)
+            assert {k: v.autoui for k, v in plan1.pr.items()} == {
+                k: v.autoui for k, v in plan.pr.items()
+            }
+            assert AutoUi(TestAutoLogicSimple).value["string"] == "adsf"
+        finally:
+            aui.disable_plan_cache()
+            aui.clear_form_plan_cache()
+
+
+class TestLazy:
+    def test_lazy_value(self):
+        from ipyautoui.autoipywidget import LazyWidget
+        from ipyautoui.test_schema import TestAutoLogic
+
+        ui = AutoUi(TestAutoLogic, lazy=True)
+        lazy = ui.autowidget.di_widgets["nested"]
+        assert isinstance(lazy, LazyWidget)
+        assert not lazy.is_built
+        assert ui.value == AutoUi(TestAutoLogic).value
+
+        nested = {"string1": "a", "int_slider1": 3, "int_text1": 4}
+        ui.value = {**ui.value, "nested": nested}
+        assert not lazy.is_built
+        assert ui.value["nested"] == nested
+
+    def test_lazy_build_on_expand(self):
+        from ipyautoui.test_schema import TestAutoLogic
+
+        ui = AutoUi(TestAutoLogic, lazy=True)
+        ao = ui.autowidget
+        row = ao.rows[ao.default_order.index("nested")]
+        row.btn_display.value = True  # expand
+        lazy = ao.di_widgets["nested"]
+        assert lazy.is_built
+        assert lazy.widget.value == ui.value["nested"]
+        lazy.widget.di_widgets["string1"].value = "changed"
+        assert ui.value["nested"]["string1"] == "changed"
+
+
+class TestValueChange:
+    def test_value_change_path(self):
+        from ipyautoui.test_schema import TestAutoLogic
+
+        ui = AutoUi(TestAutoLogic)
+        changes = []
+        ui.observe(lambda change: changes.append(change["new"]), "value_change")
+        nested = ui.autowidget.di_widgets["recursive_nest"].di_widgets["nested"]
+        nested.di_widgets["string1"].value = "a"
+        assert changes == [
+            {"op": "replace", "path": "/recursive_nest/nested/string1", "value": "a"}
+        ]
+        assert ui.value["recursive_nest"]["nested"]["string1"] == "a"
+
+    def test_value_change_reads_changed_widget_only(self, monkeypatch):
+        from ipyautoui.test_schema import TestAutoLogic
+
+        ui = AutoUi(TestAutoLogic)
+        value = ui.value
+
+        def fail(self):
+            raise AssertionError("only the changed widget should be read")
+
+        monkeypatch.setattr(AutoObject, "di_widgets_value", property(fail))
+        ui.autowidget.di_widgets["int_text"].value = 7
+        assert ui.value == {**value, "int_text": 7}
+
+
+class TestDebounce:
+    def test_debounce_value(self, tmp_path):
+        import asyncio
+        from ipyautoui.test_schema import TestAutoLogicSimple
+
+        async def run():
+            ui = AutoUi(TestAutoLogicSimple, value_debounce_ms=20)
+            changes = []
+            ui.observe(lambda change: changes.append(change["new"]), "_value")
+            text = ui.autowidget.di_widgets["string"]
+            for s in ["a", "ab", "abc"]:
+                text.value = s
+            assert changes == []
+            assert ui.value["string"] == "abc"
+            await asyncio.sleep(0.1)
+            assert len(changes) == 1
+            assert changes[0]["string"] == "abc"
+
+            text.value = "abcd"
+            ui.file(path=tmp_path / "test.json")  # flushed on save
+            assert len(changes) == 2
+            assert "abcd" in (tmp_path / "test.json").read_text()
+
+        asyncio.run(run())
+
+
+class TestBulkValue:
+    def test_single_value_change(self):
+        from ipyautoui.test_schema import TestAutoLogic
+
+        ui = AutoObject(TestAutoLogic)
+        changes = []
+        ui.observe(lambda change: changes.append(change["new"]), "_value")
+        value = ui.value
+        new = {
+            **value,
+            "int_text": 7,
+            "text": "new",
+            "nested": {**value["nested"], "string1": "new"},
+        }
+        ui.value = new
+        assert len(changes) == 1
+        assert ui.value == new
+        assert ui.value_change == {"op": "replace", "path": "", "value": new}
+
+    def test_unchanged_widgets_not_set(self, monkeypatch):
+        from ipyautoui.test_schema import TestAutoLogic
+
+        ui = AutoObject(TestAutoLogic)
+        nested = ui.di_widgets["nested"]
+
+        def fail(value):
+            raise AssertionError("unchanged nested value should not be set")
+
+        monkeypatch.setattr(nested, "_set_widget_values", fail)
+        ui.value = {**ui.value, "int_text": 7}
+        assert ui.value["int_text"] == 7
+
+        changes = []
+        ui.observe(lambda change: changes.append(change["new"]), "_value")
+        ui.value = ui.value
+        assert changes == []
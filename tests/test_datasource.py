@@ -0,0 +1,129 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ipyautoui.custom.datasource import (
+    DataSource,
+    PandasDataSource,
+    SqliteDataSource,
+    PageCache,
+    Query,
+)
+from ipyautoui.custom.editgrid import GridWrapper, EditGrid
+from .test_editgrid import dataframe_schema
+
+N = 2000
+df = pd.DataFrame(
+    {
+        "string": [f"s{i % 7}" for i in range(N)],
+        "floater": np.arange(N, dtype=float)[::-1],
+    }
+)
+
+
+def get_sqlite_source():
+    con = sqlite3.connect(":memory:")
+    df.to_sql("rows", con, index=False)
+    return SqliteDataSource(con, "rows")
+
+
+class TestDataSource:
+    def test_pandas_matches_sqlite(self):
+        query = Query(
+            sort=[("floater", True)],
+            filters=[("string", "in", ["s1", "s2"]), ("floater", ">=", 100.0)],
+        )
+        pandas_source, sqlite_source = PandasDataSource(df), get_sqlite_source()
+        assert pandas_source.count(query) == sqlite_source.count(query)
+        a = pandas_source.fetch(10, 30, query).reset_index(drop=True)
+        b = sqlite_source.fetch(10, 30, query)
+        pd.testing.assert_frame_equal(a, b)
+        assert a["floater"].is_monotonic_increasing
+
+    def test_unsorted(self):
+        rows = get_sqlite_source().fetch(5, 8)
+        assert rows["floater"].tolist() == df["floater"].iloc[5:8].tolist()
+
+    def test_incomplete_source(self):
+        class CountOnly(DataSource):
+            def count(self, query=Query()):
+                return 0
+
+        with pytest.raises(TypeError):
+            CountOnly()
+
+
+class TestPageCache:
+    def test_lru(self):
+        cache = PageCache(PandasDataSource(df), page_size=100, max_pages=3)
+        for start in range(0, 500, 100):
+            cache.rows(start, start + 100)
+        assert list(cache.pages.keys()) == [2, 3, 4]
+        assert cache.n_fetches == 5
+        cache.rows(250, 350)
+        assert cache.n_fetches == 5
+
+    def test_prefetch(self):
+        cache = PageCache(PandasDataSource(df), page_size=100, max_pages=10)
+        cache.rows(100, 200, margin=100)
+        assert sorted(cache.pages.keys()) == [0, 1, 2]
+        n = cache.n_fetches
+        cache.rows(150, 250)
+        assert cache.n_fetches == n
+
+    def test_query_clears(self):
+        cache = PageCache(PandasDataSource(df), page_size=100)
+        cache.rows(0, 10)
+        cache.set_query(Query(filters=[("string", "=", "s0")]))
+        assert not cache.pages
+        assert cache.count() == (df["string"] == "s0").sum()
+
+
+class TestGridWrapperPaged:
+    def test_window(self):
+        grid = GridWrapper(
+            schema=dataframe_schema, datasource=get_sqlite_source(), window_size=50
+        )
+        assert len(grid._data["data"]) == 50
+        assert grid.n_rows == N
+        grid.load_window(120)
+        assert grid.window_start == 120
+        assert grid.value[0]["floater"] == df["floater"].iloc[120]
+        assert grid._data["data"][0]["key"] == 120
+        grid.load_window(N + 10)  # clipped to the last window
+        assert grid.window_start == N - 50
+
+    def test_sort_and_filter_pushed_down(self):
+        grid = GridWrapper(
+            schema=dataframe_schema, datasource=PandasDataSource(df), window_size=20
+        )
+        grid.sort_by("Floater")
+        assert grid.value[0]["floater"] == 0.0
+        grid.filter_by_column_name("String", ["s3"])
+        assert grid.n_rows == (df["string"] == "s3").sum()
+        assert {v["string"] for v in grid.value} == {"s3"}
+        assert grid.query.sort == [("floater", True)]
+
+    def test_transforms_pushed_down(self):
+        grid = GridWrapper(
+            schema=dataframe_schema, datasource=PandasDataSource(df), window_size=20
+        )
+        grid._transforms = [{"type": "sort", "columnIndex": 2, "desc": False}]
+        assert grid.query.sort == [("floater", True)]
+        assert grid.value[0]["floater"] == 0.0
+
+
+class TestEditGridPaged:
+    def test_pager(self):
+        editgrid = EditGrid(
+            schema=dataframe_schema, datasource=PandasDataSource(df), window_size=100
+        )
+        assert "of 2,000" in editgrid.pager.label.value
+        editgrid.pager.next.click()
+        assert editgrid.grid.window_start == 100
+        editgrid.pager.last.click()
+        assert editgrid.grid.window_start == N - 100
+        editgrid.pager.first.click()
+        assert editgrid.grid.window_start == 0
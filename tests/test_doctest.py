@@ -7,7 +7,9 @@ from ipyautoui import (
     automapschema,
     autowidgets,
     autoipywidget,
+    autoheadless,
 )
+from ipyautoui.custom import gridstore, datasource, gridvalidation, gridhistory
 
 
 class TestDocTests:
@@ -28,3 +30,33 @@ class TestDocTests:
             f"python -m doctest -v {autoipywidget.__file__}", shell=True
         )
         assert complete == 0
+
+    def test_autoheadless(self):
+        complete = subprocess.call(
+            f"python -m doctest -v {autoheadless.__file__}", shell=True
+        )
+        assert complete == 0
+
+    def test_gridstore(self):
+        complete = subprocess.call(
+            f"python -m doctest -v {gridstore.__file__}", shell=True
+        )
+        assert complete == 0
+
+    def test_datasource(self):
+        complete = subprocess.call(
+            f"python -m doctest -v {datasource.__file__}", shell=True
+        )
+        assert complete == 0
+
+    def test_gridvalidation(self):
+        complete = subprocess.call(
+            f"python -m doctest -v {gridvalidation.__file__}", shell=True
+        )
+        assert complete == 0
+
+    def test_gridhistory(self):
+        complete = subprocess.call(
+            f"python -m doctest -v {gridhistory.__file__}", shell=True
+        )
+        assert complete == 0
@@ -0,0 +1,900 @@
+import asyncio
+import datetime
+import json
+import time
+
+import numpy as np
+import pytest
+import pandas as pd
+
+from .example_objects import (
+    ExampleDataFrameSchema,
+    ExampleVersionedSchema,
+    ExampleTypedSchema,
+    InMemoryData,
+    AsyncInMemoryData,
+)
+from ipyautoui.custom.editgrid import (
+    GridWrapper,
+    EditGrid,
+    DataHandler,
+    DataHandlerConflict,
+)
+from ipyautoui.custom.gridstore import GridStore
+from ipyautoui.custom.gridhistory import Operation, OperationLog
+from ipyautoui.automapschema import attach_schema_refs
+
+
+dataframe_schema = attach_schema_refs(ExampleDataFrameSchema.schema())["properties"][
+    "dataframe"
+]
+versioned_schema = attach_schema_refs(ExampleVersionedSchema.schema())["properties"][
+    "dataframe"
+]
+typed_schema = attach_schema_refs(ExampleTypedSchema.schema())["properties"][
+    "dataframe"
+]
+value = [{"string": "a", "floater": 1.5}, {"string": "b", "floater": 2.5}]
+
+
+class TestGridStore:
+    def test_dtypes(self):
+        store = GridStore(
+            {"i": {"type": "integer"}, "f": {"type": "number"}, "s": {"type": "string"}}
+        )
+        store.set([{"i": 1, "f": 1.0, "s": "a"}, {"i": None, "f": None, "s": None}])
+        assert str(store.df["i"].dtype) == "Int64"
+        assert store.records()[1] == {"i": None, "f": None, "s": None}
+        assert type(store.records()[0]["i"]) is int
+
+    def test_append_insert_delete(self):
+        store = GridStore({"a": {"type": "integer"}})
+        assert store.append([{"a": 1}, {"a": 2}]) == range(0, 2)
+        assert store.insert(1, [{"a": 3}]) == range(1, 2)
+        store.delete([0])
+        store.update(0, {"a": 4})
+        assert store.records() == [{"a": 4}, {"a": 2}]
+        assert len(store) == 2
+
+
+class TestSchemaDtypes:
+    rows = [
+        {"status": "open", "count": 3, "start": "2022-01-03", "ratio": None},
+        {"status": "closed", "count": None, "start": "2022-02-01", "ratio": 0.5},
+    ]
+
+    def test_dtypes(self):
+        store = GridStore(typed_schema["items"]["properties"], self.rows)
+        dtypes = store.df.dtypes
+        assert isinstance(dtypes["status"], pd.CategoricalDtype)
+        assert list(dtypes["status"].categories) == ["open", "closed", "pending"]
+        assert str(dtypes["count"]) == "UInt16"
+        assert str(dtypes["start"]) == "datetime64[ns]"
+        assert str(dtypes["ratio"]) == "Float64"
+        assert store.records() == self.rows
+        assert type(store.records()[0]["count"]) is int
+
+    def test_not_in_enum(self):
+        store = GridStore(typed_schema["items"]["properties"], self.rows)
+        store.update(0, {"status": "other"})  # kept, not replaced with NaN
+        assert store.records()[0]["status"] == "other"
+        assert store.records()[1]["status"] == "closed"
+
+    def test_grid(self):
+        grid = GridWrapper(schema=typed_schema, value=self.rows)
+        assert grid.value == self.rows
+        assert grid.data["Start"].tolist() == ["2022-01-03", "2022-02-01"]
+        grid.set_row_value(1, {**self.rows[1], "start": "2023-05-06"})
+        assert grid.value[1]["start"] == "2023-05-06"
+        assert grid._data["data"][1]["Start"] == "2023-05-06"
+
+    def test_day_first_date(self):
+        properties = {
+            "d": {"type": "string", "format": "date", "strftime_format": "%d/%m/%Y"}
+        }
+        value = [{"d": "01/02/2022"}, {"d": "13/02/2022"}, {"d": "03/04/2022"}]
+        store = GridStore(properties, value)
+        assert str(store.df["d"].dtype) == "datetime64[ns]"
+        assert store.df["d"][0] == pd.Timestamp("2022-02-01")
+        assert store.records() == value
+        store.update(0, {"d": "05/06/2022"})
+        store.append([{"d": datetime.date(2022, 7, 8)}, {"d": "09/10/2022"}])
+        assert [r["d"] for r in store.records()] == [
+            "05/06/2022",
+            "13/02/2022",
+            "03/04/2022",
+            "08/07/2022",
+            "09/10/2022",
+        ]
+
+    def test_invalid_date(self):
+        store = GridStore(typed_schema["items"]["properties"], self.rows)
+        store.append([{**self.rows[0], "start": "notadate"}])
+        assert [r["start"] for r in store.records()] == [
+            "2022-01-03",
+            "2022-02-01",
+            "notadate",
+        ]
+        store = GridStore(typed_schema["items"]["properties"], self.rows)
+        store.update(0, {"start": "notadate"})
+        assert store.records()[1]["start"] == "2022-02-01"
+        grid = GridWrapper(schema=typed_schema, value=self.rows)
+        grid.insert_rows(0, [{**self.rows[0], "start": "notadate"}])
+        json.dumps(grid.value)
+        assert grid.value[1]["start"] == "2022-01-03"
+
+    def test_memory(self):
+        rows = self.rows * 5000
+        store = GridStore(typed_schema["items"]["properties"], rows)
+        inferred = pd.DataFrame.from_records(rows)
+        assert store.df.memory_usage(deep=True).sum() * 3 < (
+            inferred.memory_usage(deep=True).sum()
+        )
+
+
+class TestGridStoreChanges:
+    def _store(self, n=5):
+        return GridStore(
+            {"a": {"type": "integer"}, "b": {"type": "string"}},
+            [{"a": i, "b": str(i)} for i in range(n)],
+        )
+
+    def test_changes(self):
+        store = self._store()
+        assert not store.is_dirty
+        store.update(1, {"b": "x"})
+        store.update(2, {"b": "y"})
+        store.update(2, {"b": "2"})  # back to the saved value
+        store.append([{"a": 9, "b": "new"}])
+        store.insert(0, [{"a": 8, "b": "new"}])
+        store.delete([0])  # the inserted row
+        store.update(3, {"a": 30})
+        store.delete([3])  # an updated row: its saved value is returned
+        changes = store.changes()
+        assert changes.inserted == {5: {"a": 9, "b": "new"}}
+        assert list(changes.updated.keys()) == [1]
+        assert changes.updated[1].value == {"b": "x"}
+        assert changes.updated[1].original == {"b": "1"}
+        assert changes.updated[1].row == {"a": 1, "b": "x"}
+        assert changes.deleted == {3: {"a": 3, "b": "3"}}
+
+    def test_mark_clean_keeps_later_edits(self):
+        store = self._store()
+        store.update(1, {"b": "x"})
+        changes = store.changes()
+        store.update(1, {"b": "z"})  # edited while the changes are being saved
+        store.mark_clean(changes)
+        assert store.changes().updated[1].original == {"b": "x"}
+        store.mark_clean()
+        assert store.changes().is_empty
+
+    def test_large_table(self):
+        n = 1_000_000
+        store = GridStore(
+            {"a": {"type": "integer"}},
+            pd.DataFrame({"a": np.arange(n)}),
+        )
+        store.patch({i: {"a": -i - 1} for i in range(0, n, n // 10)})
+        changes = store.changes()
+        assert len(changes.updated) == 10
+        assert store._records is None  # the table was not converted to records
+
+
+class TestAggregates:
+    def _expected(self, value):
+        df = pd.DataFrame.from_records(value, columns=["count", "ratio"])
+        ratio = df["ratio"].dropna()
+        return {
+            "count": {"sum": int(df["count"].sum()), "count": int(df["count"].count())},
+            "ratio": {
+                "sum": ratio.sum(),
+                "mean": ratio.mean() if len(ratio) else None,
+                "min": ratio.min() if len(ratio) else None,
+                "max": ratio.max() if len(ratio) else None,
+                "count": len(ratio),
+            },
+        }
+
+    def _assert_matches(self, grid):
+        expected = self._expected(grid.value)
+        for field, values in expected.items():
+            for name, v in values.items():
+                got = grid.aggregates[field][name]
+                if v is None:
+                    assert got is None
+                else:
+                    assert np.isclose(got, v), (field, name, got, v)
+
+    def test_incremental(self):
+        rng = np.random.default_rng(0)
+
+        def row():
+            ratio = None if rng.random() < 0.2 else float(rng.normal())
+            return {
+                "status": "open",
+                "count": int(rng.integers(0, 100)),
+                "start": "2022-01-01",
+                "ratio": ratio,
+            }
+
+        grid = GridWrapper(schema=typed_schema, value=[row() for _ in range(50)])
+        self._assert_matches(grid)
+        for i in range(30):
+            op = i % 4
+            if op == 0:
+                grid.append_rows([row(), row()])
+            elif op == 1:
+                grid.insert_rows(3, [row()])
+            elif op == 2:
+                key = int(rng.integers(0, len(grid.store)))
+                grid.patch_rows({key: {"ratio": float(rng.normal()), "count": 7}})
+            else:
+                grid.delete_rows([0, int(rng.integers(1, len(grid.store)))])
+            self._assert_matches(grid)
+
+    def test_min_removed(self):
+        grid = GridWrapper(
+            schema=typed_schema,
+            value=[{**TestSchemaDtypes.rows[1], "ratio": r} for r in (3.0, 1.0, 2.0)],
+        )
+        assert grid.aggregates["ratio"]["min"] == 1.0
+        grid.delete_rows([1])
+        assert grid.aggregates["ratio"]["min"] == 2.0
+        assert grid.aggregates["ratio"]["mean"] == 2.5
+
+    def test_out_of_range(self):
+        grid = GridWrapper(schema=typed_schema, value=TestSchemaDtypes.rows)
+        grid.append_rows([{**TestSchemaDtypes.rows[0], "count": 5000}])
+        assert grid.aggregates["count"] == {"sum": 3, "count": 1}  # maximum: 1000
+        grid.patch_rows({2: {"count": 10}})
+        assert grid.aggregates["count"] == {"sum": 13, "count": 2}
+        grid.patch_rows({0: {"count": 5000}})
+        assert grid.aggregates["count"] == {"sum": 10, "count": 1}
+
+    def test_footer(self):
+        editgrid = EditGrid(schema=typed_schema, value=TestSchemaDtypes.rows)
+        assert editgrid.footer in editgrid.children
+        assert "<th>Ratio</th>" in editgrid.footer.value
+        editgrid.grid.append_rows(
+            [{**TestSchemaDtypes.rows[0], "count": c} for c in (1000, 231)]
+        )
+        assert "<td>1,234</td>" in editgrid.footer.value
+        assert not hasattr(EditGrid(schema=dataframe_schema), "footer")
+
+
+class TestGridWrapper:
+    def test_value(self):
+        grid = GridWrapper(schema=dataframe_schema, value=value)
+        assert grid.value == value
+        assert len(grid._data["data"]) == 2
+        grid.value = []
+        assert grid.value == []
+        assert grid._data["data"] == []
+
+    def test_value_trait(self):
+        grid = GridWrapper(schema=dataframe_schema, value=value)
+        assert grid._value == value
+        changes = []
+        grid.observe(lambda change: changes.append(change["new"]), "_value")
+        grid.patch_rows({0: {"floater": 3.5}})
+        grid.move_rows([1], -1)
+        grid.delete_rows([0])
+        assert changes[-1] == grid.value == [{"string": "a", "floater": 3.5}]
+        assert len(changes) == 3
+
+    def test_append_rows(self):
+        grid = GridWrapper(schema=dataframe_schema, value=value)
+        df = grid.store.df
+        keys = grid.append_rows([{"string": "c", "floater": 3.14159}])
+        assert keys == range(2, 3)
+        assert grid.store.df is not df  # appended rows are concatenated on read
+        assert grid.value[2] == {"string": "c", "floater": 3.14159}
+        records = grid._data["data"]
+        assert [r["key"] for r in records] == [0, 1, 2]
+        assert records[2]["Floater"] == 3.14  # sig figs applied to new row
+
+    def test_insert_delete_rows(self):
+        grid = GridWrapper(schema=dataframe_schema, value=value)
+        grid.insert_rows(1, [{"string": "c", "floater": 3.0}])
+        assert [v["string"] for v in grid.value] == ["a", "c", "b"]
+        grid.delete_rows([0, 2])
+        assert grid.value == [{"string": "c", "floater": 3.0}]
+        assert [r["key"] for r in grid._data["data"]] == [0]
+        assert grid.data["String"].tolist() == ["c"]
+
+    def test_set_row_value(self):
+        grid = GridWrapper(schema=dataframe_schema, value=value)
+        grid.set_row_value(1, {"string": "z", "floater": 9.0})
+        assert grid.value[1] == {"string": "z", "floater": 9.0}
+
+    def test_dataframe_value(self):
+        grid = GridWrapper(schema=dataframe_schema, value=pd.DataFrame(value))
+        assert grid.value == value
+
+
+class TestEditGrid:
+    def test_save_copy_delete(self):
+        editgrid = EditGrid(schema=dataframe_schema, value=value)
+        editgrid._add()
+        editgrid.baseform.value = {"string": "c", "floater": 3.0}
+        editgrid._save()
+        assert editgrid.value[2] == {"string": "c", "floater": 3.0}
+        editgrid.grid.selections = [{"r1": 0, "r2": 0, "c1": 0, "c2": 1}]
+        editgrid._copy()
+        assert editgrid.value[3] == value[0]
+        editgrid._delete()
+        assert editgrid.value[0] == value[1]
+        assert len(editgrid.value) == 3
+
+
+class TestEditGridBulk:
+    def _datahandler(self, rows, calls):
+        def delete_many(values):
+            calls.append("delete_many")
+            rows[:] = [r for r in rows if r not in values]
+
+        def post_many(values):
+            calls.append("post_many")
+            rows.extend(values)
+
+        def fail(*args):
+            raise AssertionError("per row call")
+
+        return DataHandler(
+            fn_get_all_data=lambda: list(rows),
+            fn_post=fail,
+            fn_patch=fail,
+            fn_delete=fail,
+            fn_copy=fail,
+            fn_delete_many=delete_many,
+            fn_post_many=post_many,
+        )
+
+    def test_datahandler_batch(self):
+        rows = [{"string": str(i), "floater": float(i)} for i in range(10)]
+        calls = []
+        editgrid = EditGrid(
+            schema=dataframe_schema, datahandler=self._datahandler(rows, calls)
+        )
+        editgrid.grid.selections = [{"r1": 2, "r2": 4, "c1": 0, "c2": 1}]
+        editgrid._copy()
+        assert len(editgrid.value) == 13
+        editgrid._delete()
+        assert calls == ["post_many", "delete_many"]
+        assert [v["string"] for v in editgrid.value] == list("0156789")
+
+    def test_delete_mask(self):
+        rows = [{"string": str(i), "floater": float(i)} for i in range(10)]
+        grid = GridWrapper(schema=dataframe_schema, value=rows)
+        grid.delete_rows([range(0, 3), range(8, 10)])
+        assert [v["string"] for v in grid.value] == list("34567")
+        grid.delete_rows(np.array([True, False, False, False, True]))
+        assert [r["String"] for r in grid._data["data"]] == list("456")
+        assert [r["key"] for r in grid._data["data"]] == [0, 1, 2]
+
+
+class TestGridWrapperBatched:
+    def _count_syncs(self, grid, monkeypatch):
+        calls = []
+        monkeypatch.setattr(grid, "send_state", lambda *args: calls.append(args))
+        monkeypatch.setattr(grid, "set_cell_value", lambda *args: calls.append(args))
+        return calls
+
+    def test_patch_rows(self, monkeypatch):
+        grid = GridWrapper(schema=dataframe_schema, value=value)
+        calls = self._count_syncs(grid, monkeypatch)
+        cells = []
+        monkeypatch.setattr(
+            grid, "_notify_cell_change", lambda *args: cells.append(args)
+        )
+        grid.patch_rows({0: {"floater": 9.87654}, 1: {"string": "z"}})
+        assert not any("_data" in args for args in calls)  # the table isn't synced
+        assert cells == [(0, "Floater", 9.88), (1, "String", "z")]
+        assert grid.value == [
+            {"string": "a", "floater": 9.87654},
+            {"string": "z", "floater": 2.5},
+        ]
+        assert grid._data["data"][0]["Floater"] == 9.88
+
+    def test_patch_large_table(self, monkeypatch):
+        n = 50_000
+        rows = pd.DataFrame({"string": [str(i) for i in range(n)], "floater": 1.0})
+        grid = GridWrapper(schema=dataframe_schema, value=rows)
+        calls = self._count_syncs(grid, monkeypatch)
+        sent = []
+        monkeypatch.setattr(grid.comm, "send", lambda data, **kwargs: sent.append(data))
+        grid.set_row_value(10, {"string": "x", "floater": 2.0})
+        assert not any("_data" in args for args in calls)
+        assert len(sent) == 2
+        assert len(json.dumps(sent)) < 1000  # not the whole table
+        assert grid._data["data"][10]["String"] == "x"
+        grid.patch_rows({i: {"floater": 3.0} for i in range(2000)})
+        assert calls[-1] == ("_data",)  # too many cells for a message each
+
+    def test_move_rows(self, monkeypatch):
+        rows = [{"string": s, "floater": 1.0} for s in "abcdef"]
+        grid = GridWrapper(schema=dataframe_schema, value=rows)
+        calls = self._count_syncs(grid, monkeypatch)
+        assert grid.move_rows([3, 4], -2) == [1, 2]
+        assert len(calls) == 1
+        assert "".join(v["string"] for v in grid.value) == "adebcf"
+        assert [r["String"] for r in grid._data["data"]] == list("adebcf")
+        assert [r["key"] for r in grid._data["data"]] == list(range(6))
+        assert grid.move_rows([0], 10) == [5]  # limited to the end of the grid
+        assert "".join(v["string"] for v in grid.value) == "debcfa"
+
+    def test_move_rows_up_down(self):
+        rows = [{"string": s, "floater": 1.0} for s in "abcd"]
+        grid = GridWrapper(schema=dataframe_schema, value=rows)
+        grid._move_rows_down([1, 2])
+        assert "".join(v["string"] for v in grid.value) == "adbc"
+        assert grid.selected_rows == [2, 3]
+        grid._move_row_up(1)
+        assert "".join(v["string"] for v in grid.value) == "dabc"
+
+
+class TestGridWrapperSelection:
+    def test_selection_ranges(self):
+        rows = [{"string": str(i), "floater": float(i)} for i in range(100)]
+        grid = GridWrapper(schema=dataframe_schema, value=rows)
+        grid.selections = [
+            {"r1": 10, "r2": 19, "c1": 0, "c2": 1},
+            {"r1": 15, "r2": 30, "c1": 0, "c2": 1},
+            {"r1": 50, "r2": 50, "c1": 0, "c2": 1},
+        ]
+        assert grid.selection_ranges == [range(10, 31), range(50, 51)]
+        assert grid.n_selected_rows == 22
+        assert grid.selected_keys == list(range(10, 31)) + [50]
+
+    def test_selected_data_is_view(self):
+        rows = [{"string": str(i), "floater": float(i)} for i in range(100)]
+        grid = GridWrapper(schema=dataframe_schema, value=rows)
+        grid.selections = [{"r1": 10, "r2": 19, "c1": 0, "c2": 1}]
+        df = grid.get_selected_data
+        assert len(df) == 10
+        selected, store = df["floater"].array, grid.store.df["floater"].array
+        assert np.shares_memory(selected._data, store._data)  # Float64 values
+
+    def test_selection_through_transforms(self):
+        rows = [{"string": str(i), "floater": float(i)} for i in range(10)]
+        grid = GridWrapper(schema=dataframe_schema, value=rows)
+        grid._visible_rows = [9, 8, 7, 6, 5, 4, 3, 2, 1, 0]  # sorted descending
+        grid.selections = [{"r1": 0, "r2": 2, "c1": 0, "c2": 1}]
+        assert grid.selected_key_ranges == [range(7, 10)]
+        assert [v["string"] for v in grid.selected_values] == ["7", "8", "9"]
+        grid._visible_rows = [1, 3, 5]  # filtered
+        assert grid.selected_keys == [1, 3, 5]
+
+
+class TestEditGridIncremental:
+    def _editgrid(self, incremental=True):
+        data = InMemoryData(
+            [{"id": i, "string": str(i), "version": 0} for i in range(3)]
+        )
+        editgrid = EditGrid(
+            schema=versioned_schema, datahandler=data.datahandler(incremental)
+        )
+        return data, editgrid
+
+    def _select(self, editgrid, key):
+        editgrid.grid.selections = [{"r1": key, "r2": key, "c1": 0, "c2": 2}]
+
+    def test_incremental_writes(self):
+        data, editgrid = self._editgrid()
+        editgrid._add()
+        editgrid.baseform.value = {"id": 0, "string": "new", "version": 0}
+        editgrid._save()
+        assert editgrid.value[3] == {"id": 3, "string": "new", "version": 0}
+        self._select(editgrid, 1)
+        editgrid._edit()
+        editgrid.baseform.value = {**editgrid.baseform.value, "string": "edited"}
+        editgrid._save()
+        assert editgrid.value[1] == {"id": 1, "string": "edited", "version": 1}
+        editgrid._copy()
+        editgrid._delete()
+        assert data.calls == ["get_all", "post", "patch", "post", "delete"]
+        assert editgrid.value == data.get_all()
+
+    def test_not_incremental_reloads(self):
+        data, editgrid = self._editgrid(incremental=False)
+        self._select(editgrid, 0)
+        editgrid._delete()
+        assert data.calls == ["get_all", "delete", "get_all"]
+        assert len(editgrid.value) == 2
+
+    def test_conflict(self):
+        data, editgrid = self._editgrid()
+        data.rows[1]["version"] = 5  # changed elsewhere
+        self._select(editgrid, 1)
+        editgrid._edit()
+        editgrid.baseform.value = {**editgrid.baseform.value, "string": "edited"}
+        editgrid._save()
+        assert isinstance(editgrid._conflict, DataHandlerConflict)
+        assert editgrid.value[1]["version"] == 5  # reloaded
+        assert data.rows[1]["string"] == "1"
+
+    def test_reload_interval(self):
+        async def run():
+            data, editgrid = self._editgrid()
+            editgrid = EditGrid(
+                schema=versioned_schema,
+                datahandler=data.datahandler(),
+                reload_interval_ms=10,
+            )
+            data.rows[0]["string"] = "changed"
+            await asyncio.sleep(0.05)
+            editgrid.close()
+            return editgrid
+
+        editgrid = asyncio.run(run())
+        assert editgrid.value[0]["string"] == "changed"
+        assert editgrid._reload_handle is None
+
+
+class TestEditGridCommit:
+    def _editgrid(self):
+        data = InMemoryData(
+            [{"id": i, "string": str(i), "version": 0} for i in range(3)]
+        )
+        editgrid = EditGrid(
+            schema=versioned_schema,
+            datahandler=data.datahandler(incremental=False, commit=True),
+        )
+        return data, editgrid
+
+    def test_commit(self):
+        data, editgrid = self._editgrid()
+        assert editgrid.button_bar.commit in editgrid.button_bar.children
+        editgrid._add()
+        editgrid.baseform.value = {"id": 0, "string": "new", "version": 0}
+        editgrid._save()
+        editgrid.grid.selections = [{"r1": 1, "r2": 1, "c1": 0, "c2": 2}]
+        editgrid._edit()
+        editgrid.baseform.value = {**editgrid.baseform.value, "string": "edited"}
+        editgrid._save()
+        editgrid.grid.selections = [{"r1": 0, "r2": 0, "c1": 0, "c2": 2}]
+        editgrid._delete()
+        assert data.calls == ["get_all"]  # nothing written yet
+        changes = editgrid.grid.changes()
+        assert changes.updated[1].value == {"string": "edited"}
+        editgrid.button_bar.commit.click()
+        assert data.calls == ["get_all", "commit", "get_all"]
+        assert [r["string"] for r in data.get_all()] == ["edited", "2", "new"]
+        assert not editgrid.grid.is_dirty
+        editgrid.commit()
+        assert data.calls.count("commit") == 1
+
+    def test_each_edit_written(self):
+        data = InMemoryData([{"id": 0, "string": "0", "version": 0}])
+        editgrid = EditGrid(schema=versioned_schema, datahandler=data.datahandler())
+        assert editgrid.button_bar.commit not in editgrid.button_bar.children
+        editgrid.grid.selections = [{"r1": 0, "r2": 0, "c1": 0, "c2": 2}]
+        editgrid._copy()
+        assert not editgrid.grid.is_dirty
+
+
+class TestGridWrapperUndo:
+    def _strings(self, grid):
+        return "".join(v["string"] for v in grid.value)
+
+    def test_undo_redo(self):
+        rows = [{"string": s, "floater": 1.0} for s in "abcd"]
+        grid = GridWrapper(schema=dataframe_schema, value=rows)
+        grid.append_rows([{"string": "e", "floater": 2.0}])
+        grid.patch_rows({0: {"string": "z"}})
+        grid.move_rows([3], -2)
+        grid.delete_rows([1, 2])
+        assert self._strings(grid) == "zce"
+        for expected in ["zdbce", "zbcde", "abcde", "abcd"]:
+            assert grid.undo()
+            assert self._strings(grid) == expected
+        assert not grid.undo()
+        for expected in ["abcde", "zbcde", "zdbce", "zce"]:
+            assert grid.redo()
+            assert self._strings(grid) == expected
+        assert not grid.redo()
+        grid.undo()
+        grid.insert_rows(0, [{"string": "y", "floater": 3.0}])
+        assert not grid.history.can_redo  # a new operation clears the redo stack
+
+    def test_undo_to_saved(self):
+        rows = [{"string": s, "floater": 1.0} for s in "abc"]
+        grid = GridWrapper(schema=dataframe_schema, value=rows)
+        grid.patch_rows({1: {"floater": 5.0}})
+        grid.delete_rows([0])
+        grid.append_rows([{"string": "d", "floater": 2.0}])
+        assert grid.is_dirty
+        while grid.undo():
+            pass
+        assert grid.value == rows
+        assert grid.changes().is_empty
+        assert not grid.is_dirty
+
+    def test_large_delete(self, monkeypatch):
+        n = 10_000
+        rows = pd.DataFrame({"string": [str(i) for i in range(n)], "floater": 1.0})
+        grid = GridWrapper(schema=dataframe_schema, value=rows)
+        grid.delete_rows(np.arange(0, n, 2))
+        assert len(grid.value) == n // 2
+        calls = []
+        monkeypatch.setattr(grid, "send_state", lambda *args: calls.append(args))
+        grid.undo()
+        assert len(calls) == 1
+        assert [v["string"] for v in grid.value] == [str(i) for i in range(n)]
+        assert grid.redo()
+        assert len(grid.value) == n // 2
+        assert grid.history.undo_stack[-1].size == n // 2 * 2  # the removed cells
+
+    def test_move_compact(self):
+        rows = [{"string": s, "floater": 1.0} for s in "abcdef"]
+        grid = GridWrapper(schema=dataframe_schema, value=rows)
+        grid.move_rows([1, 4], 3)
+        assert self._strings(grid) == "acdfbe"
+        assert grid.history.undo_stack[-1].size == 2  # the moved keys only
+        grid._swap_rows(0, 5)
+        assert self._strings(grid) == "ecdfba"
+        grid.undo()
+        grid.undo()
+        assert self._strings(grid) == "abcdef"
+        grid.redo()
+        assert self._strings(grid) == "acdfbe"
+        assert grid.history.n_cells == sum(
+            op.size for op in grid.history.undo_stack + grid.history.redo_stack
+        )
+
+    def test_random_roundtrip(self):
+        rng = np.random.default_rng(0)
+        rows = [{"string": str(i), "floater": float(i)} for i in range(20)]
+        grid = GridWrapper(schema=dataframe_schema, value=rows)
+        values = [grid.value]
+        for i in range(30):
+            n = len(grid.store)
+            op = rng.integers(5)
+            if op == 0:
+                grid.append_rows([{"string": f"a{i}", "floater": 0.5}])
+            elif op == 1:
+                grid.insert_rows(int(rng.integers(n)), [{"string": f"i{i}", "floater": 0.5}])
+            elif op == 2:
+                grid.patch_rows({int(rng.integers(n)): {"floater": float(i)}})
+            elif op == 3:
+                grid.delete_rows(rng.choice(n, 3, replace=False))
+            else:
+                keys = rng.choice(n, 3, replace=False)
+                grid.move_rows(keys, int(rng.integers(-5, 5)))
+            values.append(grid.value)
+        for expected in values[-2::-1]:
+            assert grid.undo()
+            assert grid.value == expected
+        for expected in values[1:]:
+            assert grid.redo()
+            assert grid.value == expected
+
+    def test_bounded(self):
+        rows = [{"string": s, "floater": 1.0} for s in "abc"]
+        grid = GridWrapper(schema=dataframe_schema, value=rows, history_depth=2)
+        for i in range(4):
+            grid.patch_rows({0: {"floater": float(i)}})
+        assert len(grid.history.undo_stack) == 2
+        grid = GridWrapper(
+            schema=dataframe_schema, value=rows, history_max_cells=4
+        )
+        grid.delete_rows([0, 1, 2])  # 6 cells
+        assert not grid.history.can_undo
+        grid = GridWrapper(schema=dataframe_schema, value=rows, history_depth=0)
+        grid.delete_rows([0])
+        assert not grid.undo()
+        log = OperationLog(max_cells=4)
+        log.record(Operation("a", (), 1))
+        log.record(Operation("b", (), 1))
+        log.undo(lambda op: log.record(Operation("c", (), 5)))  # a large redo
+        assert log.n_cells <= 4
+
+
+class TestEditGridUndo:
+    def test_buttons(self):
+        editgrid = EditGrid(schema=dataframe_schema, value=value)
+        assert editgrid.button_bar.undo in editgrid.button_bar.children
+        editgrid.grid.selections = [{"r1": 0, "r2": 0, "c1": 0, "c2": 1}]
+        editgrid._delete()
+        assert editgrid.value == value[1:]
+        editgrid.button_bar.undo.click()
+        assert editgrid.value == value
+        editgrid.button_bar.redo.click()
+        assert editgrid.value == value[1:]
+        editgrid.redo()
+        assert "Nothing to redo" in editgrid.button_bar.message.value
+
+    def test_each_edit_written(self):
+        data = InMemoryData([{"id": 0, "string": "0", "version": 0}])
+        editgrid = EditGrid(schema=versioned_schema, datahandler=data.datahandler())
+        assert editgrid.button_bar.undo not in editgrid.button_bar.children
+        assert editgrid.grid.history.max_depth == 0
+
+
+class TestEditGridAsync:
+    def _editgrid(self, n=3, **kwargs):
+        data = AsyncInMemoryData(
+            [{"id": i, "string": str(i), "version": 0} for i in range(n)]
+        )
+        editgrid = EditGrid(
+            schema=versioned_schema, datahandler=data.datahandler(), **kwargs
+        )
+        return data, editgrid
+
+    def test_optimistic_patch(self):
+        async def run():
+            data, editgrid = self._editgrid()
+            await editgrid.wait()  # initial load
+            editgrid.grid.selections = [{"r1": 1, "r2": 1, "c1": 0, "c2": 2}]
+            editgrid._edit()
+            editgrid.baseform.value = {**editgrid.baseform.value, "string": "x"}
+            editgrid._save()
+            assert editgrid.value[1]["string"] == "x"  # shown before saved
+            assert editgrid.grid.get_row_state(1) == "pending"
+            assert editgrid.grid._data["data"][1]["state"] == "pending"
+            assert data.rows[1]["string"] == "1"
+            await editgrid.wait()
+            assert editgrid.grid.get_row_state(1) is None
+            assert editgrid.value[1] == {"id": 1, "string": "x", "version": 1}
+            assert data.rows[1]["string"] == "x"
+
+        asyncio.run(run())
+
+    def test_failed_requests_revert(self):
+        async def run():
+            data, editgrid = self._editgrid()
+            await editgrid.wait()
+            data.fail = {0, 2}
+            editgrid.grid.selections = [{"r1": 0, "r2": 0, "c1": 0, "c2": 2}]
+            editgrid._edit()
+            editgrid.baseform.value = {**editgrid.baseform.value, "string": "x"}
+            editgrid._save()
+            editgrid.grid.selections = [{"r1": 2, "r2": 2, "c1": 0, "c2": 2}]
+            editgrid._delete()
+            assert len(editgrid.value) == 2
+            await editgrid.wait()
+            assert [v["string"] for v in editgrid.value] == ["0", "1", "2"]
+            assert editgrid.grid.get_row_state(0) == "failed"
+            assert editgrid.grid.get_row_state(2) == "failed"
+            assert isinstance(editgrid._error, ValueError)
+
+        asyncio.run(run())
+
+    def test_concurrency_limit(self):
+        async def run():
+            data, editgrid = self._editgrid(n=10, max_concurrent_requests=2)
+            await editgrid.wait()
+            editgrid.grid.selections = [{"r1": 0, "r2": 9, "c1": 0, "c2": 2}]
+            editgrid._copy()  # one fn_copy per row
+            assert len(editgrid.value) == 20
+            assert editgrid.grid.get_row_state(15) == "pending"
+            await editgrid.wait()
+            assert data.max_running == 2
+            assert len(data.rows) == 20
+            assert [v["id"] for v in editgrid.value] == list(range(20))
+            assert editgrid.grid.row_states == {}
+
+        asyncio.run(run())
+
+    def test_no_event_loop(self):
+        data, editgrid = self._editgrid()
+        assert len(editgrid.value) == 3
+        editgrid.grid.selections = [{"r1": 0, "r2": 0, "c1": 0, "c2": 2}]
+        editgrid._delete()
+        assert [v["id"] for v in editgrid.value] == [1, 2]
+
+
+class TestGridArrow:
+    rows = TestSchemaDtypes.rows
+
+    def test_roundtrip_parquet(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        grid = EditGrid(schema=typed_schema, value=self.rows)
+        grid.to_parquet(tmp_path / "rows.parquet")
+        grid.to_feather(tmp_path / "rows.feather")
+        for load in (grid.from_parquet, grid.from_feather):
+            grid.value = []
+            load(tmp_path / ("rows." + load.__name__.split("_")[1]))
+            assert grid.value == self.rows
+            assert grid.grid._data["data"][0]["Start"] == "2022-01-03"
+
+    def test_validate(self):
+        pa = pytest.importorskip("pyarrow")
+        grid = GridWrapper(schema=typed_schema)
+        table = pa.table(
+            {
+                "status": ["open", "shut"],
+                "count": [1.5, 2.0],
+                "start": pa.array([19000, 19001], pa.date32()),
+                "extra": [1, 2],
+            }
+        )
+        with pytest.raises(ValueError) as e:
+            grid.from_arrow(table)
+        assert "['shut'] not in" in str(e.value)
+        assert "count: type double" in str(e.value)
+        assert "ratio: missing" in str(e.value)
+
+    def test_large_table(self):
+        pa = pytest.importorskip("pyarrow")
+        n = 1_000_000
+        table = pa.table(
+            {
+                "status": pa.array(["open", "closed"] * (n // 2)).dictionary_encode(),
+                "count": pa.array(np.arange(n) % 1000),
+                "start": pa.array((np.arange(n) % 3000).astype(np.int32), pa.date32()),
+                "ratio": pa.array(np.linspace(0, 1, n)),
+                "extra": pa.array(np.arange(n)),  # ignored
+            }
+        )
+        store = GridStore(typed_schema["items"]["properties"])
+        store.from_arrow(table)
+        assert len(store) == n
+        assert store._records is None  # no dict per row
+        assert str(store.df["count"].dtype) == "UInt16"
+        assert store.to_arrow().num_rows == n
+
+
+class TestEditGridStream:
+    def _editgrid(self):
+        editgrid = EditGrid(schema=dataframe_schema)
+        appends = []
+        append_rows = editgrid.grid.append_rows
+
+        def counted(rows):
+            appends.append(len(rows))
+            return append_rows(rows)
+
+        editgrid.grid.append_rows = counted
+        return editgrid, appends
+
+    def test_sync(self):
+        editgrid, appends = self._editgrid()
+
+        def rows():
+            for i in range(200):
+                time.sleep(0.0005)
+                yield {"string": str(i), "floater": float(i)}
+
+        assert editgrid.stream(rows(), max_rate_hz=100, max_rows=50) is None
+        assert len(appends) > 1
+        assert len(editgrid.value) == 50
+        assert editgrid.value[0]["string"] == "150"
+        assert len(editgrid.grid._data["data"]) == 50
+
+    def test_async_batched(self):
+        editgrid, appends = self._editgrid()
+
+        async def rows():
+            for i in range(50):
+                await asyncio.sleep(0.001)
+                yield {"string": str(i), "floater": float(i)}
+
+        async def run():
+            await editgrid.stream(rows(), max_rate_hz=20)
+
+        asyncio.run(run())
+        assert len(editgrid.value) == 50
+        assert sum(appends) == 50
+        assert len(appends) < 25  # rows are appended in batches
+
+    def test_cancel(self):
+        editgrid, appends = self._editgrid()
+
+        def rows():  # a plain generator, read in a thread
+            for i in range(1000):
+                time.sleep(0.002)
+                yield {"string": str(i), "floater": float(i)}
+
+        async def run():
+            task = editgrid.stream(rows(), max_rate_hz=50)
+            await asyncio.sleep(0.1)
+            editgrid.stop_stream()
+            await asyncio.gather(task, return_exceptions=True)
+            n = len(editgrid.value)
+            await asyncio.sleep(0.05)
+            return n
+
+        n = asyncio.run(run())
+        assert 0 < n < 1000
+        assert len(editgrid.value) == n  # no rows added after stopping
@@ -0,0 +1,105 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from .example_objects import ExampleValidatedCols, ExampleValidatedSchema
+from ipydatagrid import TextRenderer
+
+from ipyautoui.custom.editgrid import GridWrapper
+from ipyautoui.custom.gridvalidation import validate_frame
+
+schema = ExampleValidatedCols.schema()
+properties, required = schema["properties"], schema["required"]
+valid = {"name": "a", "level": 1, "weight": 0.5, "status": "open", "tags": ["x"]}
+invalid = [
+    {**valid, "name": ""},
+    {**valid, "name": "abcdef"},
+    {**valid, "level": 11},
+    {**valid, "weight": 0},
+    {**valid, "weight": "heavy"},
+    {**valid, "status": "pending"},
+    {**valid, "tags": "x"},
+    {**valid, "name": None},
+]
+
+
+def pydantic_errors(rows):
+    """{(row, field)} of the errors found validating each row with the model"""
+    cells = set()
+    for i, row in enumerate(rows):
+        try:
+            ExampleValidatedCols(**row)
+        except Exception as e:
+            cells |= {(i, err["loc"][0]) for err in e.errors()}
+    return cells
+
+
+class TestValidateFrame:
+    def test_matches_pydantic(self):
+        rows = [valid] + invalid
+        df = pd.DataFrame.from_records(rows)
+        errors = validate_frame(
+            df, properties, required, item_model=ExampleValidatedCols
+        )
+        assert set(zip(errors["row"], errors["column"])) == pydantic_errors(rows)
+
+    def test_integer(self):
+        # pydantic v1 truncates 1.5 to 1. the json schema type is integer
+        df = pd.DataFrame.from_records([valid, {**valid, "level": 1.5}])
+        errors = validate_frame(df, properties, required)
+        assert errors.values.tolist() == [[1, "level", "value is not a valid integer"]]
+
+    def test_without_model(self):
+        df = pd.DataFrame.from_records([valid, invalid[-2]])
+        errors = validate_frame(df, properties, required)
+        assert errors.empty  # the "tags" column can't be checked without the model
+
+    def test_100k_rows(self):
+        n = 100_000
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame(
+            {
+                "name": np.where(rng.random(n) < 0.01, "", "ab"),
+                "level": rng.integers(0, 12, n),
+                "weight": rng.random(n),
+                "status": rng.choice(["open", "closed", "other"], n),
+            }
+        )
+        start = time.perf_counter()
+        errors = validate_frame(df, properties, required)
+        elapsed = time.perf_counter() - start
+        assert elapsed < 1
+        assert (errors["column"] == "level").sum() == (df["level"] > 10).sum()
+        assert (errors["column"] == "status").sum() == (df["status"] == "other").sum()
+
+
+class TestGridWrapperValidation:
+    def test_errors_highlighted(self):
+        grid = GridWrapper(schema=ExampleValidatedSchema, value=[valid] + invalid)
+        assert set(zip(grid.errors["row"], grid.errors["column"])) == (
+            pydantic_errors([valid] + invalid)
+        )
+        assert "Level" in grid.renderers
+        assert "Tags" in grid.renderers
+        grid.value = [valid]
+        assert grid.errors.empty
+        assert grid.renderers == {}
+
+    def test_user_renderers_kept(self):
+        renderers = {"Name": TextRenderer(text_color="blue")}
+        grid = GridWrapper(
+            schema=ExampleValidatedSchema,
+            value=[valid],
+            kwargs_datagrid_update={"renderers": renderers},
+        )
+        assert grid.renderers == renderers
+        grid.value = [valid] + invalid
+        assert grid.renderers["Name"].text_color == "blue"
+        assert "Level" in grid.renderers
+        renderers1 = {"Level": TextRenderer(text_color="red")}
+        grid.renderers = renderers1  # the highlights are kept on top
+        assert grid.renderers["Level"].text_color == "red"
+        assert "Tags" in grid.renderers
+        grid.value = [valid]
+        assert grid.renderers == renderers1
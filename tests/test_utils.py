@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from ipyautoui._utils import round_sig_figs, round_sig_figs_array
+
+
+class TestRoundSigFigs:
+    def test_matches_scalar(self):
+        rng = np.random.default_rng(0)
+        x = rng.standard_normal(10000) * 10.0 ** rng.integers(-8, 8, 10000)
+        x[:4] = [0.0, np.nan, np.inf, -np.inf]
+        for sig_figs in (1, 3, 6):
+            expected = [round_sig_figs(v, sig_figs) for v in x]
+            np.testing.assert_allclose(
+                round_sig_figs_array(x, sig_figs), expected, rtol=1e-12
+            )
+
+    def test_scalar(self):
+        assert round_sig_figs(0, 3) == 0
+        assert round_sig_figs(None, 3) is None
+        assert round_sig_figs(-0.0012345, 2) == -0.0012
+        assert round_sig_figs(12345, 2) == 12000
+        assert round_sig_figs(np.int64(12345), 2) == 12000
+        assert round_sig_figs(np.float32(1.2345), 2) == np.float32(1.2)
+        assert round_sig_figs(True, 2) is True
+
+    def test_1m_cells(self):
+        x = pd.Series(np.random.default_rng(1).lognormal(0, 5, 1_000_000))
+        vectorized = round_sig_figs_array(x.to_numpy(), 3)
+        scalar = x.apply(lambda v: round_sig_figs(v, sig_figs=3))
+        np.testing.assert_allclose(vectorized, scalar.to_numpy(), rtol=1e-12)